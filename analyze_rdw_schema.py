@@ -1,4 +1,5 @@
-import urllib.request, json, urllib.parse
+import json, urllib.parse
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 # Datasets to inspect
 URLS = {
@@ -17,8 +18,7 @@ def fetch(url):
     # Fetch a good sample (100 items) for Rotterdam to see populated fields
     u = url + "?" + urllib.parse.urlencode({"areamanagerid": MGR_ID, "$limit": 100})
     try:
-        with urllib.request.urlopen(u) as response:
-            return json.loads(response.read().decode('utf-8'))
+        return fetch_json(u)
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return []
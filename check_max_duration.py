@@ -1,4 +1,5 @@
-import urllib.request, json, urllib.parse
+import json, urllib.parse
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 print("Checking maxdurationright...")
 url = "https://opendata.rdw.nl/resource/ixf8-gtwq.json"
@@ -6,8 +7,7 @@ params = {"areamanagerid": "599", "$limit": "5000"}
 url += "?" + urllib.parse.urlencode(params)
 
 try:
-    with urllib.request.urlopen(url) as response:
-        data = json.loads(response.read().decode('utf-8'))
+    data = fetch_json(url)
 
     found = [d for d in data if int(d.get('maxdurationright', 0)) > 0]
     print(f"Total records: {len(data)}")
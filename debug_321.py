@@ -1,4 +1,5 @@
-import urllib.request, json, urllib.parse
+import json, urllib.parse
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 # Config
 MGR_ID = "599" # Rotterdam
@@ -12,8 +13,7 @@ MAPPING_URL = "https://opendata.rdw.nl/resource/qtex-qwd8.json"
 
 def fetch(url, params=None):
     if params: url += "?" + urllib.parse.urlencode(params)
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return fetch_json(url)
 
 print("--- Searching for Rate 3.20 in Rotterdam ---")
 all_tariffs = fetch(TARIEFDEEL_URL, {"areamanagerid": MGR_ID, "$limit": 10000})
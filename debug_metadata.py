@@ -1,4 +1,5 @@
-import urllib.request, json, urllib.parse
+import json, urllib.parse
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 # Config
 MGR_ID = "599" # Rotterdam
@@ -15,8 +16,7 @@ URLS = {
 def fetch(url, params):
     url += "?" + urllib.parse.urlencode(params)
     print(f"Fetching {url}")
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return fetch_json(url)
 
 print(f"--- 1. Area Data (Zone {ZONE_ID}) ---")
 area_data = fetch(URLS["AREA"], {"areamanagerid": MGR_ID, "areaid": ZONE_ID})
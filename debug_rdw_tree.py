@@ -1,4 +1,5 @@
-import urllib.request, json, urllib.parse
+import json, urllib.parse
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 MGR_ID = "363" # Amsterdam
 AREA_ID_INTERNAL = "T12B_U11" # We suspect this is 12100 based on previous findings
@@ -17,8 +18,7 @@ CALC_URL = "https://opendata.rdw.nl/resource/nfzq-8g7y.json"
 def fetch(url, params):
     u = url + "?" + urllib.parse.urlencode(params)
     print(f"Fetching {u}")
-    with urllib.request.urlopen(u) as r:
-        return json.loads(r.read().decode())
+    return fetch_json(u)
 
 def run():
     print(f"--- DEBUGGING ZONE {TARGET_DISPLAY_ID} ({MGR_ID}) ---")
@@ -1,4 +1,5 @@
-import urllib.request, json
+import json
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 urls = [
     "https://opendata.rdw.nl/resource/b3us-f26s.json", # Specs
     "https://opendata.rdw.nl/resource/qtex-qwd8.json", # Mapping
@@ -10,10 +11,9 @@ for url in urls:
     full_url = f"{url}?$limit=10000"
     print(f"Checking {url}...")
     try:
-        with urllib.request.urlopen(full_url) as r:
-            data = json.loads(r.read().decode())
-            for d in data:
-                if '12100' in str(d):
-                    print(f"MATCH in {url}: {json.dumps(d)}")
+        data = fetch_json(full_url)
+        for d in data:
+            if '12100' in str(d):
+                print(f"MATCH in {url}: {json.dumps(d)}")
     except Exception as e:
         print(f"Error {url}: {e}")
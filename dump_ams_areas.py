@@ -1,6 +1,6 @@
-import urllib.request, json
+import json
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 u='https://opendata.rdw.nl/resource/b3us-f26s.json?areamanagerid=363&$limit=5000'
-with urllib.request.urlopen(u) as r:
-    data = json.loads(r.read().decode())
-    for d in data:
-        print(f"ID: {d.get('areaid')} | Desc: {d.get('areadesc')}")
+data = fetch_json(u)
+for d in data:
+    print(f"ID: {d.get('areaid')} | Desc: {d.get('areadesc')}")
@@ -1,9 +1,9 @@
-import urllib.request, json
+import json
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 u='https://opendata.rdw.nl/resource/b3us-f26s.json?areamanagerid=363'
-with urllib.request.urlopen(u) as r:
-    data = json.loads(r.read().decode())
-    if data:
-        print(f"Keys: {list(data[0].keys())}")
-        # Print a few examples
-        for d in data[:3]:
-            print(f"ID: {d.get('areaid')} | Desc: {d.get('areadesc')}")
+data = fetch_json(u)
+if data:
+    print(f"Keys: {list(data[0].keys())}")
+    # Print a few examples
+    for d in data[:3]:
+        print(f"ID: {d.get('areaid')} | Desc: {d.get('areadesc')}")
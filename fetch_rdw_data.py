@@ -1,10 +1,26 @@
-import urllib.request, json, urllib.parse, os, sys
+import argparse, json, os, sys
 from datetime import datetime, timezone
-import firebase_admin
-from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 import google.generativeai as genai
+import heapq
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import time
+import tracemalloc
+from rdw_http import FetchEngine, DEFAULT_CONCURRENCY
+from rdw_sync import SyncState
+from rdw_columnar import snapshot_records
+from rdw_schema import Day, WEEKDAYS, MINUTES_PER_DAY, Area, parse_datasets, format_hhmm
+from rdw_join import build_join
+from rdw_pricing import encode_grid
+from rdw_temporal import TemporalDatasets, valid_on
+from rdw_translate import (TranslationStage, StubModel, fallback_translation, describe_template, template_key,
+                           fill_template, migrate_cache)
+from rdw_translate_rules import rule_template
+from rdw_manifest import HASH_FIELD, Manifest, content_hash, remote_hashes, split_changed
+from rdw_sink import DEFAULT_SINK, open_sink, parse_sink
+from rdw_upload import UPLOAD_MODE, UPLOAD_MODES
+from rdw_translation_store import TranslationStore, DEFAULT_PATH as TRANSLATION_DB
 
 load_dotenv()
 
@@ -17,9 +33,21 @@ DESC_URL = "https://opendata.rdw.nl/resource/yefi-qfiq.json"
 CALC_URL = "https://opendata.rdw.nl/resource/nfzq-8g7y.json"
 AREAS_URL = "https://opendata.rdw.nl/resource/b3us-f26s.json"
 
-# Optioneel: alleen nu geldige regelingen ophalen (minder payload). Zet RDW_USE_DATE_FILTER=1 in omgeving.
+# Alleen nu geldige rijen ophalen ($where op start-/einddatum per dataset, zie DATASET_SPECS).
+# Standaard aan; RDW_USE_DATE_FILTER=0 haalt ook verlopen/historische rijen op.
 # Volledig "incrementeel" (alleen gewijzigde records) vereist last_modified van RDW; nu: full fetch, updated_at = run-timestamp.
-USE_DATE_FILTER = os.environ.get("RDW_USE_DATE_FILTER", "").strip().lower() in ("1", "true", "yes")
+USE_DATE_FILTER = os.environ.get("RDW_USE_DATE_FILTER", "1").strip().lower() in ("1", "true", "yes")
+# Polygonen worden teruggebracht tot één coördinaat (eerste punt); simplify behoudt begin-/eindpunt van elke ring.
+GEOMETRY_TOLERANCE = os.environ.get("RDW_GEOMETRY_TOLERANCE", "0.01")
+# Max. gelijktijdige RDW-requests (alle datasets x TARGET_CITIES lopen parallel).
+FETCH_CONCURRENCY = int(os.environ.get("RDW_FETCH_CONCURRENCY", str(DEFAULT_CONCURRENCY)))
+# Processen voor de zone-transform (shards per beheerder, max. TRANSFORM_SHARD_SIZE zones); 1 = serieel.
+TRANSFORM_WORKERS = int(os.environ.get("RDW_TRANSFORM_WORKERS", str(os.cpu_count() or 1)))
+TRANSFORM_SHARD_SIZE = 500
+# merge_day_rates: vanaf zoveel opties per dag de heap-sweep i.p.v. de eenvoudige scan (zie scripts/bench_rate_merge.py).
+RATE_MERGE_SWEEP_MIN = int(os.environ.get("RDW_RATE_MERGE_SWEEP_MIN", "32"))
+# Reconciliatie: nooit meer dan dit deel van de bestaande zones in één run verwijderen (tenzij --allow-mass-delete).
+MAX_DELETE_FRACTION = float(os.environ.get("RDW_MAX_DELETE_FRACTION", "0.5"))
 
 TARGET_CITIES = {
     "363": "Amsterdam", "599": "Rotterdam", "518": "Den Haag",
@@ -30,6 +58,73 @@ ALIASES = {
     "363_T12B": "12100",
 }
 
+# Declaratieve query per dataset: alleen de kolommen die de pipeline gebruikt ($select) en een
+# geldigheidsfilter ($where) op (startkolom, eindkolom). "datetime"-kolommen zijn YYYYMMDDhhmmss, anders YYYYMMDD.
+# "snapshot" = bestandsnaam in data/raw voor --from-snapshot (scripts/fetch_rdw.py haalt dezelfde queries op); een kolomsnapshot
+# (rdw_columnar.py) met dezelfde naam zonder .json heeft voorrang.
+DATASET_SPECS = {
+    "areas": {
+        "url": AREAS_URL,
+        "select": ["areamanagerid", "areaid", "areadesc",
+                   f"simplify_preserve_topology(areageometryaswgs84, {GEOMETRY_TOLERANCE}) as areageometryaswgs84"],
+        "valid": None,
+        "snapshot": "gebied.json",
+    },
+    "mapping": {
+        "url": MAPPING_URL,
+        "select": ["areamanagerid", "areaid", "regulationid", "usageid",
+                   "startdatearearegulation", "enddatearearegulation"],
+        "valid": ("startdatearearegulation", "enddatearearegulation", "date"),
+        "snapshot": "gebiedsregeling.json",
+    },
+    "timeframes": {
+        "url": TIJDVAK_URL,
+        "select": ["areamanagerid", "regulationid", "daytimeframe", "starttimetimeframe", "endtimetimeframe",
+                   "farecalculationcode", "maxdurationright", "startdatetimeframe", "enddatetimeframe"],
+        "valid": ("startdatetimeframe", "enddatetimeframe", "datetime"),
+        "snapshot": "tijdvak.json",
+    },
+    "fareparts": {
+        "url": TARIEFDEEL_URL,
+        "select": ["areamanagerid", "farecalculationcode", "amountfarepart", "stepsizefarepart",
+                   "startdurationfarepart", "startdatefarepart", "enddatefarepart"],
+        "valid": ("startdatefarepart", "enddatefarepart", "date"),
+        "snapshot": "tariefdeel.json",
+    },
+    "regulations": {
+        "url": DESC_URL,
+        "select": ["areamanagerid", "regulationid", "regulationdesc", "regulationtype",
+                   "startdateregulation", "enddateregulation"],
+        "valid": ("startdateregulation", "enddateregulation", "date"),
+        "snapshot": "regeling.json",
+    },
+    "calculations": {
+        "url": CALC_URL,
+        "select": ["areamanagerid", "farecalculationcode", "farecalculationdesc", "startdatefare", "enddatefare"],
+        "valid": ("startdatefare", "enddatefare", "date"),
+        "snapshot": "tariefberekening.json",
+    },
+}
+# Kolomtype van de geldigheidskolommen per gedateerde dataset (voor rdw_temporal.TemporalDatasets).
+VALIDITY_KINDS = {name: spec["valid"][2] for name, spec in DATASET_SPECS.items() if spec["valid"]}
+
+
+def validity_where(valid, window_start, window_end):
+    """$where voor rijen waarvan [start, eind] het venster [window_start, window_end] (YYYYMMDD) overlapt."""
+    start_col, end_col, kind = valid
+    lo, hi = (window_start + "000000", window_end + "235959") if kind == "datetime" else (window_start, window_end)
+    return (f"({start_col} is null or {start_col} <= '{hi}') and "
+            f"({end_col} is null or {end_col} >= '{lo}')")
+
+
+def dataset_params(name, window_start, window_end, use_date_filter=True):
+    """SODA-params ($select, $where) voor één dataset uit DATASET_SPECS."""
+    spec = DATASET_SPECS[name]
+    params = {"$select": ", ".join(spec["select"])}
+    if use_date_filter and spec["valid"]:
+        params["$where"] = validity_where(spec["valid"], window_start, window_end)
+    return params
+
 # --- LLM Setup ---
 API_KEY = os.getenv("GEMINI_API_KEY")
 if API_KEY:
@@ -39,442 +134,741 @@ else:
     print("WARNING: No GEMINI_API_KEY found in .env. LLM translation will be skipped.")
     model = None
 
-CACHE_FILE = "translation_cache.json"
-TRANSLATION_CACHE = {}
+LOCAL_SINK_FILE = os.path.join("data", "processed", "zones.json")
+
+CACHE_FILE = "translation_cache.json"  # oude JSON-cache: alleen nog eenmalig geïmporteerd in de store
+TRANSLATION_CACHE = {}  # TranslationStore na load_cache() (rdw_translation_store.py)
+# Tijdens build_zones een lijst: cache-misses worden verzameld en daarna in de vertaalstap vertaald (geen
+# LLM-calls vanuit de transform of geforkte processen).
+PENDING_TRANSLATIONS = None
+TRANSLATION_LOOKUPS = Counter()  # lookups/rules/hits van translate_desc_llm (voor de hitratio)
 
 def load_cache():
+    """Open de vertaalstore (lazy, per sleutel opzoeken); importeert translation_cache.json de eerste keer."""
     global TRANSLATION_CACHE
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                TRANSLATION_CACHE = json.load(f)
-        except Exception as e:
-            print(f"Error loading cache: {e}")
-
-def save_cache():
+    TRANSLATION_CACHE = TranslationStore(TRANSLATION_DB)
     try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(TRANSLATION_CACHE, f, ensure_ascii=False, indent=2)
+        imported = TRANSLATION_CACHE.import_json_once(CACHE_FILE)
+        if imported:
+            print(f"Imported {imported} translations from {CACHE_FILE} into {TRANSLATION_DB}.")
+        if TRANSLATION_CACHE.meta("templates_migrated") is None:
+            stats = migrate_cache(TRANSLATION_CACHE)
+            TRANSLATION_CACHE.set_meta("templates_migrated", stats["converted"])
+            print(f"Migrated translations to rate-independent templates: {stats['converted']} patterns converted, "
+                  f"{stats['ambiguous'] + stats['conflicting']} left for the LLM.")
     except Exception as e:
-        print(f"Error saving cache: {e}")
+        print(f"Error importing cache: {e}")
 
 def translate_desc_llm(text, current_rate):
     """
-    Translates Dutch parking tariff descriptions to specific English format using Gemini.
+    Vertaling van een tariefomschrijving: het sjabloon voor het patroon van de omschrijving komt uit de
+    regels (rdw_translate_rules.py) of anders uit TRANSLATION_CACHE, en wordt lokaal ingevuld met het
+    tarief (rdw_translate.describe_template). Tijdens
+    het bouwen (PENDING_TRANSLATIONS is een lijst) worden misses verzameld en wordt None geretourneerd; de
+    vertaalstap vertaalt ze daarna in batches. Buiten die fase: regex-fallback, geen losse LLM-call.
+    Regels en cache gelden ook zonder model (--no-llm, geen key); alleen een miss blijft dan de brontekst.
     """
     if not text: return None
+
+    pattern, values = describe_template(text)
+    TRANSLATION_LOOKUPS["lookups"] += 1
+    template = rule_template(pattern)
+    if template is not None:
+        TRANSLATION_LOOKUPS["rules"] += 1
+    else:
+        template = TRANSLATION_CACHE.get(template_key(pattern))
+        if template is not None:
+            TRANSLATION_LOOKUPS["hits"] += 1
+    if template is not None:
+        return fill_template(template, current_rate, values)
     if not model: return text # Fallback if no key
+    if PENDING_TRANSLATIONS is not None:
+        PENDING_TRANSLATIONS.append(pattern)
+        return None
+    return fallback_translation(text, current_rate)
+
+# --- Fetch Logic (zie rdw_http.py) ---
 
-    # Check Cache
-    cache_key = f"{text}|{current_rate}"
-    if cache_key in TRANSLATION_CACHE:
-        return TRANSLATION_CACHE[cache_key]
-
-    # Prompt
-    prompt = f"""
-    You are a helpful assistant for a parking app.
-    Translate the following Dutch parking tariff description into a specific English format.
-
-    Context:
-    - The 'Current Hourly Rate' for this block is: € {current_rate:.2f}
-    - The input text describes specific rules like "Start tariffs" (Stop & Shop) or "Step sizes".
-
-    Rules:
-    1. If the text mentions "stappen van X min" (steps of X min), output: "€ {current_rate:.2f}/h > payment per X minutes"
-    2. If the text mentions "Stop en Shop" or "eerste X min Y...", output: "€ [Price] for the first [X] minutes. € {current_rate:.2f} per hour after [X] minutes".
-       (Note: The 'after' price should be the Current Hourly Rate provided above).
-    3. If the text is generic or just repeats the rate, output it simply as "€ {current_rate:.2f} per hour".
-    4. Keep it concise. No markdown, no explanations. Just the final string.
-
-    Input Dutch: "{text}"
-    Output English:
+def fetch_datasets(reference_date, window_end=None):
     """
+    Full fetch: alle datasets x TARGET_CITIES gelijktijdig (keep-alive pool, zie rdw_http.py).
+    Elke query wordt volledig gepagineerd (keyset op :id); geen stille afkapping op $limit meer.
+    Per dataset alleen de benodigde kolommen en (standaard) alleen rijen die vandaag geldig zijn;
+    met window_end alle rijen die ergens in reference_date..window_end gelden (--as-of).
+    """
+    window_end = window_end or reference_date
+    if USE_DATE_FILTER:
+        window = reference_date if window_end == reference_date else f"{reference_date}..{window_end}"
+        print(f"  Using validity filter (start <= {window} <= end) for all dated datasets.")
+    datasets = [
+        (name, spec["url"], dataset_params(name, reference_date, window_end, USE_DATE_FILTER))
+        for name, spec in DATASET_SPECS.items()
+    ]
+    tasks = [(name, url, {"areamanagerid": mgr, **base}) for name, url, base in datasets for mgr in TARGET_CITIES]
+    engine = FetchEngine(concurrency=FETCH_CONCURRENCY)
+    try:
+        results = engine.fetch_all(tasks)
+    finally:
+        engine.close()
+    engine.print_summary()
+    raw = {name: [] for name, _, _ in datasets}
+    for (name, _, _), rows in zip(tasks, results):
+        raw[name].extend(rows)
+    return raw
+
 
+def fetch_datasets_incremental(reference_date, full_resync=False):
+    """
+    Incrementele fetch (zie rdw_sync.py): alleen rijen met :updated_at na de high-water mark per
+    (dataset, beheerder), samengevoegd in de lokale kopie. Zonder server-side datumfilter: rijen die
+    later geldig worden veranderen niet van :updated_at, dus geldigheid wordt lokaal bepaald.
+    Retourneert (raw, changed, state) met changed = {dataset: [rijen die gewijzigd zijn of van geldigheid
+    wisselden]}; de nieuwe stand staat klaar in state en wordt pas na een geslaagde upload vastgelegd
+    (state.commit() in run_update).
+    """
+    queries = [
+        (name, spec["url"], mgr, dataset_params(name, reference_date, reference_date, use_date_filter=False))
+        for name, spec in DATASET_SPECS.items() for mgr in TARGET_CITIES
+    ]
+    engine = FetchEngine(concurrency=FETCH_CONCURRENCY)
+    state = SyncState()
     try:
-        response = model.generate_content(prompt)
-        result = response.text.strip()
-        # Clean up quotes if model added them
-        result = result.replace('"', '').replace("'", "")
-
-        # Save to cache
-        TRANSLATION_CACHE[cache_key] = result
-        save_cache()
-        # time.sleep(4) - Removed for Paid Tier
-        return result
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        # FALLBACK: Regex Logic
-        import re
-        if "stappen van" in text:
-            match = re.search(r"stappen van (\d+) min", text)
-            if match:
-                mins = match.group(1)
-                return f"\u20ac {current_rate:.2f}/h > payment per {mins} minutes"
-        if "Stop en Shop" in text:
-             match = re.search(r"eerste (\d+)min ([\d,]+)", text)
-             if match:
-                 mins = match.group(1)
-                 price = match.group(2).replace(',', '.')
-                 return f"\u20ac {price} for the first {mins} minutes. \u20ac {current_rate:.2f} per hour after {mins} minutes"
-        return text # Ultimate fallback
-
-# --- Fetch Logic ---
-
-def fetch_json(url, params=None):
-    if params:
-        url += "?" + urllib.parse.urlencode(params)
-    print(f"  Requesting: {url}")
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read().decode('utf-8'))
-
-def run_update():
-    load_cache() # Init cache
+        raw, changed = state.sync(engine, queries, full=full_resync)
+    finally:
+        engine.close()
+    engine.print_summary()
+
+    # Rijen waarvan de geldigheid sinds de vorige run is omgeslagen (bijv. nieuw tarief per vandaag).
+    prev_date = state.last_reference_date
+    if USE_DATE_FILTER and prev_date and prev_date != reference_date:
+        for name, rows in raw.items():
+            changed_ids = {r.get(":id") for r in changed[name]}
+            for r in rows:
+                if r.get(":id") not in changed_ids and row_is_valid(name, r, prev_date) != row_is_valid(name, r, reference_date):
+                    changed[name].append(r)
+    state.save_meta(reference_date)
+    print("  Incremental changes: " + ", ".join(f"{n}={len(rows)}" for n, rows in changed.items()))
+    return raw, changed, state
+
+
+def load_snapshot(directory, reference_date, window_end=None):
+    """
+    Offline replay: lees de datasets uit lokale SODA-JSON of kolomsnapshots (rdw_columnar.py) in directory
+    (zie DATASET_SPECS["..."]["snapshot"]), beperkt tot TARGET_CITIES en (standaard) tot rijen die op
+    reference_date (of ergens in reference_date..window_end) geldig zijn. Ontbrekende bestanden gelden als lege dataset (zonder mapping valt elk
+    gebied terug op regulationid = areaid). Levert direct records (rdw_schema.py): een kolomsnapshot wordt
+    zonder SODA-strings ingelezen.
+    """
+    typed = {}
+    for name, spec in DATASET_SPECS.items():
+        stem = spec["snapshot"][: -len(".json")]
+        records = snapshot_records(directory, stem, name, managers=set(TARGET_CITIES))
+        if records is None:
+            print(f"  WARNING: snapshot {stem} missing in {directory}; dataset '{name}' is empty.")
+            records = []
+        elif not records:
+            print(f"  WARNING: snapshot {stem} has no rows for the target managers; create one for them with "
+                  f"scripts/fetch_rdw.py --managers ... or pass --managers with managers that are in {directory}.")
+        typed[name] = records
+        print(f"  Snapshot {stem}: {len(records)} rows for target managers.")
+    if USE_DATE_FILTER:
+        typed = {name: [r for r in records if record_is_valid(name, r, reference_date, window_end)]
+                 for name, records in typed.items()}
+    return typed
 
-    cred = credentials.Certificate("service-account.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
 
-    print("Fetching RDW data...")
-    reference_date = datetime.now().strftime("%Y%m%d")  # voor optionele datumfilter (D2)
+def row_is_valid(name, row, date, window_end=None):
+    """Lokale tegenhanger van validity_where (zelfde venster, zelfde stringvergelijking)."""
+    valid = DATASET_SPECS[name]["valid"]
+    if not valid:
+        return True
+    start_col, end_col, kind = valid
+    return valid_on(row.get(start_col), row.get(end_col), date, kind, window_end)
 
-    # 1. Fetch Zones (Specs)
-    zones_raw = []
-    for mgr in TARGET_CITIES:
-        zones_raw.extend(fetch_json(AREAS_URL, {"areamanagerid": mgr, "$limit": 5000}))
 
-    # 2. Mappings (optioneel: alleen regelingen die nu geldig zijn: enddate null of >= vandaag)
-    mapping_raw = []
-    mapping_params_base = {"$limit": 5000}
-    if USE_DATE_FILTER:
-        mapping_params_base["$where"] = (
-            "enddatearearegulation is null or enddatearearegulation >= '" + reference_date + "'"
-        )
-        print("  Using date filter for mappings (enddatearearegulation null or >= today).")
-    for mgr in TARGET_CITIES:
-        mapping_raw.extend(fetch_json(MAPPING_URL, {"areamanagerid": mgr, **mapping_params_base}))
-    mapping_raw.sort(key=lambda x: x.get('startdatearearegulation', '0'), reverse=True)
-    area_to_reg = {}
-    proc_map = set()
-    for item in mapping_raw:
-        aid, rid = item.get('areaid'), item.get('regulationid')
-        if aid and rid and (aid, rid) not in proc_map:
-            if aid not in area_to_reg: area_to_reg[aid] = []
-            area_to_reg[aid].append(rid)
-            proc_map.add((aid, rid))
-
-    # 3. Time Slots
-    slots_raw = []
-    for mgr in TARGET_CITIES:
-        slots_raw.extend(fetch_json(TIJDVAK_URL, {"areamanagerid": mgr, "$limit": 10000}))
-    slots_raw.sort(key=lambda x: x.get('startdatetimeframe', '0'), reverse=True)
-    tijdvak_map = {}
-    proc_slots = set()
-    for s in slots_raw:
-        rid, day, start = s.get('regulationid'), s.get('daytimeframe'), s.get('starttimetimeframe')
-        # Store ALL slots for a regulation for max_duration scan
-        if rid:
-             if rid not in tijdvak_map: tijdvak_map[rid] = []
-             tijdvak_map[rid].append(s)
-
-    # 4. Tariffs & Descriptions
-    tarief_raw = []
-    for mgr in TARGET_CITIES:
-        tarief_raw.extend(fetch_json(TARIEFDEEL_URL, {"areamanagerid": mgr, "$limit": 10000}))
-
-    reg_info_raw = []
-    for mgr in TARGET_CITIES:
-        reg_info_raw.extend(fetch_json(DESC_URL, {"areamanagerid": mgr, "$limit": 5000}))
-
-    calc_desc_raw = []
-    for mgr in TARGET_CITIES:
-        calc_desc_raw.extend(fetch_json(CALC_URL, {"areamanagerid": mgr, "$limit": 5000}))
-
-    reg_map = {(r['areamanagerid'], r['regulationid']): (r.get('regulationdesc'), r.get('regulationtype', 'B')) for r in reg_info_raw if 'areamanagerid' in r and 'regulationid' in r}
-    calc_map = {(c['areamanagerid'], c['farecalculationcode']): c.get('farecalculationdesc') for c in calc_desc_raw if 'areamanagerid' in c and 'farecalculationcode' in c}
-
-    tariff_parts_map = {}
-    tarief_raw.sort(key=lambda x: x.get('startdatefarepart', '0'), reverse=True)
-    today = datetime.now().strftime("%Y%m%d")
-    proc_tar = set()
-    for i in tarief_raw:
-        m, c, d = i.get('areamanagerid'), i.get('farecalculationcode'), i.get('startdatefarepart', '0')
-        if c and (m, c) not in proc_tar and d <= today:
-            amt, step = float(i.get('amountfarepart', 0)), float(i.get('stepsizefarepart', 1))
-            rate = (amt/step)*60 if step > 0 else 0
-            tariff_parts_map[(m, c)] = (rate, step, amt)
-            proc_tar.add((m, c))
+def record_is_valid(name, record, date, window_end=None):
+    """row_is_valid voor een record (start_date/end_date; ontbrekende startdatum is "0", ook open)."""
+    valid = DATASET_SPECS[name]["valid"]
+    if not valid:
+        return True
+    return valid_on(record.start_date, record.end_date, date, valid[2], window_end)
+
+
+def filter_valid(raw, reference_date, window_end=None):
+    """Houd per dataset alleen rijen die op reference_date (of ergens t/m window_end) geldig zijn."""
+    return {name: [r for r in rows if row_is_valid(name, r, reference_date, window_end)]
+            for name, rows in raw.items()}
+
+
+# --- Transform ---
+
+def build_lookups(raw, today):
+    """Koppeltabellen (mapping, tijdvakken, tarieven, omschrijvingen, gebieden) uit de ruwe datasets."""
+    return build_lookups_typed(parse_datasets(raw), today)  # één keer parsen naar records (rdw_schema.py)
+
+
+def build_lookups_typed(typed, today):
+    """Als build_lookups, op al geparste records (bijv. TemporalDatasets.as_of(datum) voor --as-of)."""
+    zones_raw, reg_info_raw, calc_desc_raw = typed["areas"], typed["regulations"], typed["calculations"]
+
+    # Join mapping -> tijdvak -> tariefdeel (rdw_join.py): nieuwste per sleutel als group-by argmax.
+    # Standaard alleen regelingen die nu geldig zijn, zie DATASET_SPECS.
+    joined = build_join(typed, today)
+    mapping_raw = joined["mapping_sorted"]
+    area_to_reg, tijdvak_map, tariff_parts_map = joined["area_to_reg"], joined["tijdvak_map"], joined["tariff_parts_map"]
+
+    # Descriptions
+    reg_map = {(r.manager, r.regulation_id): (r.desc, r.type) for r in reg_info_raw if r.manager is not None and r.regulation_id is not None}
+    calc_map = {(c.manager, c.fare_code): sys.intern(c.desc) if c.desc else c.desc
+                for c in calc_desc_raw if c.manager is not None and c.fare_code is not None}
 
     # Merge all unique Area IDs
     all_area_ids = set()
-    area_specs = {} # Map areaid -> spec dict
+    area_specs = {} # Map (mgr, areaid) -> Area
 
     # Process Specs
     for item in zones_raw:
-        aid = item.get('areaid')
+        aid = item.area_id
         if aid:
-            all_area_ids.add((item.get('areamanagerid'), aid))
-            area_specs[(item.get('areamanagerid'), aid)] = item
+            all_area_ids.add((item.manager, aid))
+            area_specs[(item.manager, aid)] = item
 
     # Process Mappings
     for item in mapping_raw:
-        aid = item.get('areaid')
-        mid = item.get('areamanagerid')
+        aid = item.area_id
+        mid = item.manager
         if aid and mid and (mid, aid) not in all_area_ids:
             all_area_ids.add((mid, aid))
-            area_specs[(mid, aid)] = {
-                'areamanagerid': mid, 'areaid': aid, 'areadesc': None, 'areageometryaswgs84': None
-            }
+            area_specs[(mid, aid)] = Area(mid, aid, None, None)
 
-    print(f"Total unique zones found: {len(all_area_ids)}")
+    # UsageID Mapping for Filter
+    usage_map = {}
+    for item in mapping_raw:
+        if item.usage_id is not None:
+            usage_map[(item.manager, item.area_id)] = item.usage_id
 
-    processed_zones = []
-    count = 0
-    for (mgr_id, zone_id) in all_area_ids:
+    return {
+        "area_to_reg": area_to_reg, "tijdvak_map": tijdvak_map, "reg_map": reg_map, "calc_map": calc_map,
+        "tariff_parts_map": tariff_parts_map, "all_area_ids": all_area_ids, "area_specs": area_specs,
+        "usage_map": usage_map, "tariff_date": today,
+    }
 
-        item = area_specs.get((mgr_id, zone_id))
-        city = TARGET_CITIES.get(mgr_id, "Unknown")
-        name = item.get('areadesc') or f"{city} Zone {zone_id}"
 
-        # Geolocation logic
-        city_centers = {"363": (52.3676, 4.9041), "599": (51.9225, 4.47917), "518": (52.0705, 4.3007), "344": (52.0907, 5.1214)}
-        lat, lon = city_centers.get(mgr_id, (52.0907, 5.1214))
-        geo = item.get('areageometryaswgs84')
-        if geo and 'coordinates' in geo:
-            try:
-                c = geo['coordinates']
-                while isinstance(c[0], list): c = c[0]
-                lon, lat = c[0], c[1]
-            except: pass
-        if abs(lat - city_centers.get(mgr_id, (0,0))[0]) < 0.1:
-            h = sum(ord(c) for c in zone_id); lat += ((h%100)-50)*0.0004; lon += (((h*13)%100)-50)*0.0006
+def affected_zones(changed, lk):
+    """(mgr, areaid)-sleutels waarvan de uitkomst kan wijzigen door de gewijzigde rijen."""
+    areas = {(r.get('areamanagerid'), r.get('areaid')) for r in changed["areas"] + changed["mapping"]}
+    rids = {r.get('regulationid') for r in changed["timeframes"] + changed["regulations"]}
+    codes = {r.get('farecalculationcode') for r in changed["fareparts"] + changed["calculations"]}
+    if codes:
+        for rid, slots in lk["tijdvak_map"].items():
+            if any(s.fare_code in codes for s in slots):
+                rids.add(rid)
+    area_to_reg = lk["area_to_reg"]
+    return {
+        (mgr_id, zone_id) for (mgr_id, zone_id) in lk["all_area_ids"]
+        if (mgr_id, zone_id) in areas or any(rid in rids for rid in area_to_reg.get(zone_id, [zone_id]))
+    }
 
-        display_id = ALIASES.get(f"{mgr_id}_{zone_id}", zone_id)
 
-        if zone_id == "T12B" or zone_id == "T12B_U11":
-             print(f"Processing {zone_id} -> Display: {display_id}")
+class RateOption:
+    """Tariefoptie uit één tijdvak; een DAGELIJKS-optie wordt door alle weekdagen gedeeld (niet gekopieerd)."""
+    __slots__ = ("day", "day_name", "start", "end", "rate", "step", "amt", "desc", "type", "max_duration",
+                 "fare_code")
 
-        # Rates
-        rids = area_to_reg.get(zone_id, [zone_id])
-        all_opts = []
-
-        # Max Duration & Holidays Init
-        max_dur_mins = 24 * 60
-        special_rules = False
-
-        for rid in rids:
-            r_desc, rtype = reg_map.get((mgr_id, rid), (None, 'B'))
-
-            # Use all slots for metadata scan
-            # But filter for valid rate slots
-            valid_slots = []
-
-            # Helper to dedupe slots processed
-            seen_slots = set()
-
-            raw_slots = tijdvak_map.get(rid, [])
-            for s in raw_slots:
-                # Metadata Check
-                md = int(s.get('maxdurationright', 0))
-                if md > 0: max_dur_mins = md
-
-                day_tf = s.get('daytimeframe', '')
-                if day_tf not in ["MAANDAG", "DINSDAG", "WOENSDAG", "DONDERDAG", "VRIJDAG", "ZATERDAG", "ZONDAG", "DAGELIJKS"]:
-                    special_rules = True
-
-                # Rate Processing Logic
-                sig = (s.get('daytimeframe'), s.get('starttimetimeframe'))
-                if sig in seen_slots: continue
-                seen_slots.add(sig)
-
-                cc = s.get('farecalculationcode')
-                t_info = tariff_parts_map.get((mgr_id, cc))
-                if t_info:
-                    desc_text = calc_map.get((mgr_id, cc), cc) or ""
-
-                    if 'kaart' in desc_text.lower(): continue
-                    # D3: step > 60 (e.g. dagkaarten) now included; display handled below (e.g. step >= 480 -> "€ X / dag")
-
-                    all_opts.append({
-                        "day": s.get('daytimeframe', 'Daily'),
-                        "start": int(s.get('starttimetimeframe', '0').zfill(4)),
-                        "end": int(s.get('endtimetimeframe', '2400').zfill(4)),
-                        "rate": t_info[0], "step": t_info[1], "amt": t_info[2],
-                        "desc": desc_text, "type": rtype
-                    })
-
-        # Process per day
-        final_rates = []
-        day_names = ["MAANDAG", "DINSDAG", "WOENSDAG", "DONDERDAG", "VRIJDAG", "ZATERDAG", "ZONDAG"]
-
-        # Expand 'Daily'
-        by_day = {}
-        for o in all_opts:
-            d_raw = o['day'].upper()
-            days_to_apply = day_names if d_raw in ['DAGELIJKS', 'DAILY', 'ELKE DAG'] else [d_raw]
-            for d in days_to_apply:
-                if d not in by_day: by_day[d] = []
-                c = o.copy()
-                c['day'] = d
-                by_day[d].append(c)
-
-        day_order = {d: i for i, d in enumerate(day_names)}
-        sorted_days = sorted(by_day.keys(), key=lambda d: day_order.get(d, 99))
-
-        for day in sorted_days:
-            opts = by_day[day]
-            if not opts: continue
-
-            # Sweep Line Points
-            points = set([0, 2400])
-            for o in opts:
-                points.add(o['start'])
-                points.add(o['end'])
-            sorted_points = sorted(list(points))
-
-            merged_slots = []
-            for i in range(len(sorted_points) - 1):
-                t_start = sorted_points[i]
-                t_end = sorted_points[i+1]
-
-                active = [r for r in opts if r['start'] <= t_start and r['end'] >= t_end]
-
-                if not active:
-                    best = {"rate": 0, "desc": "Vrij parkeren", "amt": 0, "step": 0}
-                else:
-                    active.sort(key=lambda x: (x['rate'], len(x['desc'])), reverse=True)
-                    best = active[0]
-
-                if merged_slots:
-                    prev = merged_slots[-1]
-                    price_match = abs(prev['rate'] - best['rate']) < 0.01
-                    if price_match:
-                        prev['end'] = t_end
-                        continue
-
-                merged_slots.append({
-                    "start": t_start, "end": t_end,
-                    "rate": best['rate'], "desc": best['desc'], "step": best['step'], "amt": best['amt']
-                })
-
-            # Post-Process: Merge adjacent PAID slots with LLM Translation
-            final_merged = []
-            if merged_slots:
-                curr = merged_slots[0]
-                curr['source_slots'] = [curr.copy()]
-
-                for i in range(1, len(merged_slots)):
-                    next_s = merged_slots[i]
-                    is_curr_paid = curr['rate'] > 0
-                    is_next_paid = next_s['rate'] > 0
-
-                    if is_curr_paid and is_next_paid:
-                        curr['end'] = next_s['end']
-                        curr['rate'] = max(curr['rate'], next_s['rate'])
-                        curr['source_slots'].append(next_s)
-                    else:
-                        final_merged.append(curr)
-                        curr = next_s
-                        curr['source_slots'] = [curr.copy()]
-                final_merged.append(curr)
-
-                # Generate Text & Labels
-                for m in final_merged:
-                    m['formatted_lines'] = []
-                    seen_texts = set()
-
-                    # Calculate Display Price (e.g. per 15 min)
-                    display_price_label = f"\u20ac {m['rate']:.2f} / u" # Default
-
-                    steps = [s['step'] for s in m['source_slots'] if s['rate'] > 0]
-                    if steps:
-                        avg_step = max(set(steps), key=steps.count)
-                        if avg_step >= 480:
-                            day_amt = next((s['amt'] for s in m['source_slots'] if s.get('step', 0) >= 480 and s['rate'] > 0), m['amt'])
-                            display_price_label = f"\u20ac {day_amt:.2f} / dag"
-                        elif avg_step >= 10:
-                            step_price = (m['rate'] / 60) * avg_step
-                            display_price_label = f"\u20ac {step_price:.2f} / {int(avg_step)} min"
-
-                    m['display_label'] = display_price_label
-
-                    for s in m['source_slots']:
-                         # CALL LLM HERE
-                         if s['desc'] and ("stappen" in s['desc'] or "Stop" in s['desc'] or len(s['desc']) > 15):
-                             txt = translate_desc_llm(s['desc'], m['rate'])
-                         else:
-                             txt = None
-
-                         if not txt:
-                             if s['rate'] > 0:
-                                 if s['step'] >= 480:
-                                     txt = f"\u20ac {s['amt']:.2f} / dag"
-                                 else:
-                                     txt = f"\u20ac {s['rate']:.2f} per uur"
-                                     if s['step'] > 0 and s['step'] != 60:
-                                         txt += f" (stappen van {int(s['step'])} min)"
-
-                         if txt and txt not in seen_texts:
-                             m['formatted_lines'].append(txt)
-                             seen_texts.add(txt)
-
-            # Format Output
-            for m in final_merged:
-                if m['rate'] == 0:
-                     label = "Free parking"
-                     detail = "Vrij parkeren"
-                else:
-                     label = m.get('display_label', f"\u20ac {m['rate']:.2f} / h")
-                     detail = "|".join(m.get('formatted_lines', []))
-
-                t_str = f"{day.capitalize()} {str(m['start']).zfill(4)[:2]}:{str(m['start']).zfill(4)[2:]} - {str(m['end']).zfill(4)[:2]}:{str(m['end']).zfill(4)[2:]}"
-
-                final_rates.append({
-                    "time": t_str,
-                    "price": label.replace('.', ','),
-                    "detail": detail,
-                    "rate_numeric": round(m["rate"], 2)
-                })
-
-        best_price = 0.0
-        for m in final_rates:
-            # Simple heuristic for map pin price
-             pass
-
-        if final_rates:
-             # Find max price for pin
-             # Since 'price' is a string now, we need to rely on what we calculated earlier.
-             # Actually, let's just re-iterate opts for max rate
-             max_r = 0
-             for o in all_opts:
-                 if o['rate'] > max_r: max_r = o['rate']
-             best_price = max_r
-
-        processed_zones.append({
-            "id": display_id, "name": name, "city": city, "mgr_id": mgr_id,
-            "lat": lat, "lng": lon, "price": best_price,
-            "rates": final_rates,
-            "max_duration_mins": max_dur_mins,
-            "has_special_rules": special_rules
-        })
+    def __init__(self, day, day_name, start, end, rate, step, amt, desc, type=None, max_duration=0, fare_code=""):
+        self.day, self.day_name, self.start, self.end = day, day_name, start, end
+        self.rate, self.step, self.amt, self.desc, self.type = rate, step, amt, desc, type
+        self.max_duration = max_duration  # minuten, 0 = geen maximum
+        self.fare_code = fare_code
 
-    print(f"Uploading {len(processed_zones)} zones...")
 
-    # UsageID Mapping for Filter
-    usage_map = {}
-    for item in mapping_raw:
-        if 'usageid' in item:
-            usage_map[(item.get('areamanagerid'), item.get('areaid'))] = item.get('usageid')
+FREE_OPTION = RateOption(None, "", 0, MINUTES_PER_DAY, 0, 0, 0, "Vrij parkeren")
+WEEKDAY_KEYS = [(d, d.name) for d in WEEKDAYS]  # by_day-sleutels voor een DAGELIJKS-optie
+
+
+class RateSlot:
+    """
+    Interval van één dag met het winnende tarief (uit merge_day_rates). Een blok aaneengesloten betaalde
+    slots is ook een RateSlot, met de oorspronkelijke slots (ongewijzigd, niet gekopieerd) in source_slots.
+    """
+    __slots__ = ("start", "end", "rate", "desc", "step", "amt", "source_slots", "max_duration", "fare_code")
+
+    def __init__(self, start, end, rate, desc, step, amt, source_slots=None, max_duration=0, fare_code=""):
+        self.start, self.end, self.rate, self.desc, self.step, self.amt = start, end, rate, desc, step, amt
+        self.source_slots = source_slots
+        self.max_duration, self.fare_code = max_duration, fare_code
+
+
+def _best_by_scan(opts, sorted_points):
+    """Per interval de beste optie door alle opties te scannen: O(N x intervallen), snel voor kleine dagen."""
+    keyed = [(o.start, o.end, (o.rate, len(o.desc)), o) for o in opts]
+    best = []
+    for t_start, t_end in zip(sorted_points, sorted_points[1:]):
+        top, top_key = FREE_OPTION, None
+        for start, end, key, o in keyed:
+            # strikt groter: bij gelijkspel blijft de eerste in opts staan, net als bij de heap-sweep
+            if start <= t_start and end >= t_end and (top_key is None or key > top_key):
+                top, top_key = o, key
+        best.append(top)
+    return best
+
 
+def _best_by_sweep(opts, sorted_points):
+    """
+    Per interval de beste optie via een event-sweep: opties komen op hun starttijd in een max-heap en
+    vallen er (lazy) uit zodra hun eindtijd is bereikt, dus O(N log N).
+    """
+    starts = {}
+    for idx, o in enumerate(opts):
+        if o.start < o.end:  # start >= eind dekt geen enkel interval
+            starts.setdefault(o.start, []).append(idx)
+    heap = []  # (-rate, -len(desc), idx): top = beste actieve optie
+    best = []
+    for t_start in sorted_points[:-1]:
+        for idx in starts.get(t_start, ()):
+            o = opts[idx]
+            heapq.heappush(heap, (-o.rate, -len(o.desc), idx))
+        while heap and opts[heap[0][2]].end <= t_start:
+            heapq.heappop(heap)
+        best.append(opts[heap[0][2]] if heap else FREE_OPTION)
+    return best
+
+
+def merge_day_rates(opts, merge=True):
+    """
+    Sweep over de tijdvakken van één dag: per interval tussen opeenvolgende breekpunten wint de optie met
+    het hoogste (rate, len(desc)); bij gelijkspel de eerste in opts. Lege intervallen zijn "Vrij parkeren";
+    aangrenzende intervallen met (bijna) hetzelfde tarief worden samengevoegd (merge=False: elk interval
+    apart, met max. parkeerduur en tariefcode van de winnaar; zo bouwt build_schedule de price_grid).
+
+    Echte dagen hebben een handvol opties; daar is de eenvoudige scan het snelst. Vanaf
+    RATE_MERGE_SWEEP_MIN opties neemt de heap-sweep het over (zelfde uitvoer, scripts/bench_rate_merge.py).
+    """
+    points = set([0, MINUTES_PER_DAY])
+    for o in opts:
+        points.add(o.start)
+        points.add(o.end)
+    sorted_points = sorted(points)
+    select = _best_by_sweep if len(opts) >= RATE_MERGE_SWEEP_MIN else _best_by_scan
+
+    merged_slots = []
+    for t_start, t_end, best in zip(sorted_points, sorted_points[1:], select(opts, sorted_points)):
+        if merge and merged_slots:
+            prev = merged_slots[-1]
+            price_match = abs(prev.rate - best.rate) < 0.01
+            if price_match:
+                prev.end = t_end
+                continue
+
+        merged_slots.append(RateSlot(t_start, t_end, best.rate, best.desc, best.step, best.amt,
+                                     max_duration=best.max_duration, fare_code=best.fare_code))
+    return merged_slots
+
+
+class ScheduleMemo:
+    """
+    Weekrooster per (beheerder, regeling-IDs, tariefdatum). Veel gebieden hebben exact dezelfde
+    regelingen; die delen één berekening (slots verzamelen, dagexpansie, sweep, labels en vertaling).
+    De sleutel is de geordende tuple uit area_to_reg: het rooster hangt van die volgorde af (laatste
+    max. parkeerduur wint, bij gelijk tarief de eerste optie), dus dezelfde set in een andere volgorde
+    is een eigen entry.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(mgr_id, rids, lk):
+        return (mgr_id, tuple(rids), lk["tariff_date"])
+
+    def get(self, mgr_id, rids, lk):
+        key = self.key(mgr_id, rids, lk)
+        schedule = self.entries.get(key)
+        if schedule is None:
+            self.misses += 1
+            schedule = self.entries[key] = build_schedule(mgr_id, rids, lk)
+        else:
+            self.hits += 1
+        return schedule
+
+    def summary(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return f"Schedule memo: {self.hits} hits, {self.misses} misses ({ratio:.0%} hit ratio, {self.misses} schedules built)"
+
+
+def build_zone(mgr_id, zone_id, lk, memo=None):
+    """Eén zone-document (zonder updated_at) uit de koppeltabellen; met memo wordt het rooster gedeeld."""
+    area_specs, area_to_reg = lk["area_specs"], lk["area_to_reg"]
+
+    item = area_specs.get((mgr_id, zone_id))
+    city = TARGET_CITIES.get(mgr_id, "Unknown")
+    name = item.desc or f"{city} Zone {zone_id}"
+
+    # Geolocation logic
+    city_centers = {"363": (52.3676, 4.9041), "599": (51.9225, 4.47917), "518": (52.0705, 4.3007), "344": (52.0907, 5.1214)}
+    lat, lon = city_centers.get(mgr_id, (52.0907, 5.1214))
+    geo = item.geometry
+    if geo and 'coordinates' in geo:
+        try:
+            c = geo['coordinates']
+            while isinstance(c[0], list): c = c[0]
+            lon, lat = c[0], c[1]
+        except: pass
+    if abs(lat - city_centers.get(mgr_id, (0,0))[0]) < 0.1:
+        h = sum(ord(c) for c in zone_id); lat += ((h%100)-50)*0.0004; lon += (((h*13)%100)-50)*0.0006
+
+    display_id = ALIASES.get(f"{mgr_id}_{zone_id}", zone_id)
+
+    if zone_id == "T12B" or zone_id == "T12B_U11":
+         print(f"Processing {zone_id} -> Display: {display_id}")
+
+    rids = area_to_reg.get(zone_id, [zone_id])
+    schedule = memo.get(mgr_id, rids, lk) if memo is not None else build_schedule(mgr_id, rids, lk)
+
+    return {
+        "id": display_id, "name": name, "city": city, "mgr_id": mgr_id,
+        "lat": lat, "lng": lon, "price": schedule["price"],
+        "rates": [dict(r) for r in schedule["rates"]],
+        "max_duration_mins": schedule["max_duration_mins"],
+        "has_special_rules": schedule["has_special_rules"],
+        "price_grid": schedule["price_grid"]
+    }
+
+
+def build_schedule(mgr_id, rids, lk):
+    """
+    Weekrooster (rates, pin-prijs, max. parkeerduur, bijzondere dagen) voor de regelingen van één
+    beheerder, in de volgorde van area_to_reg (nieuwste mapping eerst); de uitkomst hangt van die volgorde af.
+    """
+    tijdvak_map, reg_map = lk["tijdvak_map"], lk["reg_map"]
+    calc_map, tariff_parts_map = lk["calc_map"], lk["tariff_parts_map"]
+
+    # Rates
+    all_opts = []
+
+    # Max Duration & Holidays Init
+    max_dur_mins = 24 * 60
+    special_rules = False
+
+    for rid in rids:
+        r_desc, rtype = reg_map.get((mgr_id, rid), (None, 'B'))
+
+        # Use all slots for metadata scan
+        # But filter for valid rate slots
+        valid_slots = []
+
+        # Helper to dedupe slots processed
+        seen_slots = set()
+
+        raw_slots = tijdvak_map.get(rid, [])
+        for s in raw_slots:
+            # Metadata Check
+            if s.max_duration > 0: max_dur_mins = s.max_duration
+
+            if s.day is Day.SPECIAL:
+                special_rules = True
+
+            # Rate Processing Logic
+            sig = (s.day_name, s.start)
+            if sig in seen_slots: continue
+            seen_slots.add(sig)
+
+            cc = s.fare_code
+            t_info = tariff_parts_map.get((mgr_id, cc))
+            if t_info:
+                desc_text = calc_map.get((mgr_id, cc), cc) or ""
+
+                if 'kaart' in desc_text.lower(): continue
+                # D3: step > 60 (e.g. dagkaarten) now included; display handled below (e.g. step >= 480 -> "€ X / dag")
+
+                # start/end in minuten sinds middernacht
+                all_opts.append(RateOption(s.day, s.day_name, s.start, s.end,
+                                           t_info[0], t_info[1], t_info[2], desc_text, rtype, s.max_duration, cc))
+
+    # Process per day
+    final_rates = []
+
+    # Expand 'Daily'; sleutel (Day, naam) zodat afwijkende dagen (Day.SPECIAL) per naam apart blijven.
+    # De dagen verwijzen naar dezelfde RateOption; de dag zelf staat in de sleutel.
+    by_day = {}
+    for o in all_opts:
+        days_to_apply = WEEKDAY_KEYS if o.day is Day.DAGELIJKS else [(o.day, o.day_name)]
+        for d in days_to_apply:
+            if d not in by_day: by_day[d] = []
+            by_day[d].append(o)
+
+    sorted_days = sorted(by_day.keys(), key=lambda d: d[0])
+
+    # Prijs per minuut van de week (zie rdw_pricing.py): ongemergde sweep per weekdag, dagen zonder
+    # opties zijn vrij; bijzondere dagen vallen buiten de grid.
+    segments = []
+    for key in WEEKDAY_KEYS:
+        base = key[0] * MINUTES_PER_DAY
+        if key not in by_day:
+            segments.append((base, 0, 0, ""))
+            continue
+        for sl in merge_day_rates(by_day[key], merge=False):
+            segments.append((base + sl.start, round(sl.rate * 100), sl.max_duration, sl.fare_code))
+    price_grid = encode_grid(segments)
+
+    for day in sorted_days:
+        opts = by_day[day]
+        if not opts: continue
+
+        merged_slots = merge_day_rates(opts)
+
+        # Post-Process: Merge adjacent PAID slots into blocks (source_slots verwijzen naar de slots)
+        final_merged = []
+        for slot in merged_slots:
+            if final_merged and final_merged[-1].rate > 0 and slot.rate > 0:
+                curr = final_merged[-1]
+                curr.end = slot.end
+                curr.rate = max(curr.rate, slot.rate)
+                curr.source_slots.append(slot)
+            else:
+                final_merged.append(RateSlot(slot.start, slot.end, slot.rate, slot.desc, slot.step, slot.amt, [slot]))
+
+        # Generate Text & Labels (LLM Translation) + Format Output
+        for m in final_merged:
+            t_str = f"{day[1].capitalize()} {format_hhmm(m.start)} - {format_hhmm(m.end)}"
+            if m.rate == 0:
+                final_rates.append({"time": t_str, "price": "Free parking", "detail": "Vrij parkeren",
+                                    "rate_numeric": round(m.rate, 2)})
+                continue
+
+            # Calculate Display Price (e.g. per 15 min)
+            label = f"\u20ac {m.rate:.2f} / u" # Default
+
+            steps = [s.step for s in m.source_slots if s.rate > 0]
+            if steps:
+                avg_step = max(set(steps), key=steps.count)
+                if avg_step >= 480:
+                    day_amt = next((s.amt for s in m.source_slots if s.step >= 480 and s.rate > 0), m.amt)
+                    label = f"\u20ac {day_amt:.2f} / dag"
+                elif avg_step >= 10:
+                    step_price = (m.rate / 60) * avg_step
+                    label = f"\u20ac {step_price:.2f} / {int(avg_step)} min"
+
+            formatted_lines = []
+            seen_texts = set()
+            for s in m.source_slots:
+                 # CALL LLM HERE
+                 if s.desc and ("stappen" in s.desc or "Stop" in s.desc or len(s.desc) > 15):
+                     txt = translate_desc_llm(s.desc, m.rate)
+                 else:
+                     txt = None
+
+                 if not txt:
+                     if s.rate > 0:
+                         if s.step >= 480:
+                             txt = f"\u20ac {s.amt:.2f} / dag"
+                         else:
+                             txt = f"\u20ac {s.rate:.2f} per uur"
+                             if s.step > 0 and s.step != 60:
+                                 txt += f" (stappen van {int(s.step)} min)"
+
+                 if txt and txt not in seen_texts:
+                     formatted_lines.append(txt)
+                     seen_texts.add(txt)
+
+            final_rates.append({
+                "time": t_str,
+                "price": label.replace('.', ','),
+                "detail": "|".join(formatted_lines),
+                "rate_numeric": round(m.rate, 2)
+            })
+
+    best_price = 0.0
+    for m in final_rates:
+        # Simple heuristic for map pin price
+         pass
+
+    if final_rates:
+         # Find max price for pin
+         # Since 'price' is a string now, we need to rely on what we calculated earlier.
+         # Actually, let's just re-iterate opts for max rate
+         max_r = 0
+         for o in all_opts:
+             if o.rate > max_r: max_r = o.rate
+         best_price = max_r
+
+    return {
+        "price": best_price,
+        "rates": final_rates,
+        "max_duration_mins": max_dur_mins,
+        "has_special_rules": special_rules,
+        "price_grid": price_grid
+    }
+
+
+# --- Parallelle transform (process pool, shards per beheerder) ---
+
+_WORKER = {}  # per worker-proces: koppeltabellen + ScheduleMemo (zie _init_transform_worker)
+
+
+def _init_transform_worker(lk, target_cities, translation_cache, llm_enabled):
+    """
+    Initializer: koppeltabellen één keer per worker (bij fork gedeeld geheugen, niet per taak gepickled).
+    Een TranslationStore opent in de worker zijn eigen SQLite-verbinding. De worker roept het model nooit
+    aan (misses worden verzameld, de vertaalstap draait in het hoofdproces); alleen "LLM aan" telt. Bij
+    spawn/forkserver importeert de worker de module opnieuw en is een --llm-stub-model weg (zonder key
+    None): dan komt er een StubModel voor in de plaats, anders zou een miss de brontekst houden.
+    """
+    global TARGET_CITIES, TRANSLATION_CACHE, model
+    TARGET_CITIES = target_cities
+    TRANSLATION_CACHE = translation_cache
+    if not llm_enabled:
+        model = None
+    elif model is None:
+        model = StubModel()
+    _WORKER["lk"] = lk
+    _WORKER["memo"] = ScheduleMemo()
+
+
+def build_collect(keys, lk, memo):
+    """
+    Zones voor een lijst (mgr, areaid) in verzamelmodus: zones met een ontbrekende vertaling worden niet
+    geretourneerd maar als retry gemeld (hun rooster wordt ook niet gememoized); de vertaalstap vult
+    daarna de cache en de retry-zones worden opnieuw gebouwd.
+    Retourneert (zones, retry, misses, tellers) met tellers = Counter van lookups/rules/hits.
+    """
+    global PENDING_TRANSLATIONS
+    PENDING_TRANSLATIONS = []
+    counts_before = Counter(TRANSLATION_LOOKUPS)
+    zones, retry = [], []
+    try:
+        for mgr_id, zone_id in keys:
+            before = len(PENDING_TRANSLATIONS)
+            z = build_zone(mgr_id, zone_id, lk, memo)
+            if len(PENDING_TRANSLATIONS) > before:
+                memo.entries.pop(memo.key(mgr_id, lk["area_to_reg"].get(zone_id, [zone_id]), lk), None)
+                retry.append((mgr_id, zone_id))
+            else:
+                zones.append(((mgr_id, zone_id), z))
+        return zones, retry, PENDING_TRANSLATIONS, TRANSLATION_LOOKUPS - counts_before
+    finally:
+        PENDING_TRANSLATIONS = None
+
+
+def _build_shard(keys):
+    """Worker-taak: build_collect op één shard, plus de memo-tellers van deze shard."""
+    lk, memo = _WORKER["lk"], _WORKER["memo"]
+    hits, misses = memo.hits, memo.misses
+    result = build_collect(keys, lk, memo)
+    return result + (memo.hits - hits, memo.misses - misses)
+
+
+def shard_zone_keys(zone_keys, shard_size=TRANSFORM_SHARD_SIZE):
+    """Shards per beheerder (grote beheerders in stukken van shard_size), in vaste volgorde."""
+    by_mgr = {}
+    for key in zone_keys:
+        by_mgr.setdefault(key[0], []).append(key)
+    shards = []
+    for mgr_id in sorted(by_mgr, key=lambda m: m or ""):
+        keys = by_mgr[mgr_id]
+        shards.extend(keys[i:i + shard_size] for i in range(0, len(keys), shard_size))
+    return shards
+
+
+def build_zones(zone_keys, lk, memo, workers=TRANSFORM_WORKERS):
+    """
+    Alle zones bouwen in drie stappen: verzamelen (met workers > 1 in een process pool, shards per
+    beheerder), vertalen (alle cache-misses in één TranslationStage-run) en de zones met een ontbrekende
+    vertaling opnieuw bouwen. De uitvoer staat altijd in de volgorde van zone_keys.
+    """
+    zone_keys = list(zone_keys)
+    shards = shard_zone_keys(zone_keys)
+    if workers <= 1 or len(shards) <= 1:
+        zones, retry, pending, counts = build_collect(zone_keys, lk, memo)
+        built = dict(zones)
+    else:
+        built, retry, pending, counts = {}, [], [], Counter()
+        initargs = (lk, TARGET_CITIES, TRANSLATION_CACHE, model is not None)
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_transform_worker,
+                                 initargs=initargs) as pool:
+            for zones, shard_retry, shard_pending, shard_counts, m_hits, m_misses in pool.map(_build_shard, shards):
+                built.update(zones)
+                retry.extend(shard_retry)
+                pending.extend(shard_pending)
+                counts += shard_counts
+                memo.hits += m_hits
+                memo.misses += m_misses
+        print(f"Transform: {len(shards)} shards on {min(workers, len(shards))} workers.")
+
+    if model is not None and counts["lookups"]:
+        if pending:
+            print(f"Translation: {len(retry)} zones wait for {len(set(pending))} new translations.")
+        TranslationStage(model, TRANSLATION_CACHE).run(pending, lookups=counts["lookups"], hits=counts["hits"],
+                                                       rules=counts["rules"])
+    elif counts["lookups"]:
+        print(f"Translation: {counts['lookups']} lookups, {counts['rules']} by rules, {counts['hits']} cache hits "
+              f"(no LLM; the rest keeps the source text).")
+    for mgr_id, zone_id in retry:
+        built[(mgr_id, zone_id)] = build_zone(mgr_id, zone_id, lk, memo)
+    return [built[key] for key in zone_keys]
+
+
+# Types to explicitly exclude
+EXCLUDED_TYPES = [
+    'VERGUNP', 'BEWONERP', 'DEELAUTOP', 'VERGUNZ', 'GPK', 'BEDRIJFP',
+    'BEZOEKBDP', 'ONTHEFFING', 'GARAGEP', 'CARPOOL', 'GEBIEDVRIJ',
+    'MILIEUZONE', 'ZE_ONTHEF', 'GSL_ONTHEF', 'GPKB', 'TERREINP'
+]
+
+
+def pushdown_zones(zone_keys, lk):
+    """
+    Predicate pushdown vóór het bouwen: zones met een uitgesloten gebruikstype (EXCLUDED_TYPES, per
+    mapping) en zones waarvan geen enkel tijdvak een betaald, niet-kaart tarief heeft (bovengrens
+    pin-prijs = 0) vallen al af vóór rooster, labels en vertaling. filter_zones blijft het vangnet.
+    Retourneert (zone_keys in oorspronkelijke volgorde, Counter met vermeden werk).
+    """
+    usage_map, area_to_reg, tijdvak_map = lk["usage_map"], lk["area_to_reg"], lk["tijdvak_map"]
+    tariff_parts_map, calc_map = lk["tariff_parts_map"], lk["calc_map"]
+    per_rid = {}  # (mgr, rid) -> (hoogste tarief, vertaalbare (omschrijving, tarief)-paren)
+
+    def rid_summary(mgr_id, rid):
+        key = (mgr_id, rid)
+        if key not in per_rid:
+            max_rate, texts = 0, set()
+            for s in tijdvak_map.get(rid, ()):
+                t_info = tariff_parts_map.get((mgr_id, s.fare_code))
+                if not t_info:
+                    continue
+                desc_text = calc_map.get((mgr_id, s.fare_code), s.fare_code) or ""
+                if 'kaart' in desc_text.lower():
+                    continue
+                max_rate = max(max_rate, t_info[0])
+                if t_info[0] > 0 and ("stappen" in desc_text or "Stop" in desc_text or len(desc_text) > 15):
+                    texts.add((desc_text, t_info[0]))
+            per_rid[key] = (max_rate, texts)
+        return per_rid[key]
+
+    kept, stats = [], Counter()
+    for mgr_id, zone_id in zone_keys:
+        # Zelfde sleutel als filter_zones: het gebruikstype wordt opgezocht op de weergave-ID.
+        uid = usage_map.get((mgr_id, ALIASES.get(f"{mgr_id}_{zone_id}", zone_id)), "UNKNOWN")
+        rids = area_to_reg.get(zone_id, [zone_id])
+        if uid in EXCLUDED_TYPES:
+            stats["usage_zones"] += 1
+        elif max(rid_summary(mgr_id, rid)[0] for rid in rids) == 0:
+            stats["zero_price_zones"] += 1
+        else:
+            kept.append((mgr_id, zone_id))
+            continue
+        stats["slots"] += sum(len(tijdvak_map.get(rid, ())) for rid in rids)
+        stats["translations"] += len(set().union(*(rid_summary(mgr_id, rid)[1] for rid in rids)))
+    return kept, stats
+
+
+def filter_zones(processed_zones, usage_map):
+    """Verwijder zones met een uitgesloten gebruikstype of prijs 0."""
     filtered_zones = []
     skipped_count = 0
 
-    # Types to explicitly exclude
-    EXCLUDED_TYPES = [
-        'VERGUNP', 'BEWONERP', 'DEELAUTOP', 'VERGUNZ', 'GPK', 'BEDRIJFP',
-        'BEZOEKBDP', 'ONTHEFFING', 'GARAGEP', 'CARPOOL', 'GEBIEDVRIJ',
-        'MILIEUZONE', 'ZE_ONTHEF', 'GSL_ONTHEF', 'GPKB', 'TERREINP'
-    ]
-
     for z in processed_zones:
         uid = usage_map.get((z['mgr_id'], z['id']), "UNKNOWN")
 
@@ -493,12 +887,19 @@ def run_update():
         filtered_zones.append(z)
 
     print(f"Filtered out {skipped_count} zones. Uploading {len(filtered_zones)} valid zones...")
+    return filtered_zones
+
+
+def zone_doc_id(z):
+    return f"{z['mgr_id']}_{z['id']}" if z['id'] != z['name'] else z['id']
 
-    # D1: tariefintegriteit – check vóór upload (geen lege rates bij price > 0; price vs max(rate_numeric))
+
+def check_integrity(filtered_zones):
+    """D1: tariefintegriteit – check vóór upload (geen lege rates bij price > 0; price vs max(rate_numeric))."""
     _tol = 0.02
     integrity_violations = []
     for z in filtered_zones:
-        doc_id = f"{z['mgr_id']}_{z['id']}" if z['id'] != z['name'] else z['id']
+        doc_id = zone_doc_id(z)
         p = float(z.get("price") or 0)
         rates = z.get("rates") or []
         if p > 0 and (not isinstance(rates, list) or len(rates) == 0):
@@ -519,14 +920,297 @@ def run_update():
             print(f"  [{zid}] {code}: {msg}")
         sys.exit(1)
 
-    # D2: timestamp per run for debugging / datum- en versiecontrole
+
+def zone_documents(zones, run_updated_at):
+    """[(doc_id, document)] met content_hash (rdw_manifest.py) en de updated_at van deze run."""
+    return [(zone_doc_id(z), {**z, HASH_FIELD: content_hash(z), "updated_at": run_updated_at}) for z in zones]
+
+
+def reconcile_summary(added, changed, unchanged, removed, dry_run=False):
+    """Eén regel met het verschil tussen de nieuwe zones en de bestaande documenten."""
+    prefix = "Dry run (nothing written): " if dry_run else "Reconcile: "
+    return f"{prefix}{added} added, {changed} changed, {unchanged} unchanged, {removed} removed"
+
+
+def upload_zones(sink, zones, collection="zones", refresh_hashes=False, reconcile=True, dry_run=False,
+                 allow_mass_delete=False, managers=None):
+    """
+    Alleen gewijzigde en nieuwe zones naar de sink (rdw_sink.py; Firestore in batches via rdw_upload.py).
+    De gepubliceerde hashes komen bij Firestore uit het lokale manifest, of (eerste run / refresh_hashes)
+    uit Firestore via een projectie; een lokale sink (SQLite/JSONL) leest ze altijd zelf.
+
+    reconcile: de bestaande document-ID's ophalen (lege projectie) en documenten zonder zone in deze run
+    (verouderd, oude ID-formaten, inmiddels gefilterd) in batches verwijderen, na de upload. Niet bij een
+    incrementele run: die bouwt alleen de geraakte zones. Meer dan MAX_DELETE_FRACTION van de bestaande
+    documenten verwijderen gebeurt alleen met allow_mass_delete. dry_run print alleen het verschil.
+    managers: run voor een deel van de beheerders (--managers); alleen documenten met een mgr_id uit deze
+    set kunnen dan verwijderd worden (ID's plus mgr_id via een field mask). None = de hele collectie.
+    """
+    # D2: timestamp per run for debugging / datum- en versiecontrole (alleen op gewijzigde documenten)
     run_updated_at = datetime.now(timezone.utc).isoformat()
+    docs = zone_documents(zones, run_updated_at)
+    manifest = None if sink.local else Manifest.for_target(sink.target, collection)
+    existing = None
+    if manifest is None or refresh_hashes or not manifest.loaded:
+        published = remote_hashes(sink, collection)
+        existing = set(published)
+        print(f"Change detection: read {len(published)} published hashes from '{collection}' ({sink}, field mask).")
+    else:
+        published = manifest.hashes
+    removable = None  # None = alle bestaande documenten
+    if reconcile and managers is not None:
+        owners = {doc_id: data.get("mgr_id") for doc_id, data in sink.stream(collection, ["mgr_id"])}
+        existing = set(owners)
+        removable = {doc_id for doc_id, mgr_id in owners.items() if str(mgr_id) in managers}
+        print(f"Reconcile: {len(existing)} existing documents in '{collection}', {len(removable)} of the "
+              f"{len(managers)} managers in this run (only these can be removed).")
+    elif reconcile and existing is None:
+        existing = sink.list_ids(collection)
+        print(f"Reconcile: {len(existing)} existing documents in '{collection}' (document IDs only).")
+    if existing is not None:
+        # Wat niet (meer) in de collectie staat is niet gepubliceerd, wat het manifest ook zegt.
+        published = {doc_id: h for doc_id, h in published.items() if doc_id in existing}
+    changed, unchanged = split_changed(docs, published)
+    removed = []
+    if existing is not None and reconcile:
+        new_ids = {doc_id for doc_id, _ in docs}
+        removed = sorted((existing if removable is None else removable) - new_ids)
+        added = sum(1 for doc_id, _ in changed if doc_id not in existing)
+        print(reconcile_summary(added, len(changed) - added, unchanged, len(removed), dry_run))
+    else:
+        print(f"Change detection: {len(changed)} of {len(docs)} zones new or changed, {unchanged} unchanged (not written).")
+    if dry_run:
+        for doc_id in removed[:20]:
+            print(f"  would remove {doc_id}")
+        if len(removed) > 20:
+            print(f"  ... and {len(removed) - 20} more")
+        return None
+
+    stats = sink.upsert_many(collection, changed)
+    published.update((doc_id, doc[HASH_FIELD]) for doc_id, doc in changed)
+    if removed:
+        scope = len(existing if removable is None else removable)
+        if len(removed) > MAX_DELETE_FRACTION * scope and not allow_mass_delete:
+            print(f"WARNING: refusing to delete {len(removed)} of {scope} documents in '{collection}' "
+                  f"(more than {MAX_DELETE_FRACTION:.0%}); check the run or pass --allow-mass-delete.")
+        else:
+            sink.delete_many(collection, removed)
+            for doc_id in removed:
+                published.pop(doc_id, None)
+    if manifest is not None:
+        manifest.hashes = published
+        manifest.save()
+    return stats
+
+
+def record_peak(peaks, stage):
+    """--trace-memory: piekgeheugen (tracemalloc) van de zojuist afgeronde stage vastleggen en resetten."""
+    if tracemalloc.is_tracing():
+        peaks[stage] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+
+def transform_zones(lk, changed, full_resync, memo, workers, timings, peaks):
+    """Zones bouwen, filteren en controleren voor één set koppeltabellen; tijden tellen op in timings."""
+    print(f"Total unique zones found: {len(lk['all_area_ids'])}")
+
+    zone_keys = lk["all_area_ids"]
+    if changed is not None and not full_resync:
+        zone_keys = affected_zones(changed, lk)
+        print(f"Incremental: {len(zone_keys)} of {len(lk['all_area_ids'])} zones affected by changed rows.")
+    # Vaste volgorde (sets itereren per proces anders door hash-randomisatie): stabiele uitvoer en hashes.
+    zone_keys = sorted(zone_keys, key=lambda k: (k[0] or "", k[1] or ""))
+
+    t0 = time.perf_counter()
+    zone_keys, avoided = pushdown_zones(zone_keys, lk)
+    print(f"Pushdown: skipped {avoided['usage_zones']} zones with an excluded usage type and "
+          f"{avoided['zero_price_zones']} zones without a paid rate before building; avoided "
+          f"{avoided['slots']} timeframe slots and {avoided['translations']} translation lookups (cache/LLM).")
+    processed_zones = build_zones(zone_keys, lk, memo, workers=workers)
+    add_timing(timings, peaks, "build", t0)
 
-    for z in filtered_zones:
-        doc_id = f"{z['mgr_id']}_{z['id']}" if z['id'] != z['name'] else z['id']
-        doc_data = {**z, "updated_at": run_updated_at}
-        db.collection('zones').document(doc_id).set(doc_data)
+    print(f"Uploading {len(processed_zones)} zones...")
+    t0 = time.perf_counter()
+    filtered_zones = filter_zones(processed_zones, lk["usage_map"])
+    if changed is not None and not full_resync:
+        dropped = len(processed_zones) - len(filtered_zones)
+        if dropped:
+            print(f"Incremental: {dropped} recomputed zones no longer pass the filter; "
+                  f"their existing documents are left as-is (run a full update to clean up).")
+    check_integrity(filtered_zones)
+    add_timing(timings, peaks, "filter", t0)
+    return filtered_zones
+
+
+def add_timing(timings, peaks, stage, t0):
+    """Duur sinds t0 optellen bij stage (per datum bij --as-of) en het piekgeheugen vastleggen."""
+    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+    record_peak(peaks, stage)
+
+
+def as_of_target(date, out_path):
+    """--as-of: eigen uitvoer per datum (lokaal <out>_<datum>.json, Firestore collectie zones_asof_<datum>)."""
+    stem, ext = os.path.splitext(out_path)
+    return f"{stem}_{date}{ext or '.json'}", f"zones_asof_{date}"
+
+
+def run_update(incremental=False, full_resync=False, snapshot_dir=None, sink="firestore", out_path=LOCAL_SINK_FILE,
+               workers=TRANSFORM_WORKERS, trace_memory=False, as_of_dates=None, upload_mode=UPLOAD_MODE,
+               refresh_hashes=False, dry_run=False, allow_mass_delete=False, managers=None):
+    """managers: set met beheerders als de run beperkt is (--managers); reconciliatie blijft daarbinnen."""
+    peaks = {}
+    if trace_memory:
+        tracemalloc.start()
+    load_cache() # Init cache
+
+    kind, _, sink_path = sink.partition(":")
+    store = None
+    if kind == "local":
+        out_path = sink_path or out_path  # local:BESTAND gaat voor --out; per datum een eigen bestand (--as-of)
+    else:
+        # firestore (FIRESTORE_EMULATOR_HOST gezet: emulator i.p.v. het echte project), sqlite[:pad] of jsonl[:map]
+        store = open_sink(sink, mode=upload_mode)
+
+    timings = {}
+    t0 = time.perf_counter()
+    reference_date = datetime.now().strftime("%Y%m%d")  # geldigheidsfilter per dataset (D2)
+    # --as-of: één keer ophalen voor het hele venster, per datum oplossen via de tijdsindex.
+    dates = sorted(set(as_of_dates)) if as_of_dates else [reference_date]
+    window_start, window_end = dates[0], dates[-1]
+
+    changed, sync_state, raw = None, None, None
+    if snapshot_dir:
+        print(f"Loading RDW snapshot from {snapshot_dir}...")
+        typed = load_snapshot(snapshot_dir, window_start, window_end)  # al records, geen parse_datasets
+    elif incremental or full_resync:
+        print("Fetching RDW data...")
+        raw, changed, sync_state = fetch_datasets_incremental(reference_date, full_resync=full_resync)
+        if USE_DATE_FILTER:
+            raw = filter_valid(raw, reference_date)
+    else:
+        print("Fetching RDW data...")
+        raw = fetch_datasets(window_start, window_end)
+    add_timing(timings, peaks, "load", t0)
+
+    t0 = time.perf_counter()
+    if raw is not None:
+        typed = parse_datasets(raw)  # één keer parsen naar records (rdw_schema.py)
+    temporal = TemporalDatasets(typed, VALIDITY_KINDS) if as_of_dates else None
+    add_timing(timings, peaks, "lookups", t0)
+
+    memo = ScheduleMemo()
+    by_epoch = {}  # epoch -> gefilterde zones; datums zonder tussenliggende wijziging delen de uitkomst
+    for date in dates:
+        if temporal is not None:
+            local_path, collection = as_of_target(date, out_path)
+            epoch = temporal.epoch(date)
+            if epoch in by_epoch:
+                print(f"As of {date}: no validity changes since an earlier date, reusing its zones.")
+            else:
+                print(f"As of {date}:")
+                t0 = time.perf_counter()
+                lk = build_lookups_typed(temporal.as_of(date), date)
+                add_timing(timings, peaks, "lookups", t0)
+                by_epoch[epoch] = transform_zones(lk, None, False, memo, workers, timings, peaks)
+            filtered_zones = by_epoch[epoch]
+        else:
+            local_path, collection = out_path, "zones"
+            t0 = time.perf_counter()
+            lk = build_lookups_typed(typed, date)
+            add_timing(timings, peaks, "lookups", t0)
+            filtered_zones = transform_zones(lk, changed, full_resync, memo, workers, timings, peaks)
+
+        t0 = time.perf_counter()
+        # Incrementeel zonder --full-resync zijn alleen de geraakte zones gebouwd: niets te reconciliëren.
+        reconcile = changed is None or full_resync
+        target = open_sink(f"local:{local_path}") if kind == "local" else store
+        upload_zones(target, filtered_zones, collection, refresh_hashes, reconcile, dry_run, allow_mass_delete,
+                     managers)
+        add_timing(timings, peaks, "write", t0)
+
+    if sync_state is not None:
+        # Pas nu de lokale kopie en high-water marks vastleggen: een dry run of een afgebroken run
+        # (integriteitscheck, uploadfout) haalt dezelfde delta de volgende keer opnieuw op.
+        if dry_run:
+            print("Incremental: dry run, sync state not saved (the next run fetches the same changes).")
+        else:
+            sync_state.commit()
+
+    print("Timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    print(memo.summary())
+    if peaks:
+        print("Memory peak (tracemalloc, main process): "
+              + ", ".join(f"{k} {v / 2**20:.1f} MB" for k, v in peaks.items())
+              + f"; run {max(peaks.values()) / 2**20:.1f} MB")
+        tracemalloc.stop()
+    if store is not None:
+        store.close()
+    TRANSLATION_CACHE.close()  # met periodieke compactie (COMPACT_INTERVAL_DAYS)
     print("Done.")
 
+
+def main():
+    global TARGET_CITIES, model
+    parser = argparse.ArgumentParser(description="Fetch RDW parking zones, build rates and upload to Firestore")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch only rows changed since the last run (SODA :updated_at) and recompute affected zones")
+    parser.add_argument("--full-resync", action="store_true",
+                        help="Rebuild the local incremental copy from scratch (picks up deleted rows) and recompute all zones")
+    parser.add_argument("--from-snapshot", metavar="DIR",
+                        help="Run the transform on local SODA JSON files (e.g. data/raw) instead of the live API")
+    parser.add_argument("--sink", type=parse_sink, default=DEFAULT_SINK,
+                        help="Write zones to Firestore (default) or to a local document store with the same "
+                             "interface (rdw_sink.py): local[:FILE] (one JSON file, default --out), sqlite[:PATH] "
+                             "or jsonl[:DIR]")
+    parser.add_argument("--upload-mode", choices=UPLOAD_MODES, default=UPLOAD_MODE,
+                        help=f"Firestore write strategy: batched commits in parallel, the SDK BulkWriter, or one "
+                             f"set() per document (default {UPLOAD_MODE}; emulator: set FIRESTORE_EMULATOR_HOST)")
+    parser.add_argument("--refresh-hashes", action="store_true",
+                        help="Read the published content hashes from Firestore (field-mask projection) instead of "
+                             "the local manifest before deciding which zones to write")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Build the zones and print the added/changed/unchanged/removed diff against the sink "
+                             "without writing or deleting anything")
+    parser.add_argument("--allow-mass-delete", action="store_true",
+                        help=f"Allow the reconcile step to delete more than {MAX_DELETE_FRACTION * 100:.0f}%% of the existing "
+                             f"zone documents (RDW_MAX_DELETE_FRACTION)")
+    parser.add_argument("--out", default=LOCAL_SINK_FILE, help=f"Output file for --sink local (default {LOCAL_SINK_FILE})")
+    parser.add_argument("--managers", help="Comma-separated areamanagerids overriding TARGET_CITIES (e.g. 3,14)")
+    parser.add_argument("--no-llm", action="store_true", help="Skip Gemini translation (fully offline run)")
+    parser.add_argument("--llm-stub", type=float, metavar="LATENCY",
+                        help="Translate with an offline stub model (rdw_translate.StubModel) with this latency in seconds")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report tracemalloc peak memory per stage (main process only; combine with --workers 1)")
+    parser.add_argument("--workers", type=int, default=TRANSFORM_WORKERS,
+                        help=f"Processes for the zone transform, sharded per area manager (default {TRANSFORM_WORKERS}; 1 = serial)")
+    parser.add_argument("--as-of", metavar="YYYYMMDD[,YYYYMMDD...]",
+                        help="Compute zones as valid on these dates (one fetch, one output per date: "
+                             "<out>_<date>.json or Firestore collection zones_asof_<date>)")
+    args = parser.parse_args()
+    if args.from_snapshot and (args.incremental or args.full_resync):
+        parser.error("--from-snapshot cannot be combined with --incremental/--full-resync")
+    as_of_dates = None
+    if args.as_of:
+        if args.incremental or args.full_resync:
+            parser.error("--as-of cannot be combined with --incremental/--full-resync")
+        as_of_dates = [d.strip() for d in args.as_of.split(",") if d.strip()]
+        for d in as_of_dates:
+            try:
+                datetime.strptime(d, "%Y%m%d")
+            except ValueError:
+                parser.error(f"--as-of: invalid date {d!r} (expected YYYYMMDD)")
+    if args.managers:
+        TARGET_CITIES = {m.strip(): TARGET_CITIES.get(m.strip(), "Unknown") for m in args.managers.split(",") if m.strip()}
+    if args.no_llm:
+        model = None
+    elif args.llm_stub is not None:
+        model = StubModel(latency=args.llm_stub)
+    run_update(incremental=args.incremental, full_resync=args.full_resync, snapshot_dir=args.from_snapshot,
+               sink=args.sink, out_path=args.out, workers=args.workers,
+               trace_memory=args.trace_memory, as_of_dates=as_of_dates, upload_mode=args.upload_mode,
+               refresh_hashes=args.refresh_hashes, dry_run=args.dry_run,
+               allow_mass_delete=args.allow_mass_delete, managers=set(TARGET_CITIES) if args.managers else None)
+
+
 if __name__ == "__main__":
-    run_update()
+    main()
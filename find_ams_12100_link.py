@@ -1,4 +1,5 @@
-import urllib.request, json
+import json
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 # Search for '12100' in selling points and descriptions for Amsterdam (363)
 mgr = "363"
 urls = [
@@ -10,10 +11,9 @@ urls = [
 for url in urls:
     print(f"Checking {url}...")
     try:
-        with urllib.request.urlopen(url) as r:
-            data = json.loads(r.read().decode())
-            for d in data:
-                if '12100' in str(d):
-                    print(f"MATCH: {json.dumps(d)}")
+        data = fetch_json(url)
+        for d in data:
+            if '12100' in str(d):
+                print(f"MATCH: {json.dumps(d)}")
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,310 @@
+"""
+Kolomgeoriënteerde, memory-mappable snapshots van RDW-datasets.
+
+Een dataset wordt een map met per kolom één binair bestand plus meta.json:
+- int       : gehele getallen (tijden, stapgroottes, max. duur) als int64
+- date      : YYYYMMDD / YYYYMMDDhhmmss als int64 (sorteerbaar, exact terug te schrijven)
+- decimal   : vaste-komma int64 met `scale` decimalen (bedragen zoals "0.40000000")
+- category  : dictionary-encoded strings (vocab in meta.json, codes int32); ook voor geometrie (JSON-tekst)
+Ontbrekende waarden: INT_NULL resp. code -1. Een kolom krijgt alleen een getaltype als elke waarde
+exact terug te schrijven is naar de oorspronkelijke string; anders wordt het `category`.
+
+Laden is een mmap per kolom (memoryview.cast, geen parse). Per beheerder (`areamanagerid`) staat een
+index met rijnummers, zodat `records(..., managers=...)` alleen die rijen materialiseert. `records` bouwt
+de rdw_schema-records direct uit de getypeerde kolommen (ints, vaste-komma bedragen, categoriecodes),
+zonder omweg via SODA-strings; `rows` levert de oorspronkelijke dicts (alleen voor tools die die nodig hebben).
+
+Gebruik (vanuit projectroot):
+  python rdw_columnar.py data/raw data/columnar          # alle *.json in data/raw converteren
+  ds = ColumnarDataset("data/columnar/tijdvak")
+  for tf in ds.records("timeframes", managers={"363"}): tf.start, tf.day, ...
+"""
+import argparse
+import array
+import json
+import mmap
+import os
+import re
+import sys
+
+from rdw_schema import AMOUNT_SCALE, SCHEMAS, parse_amount, parse_hhmm, parse_rows
+
+INT_NULL = -(2 ** 63)
+MAX_SCALE = 8
+PARTITION_COLUMN = "areamanagerid"
+
+_INT_RE = re.compile(r"^-?\d+$")
+_DEC_RE = re.compile(r"^-?\d+\.(\d+)$")
+
+
+def _infer_type(values):
+    """Kolomtype + scale voor een lijst niet-lege waarden (zie module-docstring)."""
+    if not values or not all(isinstance(v, str) for v in values):
+        return "category", 0
+    if all(_INT_RE.match(v) and str(int(v)) == v for v in values):
+        lengths = {len(v) for v in values}
+        if lengths in ({8}, {14}):
+            return "date", 0
+        return "int", 0
+    scales = set()
+    for v in values:
+        m = _DEC_RE.match(v)
+        if not m:
+            return "category", 0
+        scales.add(len(m.group(1)))
+    if len(scales) == 1 and scales.pop() <= MAX_SCALE:
+        scale = len(_DEC_RE.match(values[0]).group(1))
+        if all(_format_decimal(_parse_decimal(v, scale), scale) == v for v in values):
+            return "decimal", scale
+    return "category", 0
+
+
+def _parse_decimal(v, scale):
+    neg = v.startswith("-")
+    whole, frac = v.lstrip("-").split(".")
+    n = int(whole) * 10 ** scale + int(frac.ljust(scale, "0")[:scale])
+    return -n if neg else n
+
+
+def _format_decimal(n, scale):
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    return f"{sign}{n // 10 ** scale}.{n % 10 ** scale:0{scale}d}"
+
+
+def convert_rows(rows, out_dir):
+    """Schrijf een lijst SODA-rijen (dicts) als kolomdataset naar out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    columns = []
+    for r in rows:
+        for k in r:
+            if k not in columns:
+                columns.append(k)
+    meta = {"rows": len(rows), "byteorder": sys.byteorder, "columns": {}, "partitions": {}}
+
+    for col in columns:
+        present = [r[col] for r in rows if r.get(col) is not None]
+        kind, scale = _infer_type(present)
+        info = {"type": kind}
+        if kind == "category":
+            vocab, codes_by_value = [], {}
+            codes = array.array("i")
+            for r in rows:
+                v = r.get(col)
+                if v is None:
+                    codes.append(-1)
+                    continue
+                key = v if isinstance(v, str) else json.dumps(v, sort_keys=True)
+                code = codes_by_value.get(key)
+                if code is None:
+                    code = codes_by_value[key] = len(vocab)
+                    vocab.append(key)
+                codes.append(code)
+            info["vocab"] = vocab
+            info["json"] = not all(isinstance(v, str) for v in present)
+            data = codes
+        else:
+            data = array.array("q")
+            for r in rows:
+                v = r.get(col)
+                if v is None:
+                    data.append(INT_NULL)
+                elif kind == "decimal":
+                    data.append(_parse_decimal(v, scale))
+                else:
+                    data.append(int(v))
+            if kind == "decimal":
+                info["scale"] = scale
+            elif kind == "date":
+                info["width"] = len(present[0])
+        info["typecode"] = data.typecode
+        with open(os.path.join(out_dir, f"{col}.bin"), "wb") as f:
+            f.write(data.tobytes())
+        meta["columns"][col] = info
+
+    # Per beheerder de rijnummers (oplopend, dus oorspronkelijke volgorde blijft behouden).
+    index = array.array("i")
+    by_mgr = {}
+    for i, r in enumerate(rows):
+        by_mgr.setdefault(r.get(PARTITION_COLUMN), []).append(i)
+    for mgr in sorted(by_mgr, key=lambda m: (m is None, m or "")):
+        start = len(index)
+        index.extend(by_mgr[mgr])
+        meta["partitions"][mgr if mgr is not None else ""] = [start, len(index)]
+    with open(os.path.join(out_dir, "_partition_index.bin"), "wb") as f:
+        f.write(index.tobytes())
+
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+def convert_json_file(json_path, out_dir):
+    with open(json_path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    return convert_rows(rows, out_dir)
+
+
+def _mmap_array(path, typecode):
+    """Read-only memoryview over een kolombestand (lege bestanden kunnen niet gemapt worden)."""
+    if os.path.getsize(path) == 0:
+        return memoryview(array.array(typecode))
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm).cast(typecode)
+
+
+class ColumnarDataset:
+    """Leest een met convert_rows geschreven map; kolommen worden pas bij gebruik gemapt."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("byteorder", sys.byteorder) != sys.byteorder:
+            raise ValueError(f"{directory}: written with {self.meta['byteorder']}-endian byte order")
+        self.columns = list(self.meta["columns"])
+        self._raw = {}
+        self._vocab = {}
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def raw_column(self, col):
+        """Gemapte int64/int32-waarden (category = codes) zonder decodering."""
+        if col not in self._raw:
+            info = self.meta["columns"][col]
+            self._raw[col] = _mmap_array(os.path.join(self.directory, f"{col}.bin"), info["typecode"])
+        return self._raw[col]
+
+    def _decoder(self, col):
+        info = self.meta["columns"][col]
+        kind = info["type"]
+        if kind == "category":
+            if col not in self._vocab:
+                vocab = [sys.intern(v) for v in info["vocab"]]
+                if info.get("json"):
+                    vocab = [json.loads(v) for v in vocab]
+                self._vocab[col] = vocab
+            vocab = self._vocab[col]
+            return lambda c: None if c < 0 else vocab[c]
+        if kind == "decimal":
+            scale = info["scale"]
+            return lambda v: None if v == INT_NULL else _format_decimal(v, scale)
+        if kind == "date":
+            width = info["width"]
+            return lambda v: None if v == INT_NULL else str(v).zfill(width)
+        return lambda v: None if v == INT_NULL else str(v)
+
+    def row_indices(self, managers=None):
+        """Rijnummers (oplopend) voor de gegeven beheerders; None = alle rijen."""
+        if managers is None:
+            return range(len(self))
+        index = _mmap_array(os.path.join(self.directory, "_partition_index.bin"), "i")
+        out = []
+        for mgr in managers:
+            lo, hi = self.meta["partitions"].get(mgr, (0, 0))
+            out.extend(index[lo:hi])
+        out.sort()
+        return out
+
+    def column(self, col, managers=None):
+        """Gedecodeerde waarden van één kolom (strings zoals in de SODA-JSON, None = ontbrekend)."""
+        raw, dec = self.raw_column(col), self._decoder(col)
+        return [dec(raw[i]) for i in self.row_indices(managers)]
+
+    def _field_values(self, col, default, parse, indices):
+        """
+        Waarden van één recordveld (SCHEMAS-veld col/default/parse) voor de rijen `indices`, gelijk aan
+        parse_rows: ints, tijden en bedragen rekenkundig uit de int64-kolom, overige waarden één keer
+        per verschillende code of waarde.
+        """
+        missing = parse(default) if parse and default is not None else default
+        info = self.meta["columns"].get(col)
+        if info is None:
+            return [missing] * len(indices)
+        raw = self.raw_column(col)
+        values = [raw[i] for i in indices]
+        kind = info["type"]
+        if kind in ("int", "decimal"):
+            scale = info.get("scale", 0)
+            if parse is int and kind == "int":
+                return [missing if v == INT_NULL else v for v in values]
+            if parse is parse_hhmm and kind == "int":
+                return [missing if v == INT_NULL else (v // 100) * 60 + v % 100 for v in values]
+            if parse is parse_amount:
+                factor = AMOUNT_SCALE // 10 ** scale
+                return [missing if v == INT_NULL else v * factor for v in values]
+        dec = self._decoder(col)
+        table = {}
+        for v in set(values):
+            s = dec(v)
+            table[v] = missing if s is None else parse(s) if parse else s
+        return list(map(table.__getitem__, values))
+
+    def records(self, name, managers=None):
+        """Records van dataset `name` (rdw_schema.SCHEMAS) voor de gegeven beheerders; None = alle rijen."""
+        record, fields = SCHEMAS[name]
+        indices = self.row_indices(managers)
+        columns = [self._field_values(col, default, parse, indices) for col, default, parse in fields]
+        return list(map(record._make, zip(*columns)))
+
+    def rows(self, managers=None, columns=None):
+        """Generator van SODA-achtige dicts; ontbrekende waarden worden weggelaten zoals in de API."""
+        cols = columns or self.columns
+        decoders = [(c, self.raw_column(c), self._decoder(c)) for c in cols]
+        for i in self.row_indices(managers):
+            row = {}
+            for c, raw, dec in decoders:
+                v = dec(raw[i])
+                if v is not None:
+                    row[c] = v
+            yield row
+
+
+def snapshot_rows(directory, stem, managers=None):
+    """
+    Rijen van dataset `stem` (bijv. "tijdvak") uit directory: kolomformaat (<stem>/meta.json) als dat
+    bestaat, anders <stem>.json. Met managers worden alleen die beheerders geladen. None = niet gevonden.
+    """
+    col_dir = os.path.join(directory, stem)
+    if os.path.exists(os.path.join(col_dir, "meta.json")):
+        return list(ColumnarDataset(col_dir).rows(managers))
+    path = os.path.join(directory, f"{stem}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    if managers is not None:
+        rows = [r for r in rows if r.get(PARTITION_COLUMN) in managers]
+    return rows
+
+
+def snapshot_records(directory, stem, name, managers=None):
+    """
+    Records (rdw_schema.SCHEMAS[name]) van dataset `stem` uit directory: uit het kolomformaat zonder
+    SODA-dicts, anders via parse_rows over <stem>.json. None = niet gevonden.
+    """
+    col_dir = os.path.join(directory, stem)
+    if os.path.exists(os.path.join(col_dir, "meta.json")):
+        return ColumnarDataset(col_dir).records(name, managers)
+    rows = snapshot_rows(directory, stem, managers)
+    return None if rows is None else parse_rows(name, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert SODA JSON snapshots to columnar, memory-mappable datasets")
+    parser.add_argument("src", help="Directory with <dataset>.json files (e.g. data/raw)")
+    parser.add_argument("dest", help="Output directory (one subdirectory per dataset)")
+    args = parser.parse_args()
+    for name in sorted(os.listdir(args.src)):
+        if not name.endswith(".json"):
+            continue
+        out_dir = os.path.join(args.dest, name[: -len(".json")])
+        meta = convert_json_file(os.path.join(args.src, name), out_dir)
+        types = ", ".join(f"{c}:{i['type']}" for c, i in meta["columns"].items())
+        print(f"[OK] {name}: {meta['rows']} rows -> {out_dir} ({types})")
+
+
+if __name__ == "__main__":
+    main()
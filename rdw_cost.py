@@ -0,0 +1,271 @@
+"""
+Parkeerkosten voor veel sessies tegelijk, op basis van de volledige tariefdelen-tabel.
+
+tariff_parts_map (fetch_rdw_data.py) houdt per tariefcode één (rate, step, amount) over voor weergave;
+deze module gebruikt alle tariefdelen van de geldende versie:
+- per (beheerder, tariefcode) de tariefdelen met de nieuwste startdatefarepart t/m de peildatum, gesorteerd
+  op startdurationfarepart (bij dubbele startduur telt de eerste, zoals bij tariff_parts_map)
+- deel i geldt voor parkeerduur [start_i, start_i+1); elke begonnen stap van stepsizefarepart minuten
+  kost amountfarepart (stap <= 0: eenmalig bedrag). "Eerste 30 min X, daarna Y" = twee delen.
+- welke tariefcode op een moment geldt komt uit price_grid.fare_code van het zone-document (zie
+  rdw_pricing.py). Een sessie wordt gesplitst op de breekpunten van die grid (ook over dag- en
+  weekgrenzen); elk aaneengesloten stuk met dezelfde tariefcode wordt apart afgerekend, met de duur
+  vanaf het begin van dat stuk. Vrije stukken kosten niets.
+
+Bedragen zijn vaste-komma ints (rdw_schema.AMOUNT_SCALE), dus exact; cost() geeft euro's als float.
+Met NumPy is elke stap (splitsen, tariefdeel zoeken, optellen) één gevectoriseerde pass over alle
+sessies; zonder NumPy rekent een pure-Python pad per sessie met dezelfde uitkomst.
+
+Gebruik:
+  engine = CostEngine.from_files("data/processed/zones.json", "data/raw")
+  engine.cost(["363_T12B"], [datetime(2026, 10, 19, 9, 0)], [datetime(2026, 10, 19, 11, 30)])
+  python rdw_cost.py data/processed/zones.json --snapshot data/raw --sessions sessies.csv
+"""
+import argparse
+import bisect
+import csv
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # optioneel: pure-Python fallback
+    np = None
+
+from rdw_columnar import snapshot_records
+from rdw_join import latest_per_key
+from rdw_pricing import MINUTES_PER_WEEK
+from rdw_schema import AMOUNT_SCALE
+
+EPOCH = datetime(2024, 1, 1)  # een maandag: sessieminuut % MINUTES_PER_WEEK = minuut van de week
+DURATION_SPAN = 10 ** 7      # sleutelruimte per tarieftabel (startduur in minuten)
+
+
+def session_minute(dt):
+    """datetime -> minuten sinds EPOCH (naïeve lokale tijd, zoals de tijdvakken)."""
+    return (dt - EPOCH) // timedelta(minutes=1)
+
+
+def fare_tables(fareparts, today):
+    """
+    {(mgr, code): [(start_duration, step, amount)]} voor de geldende versie t/m today (YYYYMMDD).
+    fareparts: FarePart-records (rdw_schema).
+    """
+    keys = [(p.manager, p.fare_code) if p.fare_code else None for p in fareparts]
+    dates = [p.start_date for p in fareparts]
+    version = {keys[i]: dates[i] for i in latest_per_key(keys, dates, max_date=today)}
+    tables = {}
+    for p, k, d in zip(fareparts, keys, dates):
+        if k is not None and version.get(k) == d:
+            tables.setdefault(k, {}).setdefault(p.start_duration, (p.start_duration, p.step, p.amount))
+    return {k: sorted(parts.values()) for k, parts in tables.items()}
+
+
+def table_cost(parts, duration):
+    """Kosten (vaste komma) van `duration` minuten volgens één tarieftabel."""
+    total = 0
+    for i, (start, step, amount) in enumerate(parts):
+        if duration <= start:
+            break
+        end = min(duration, parts[i + 1][0]) if i + 1 < len(parts) else duration
+        total += amount * (-(-(end - start) // step) if step > 0 else 1)
+    return total
+
+
+class CostEngine:
+    """
+    Tariefcode-grids van alle zones + platte tarieftabellen. Zones en tarieftabellen krijgen een index;
+    net als PriceGrid is een sleutel index * span + minuut/startduur, zodat opzoeken searchsorted is.
+    """
+
+    def __init__(self, zones, tables):
+        """zones: {zone_id: (mgr_id, price_grid)}; tables: uitvoer van fare_tables."""
+        self.zone_ids = list(zones)
+        self.index = {zid: i for i, zid in enumerate(self.zone_ids)}
+        table_index = {}
+        grid_keys, grid_table = [], []
+        for zi, zid in enumerate(self.zone_ids):
+            mgr_id, grid = zones[zid]
+            for minute, code in zip(grid["minutes"], grid["fare_code"]):
+                t = -1
+                if code and (mgr_id, code) in tables:
+                    t = table_index.setdefault((mgr_id, code), len(table_index))
+                grid_keys.append(zi * MINUTES_PER_WEEK + minute)
+                grid_table.append(t)
+
+        # Per tabel: startduur, stap, bedrag en de cumulatieve kosten tot aan het begin van elk deel.
+        part_keys, part_table, part_start, part_step, part_amount, part_base = [], [], [], [], [], []
+        for key, t in table_index.items():
+            parts = tables[key]
+            for i, (start, step, amount) in enumerate(parts):
+                part_keys.append(t * DURATION_SPAN + start)
+                part_table.append(t)
+                part_start.append(start)
+                part_step.append(step)
+                part_amount.append(amount)
+                part_base.append(table_cost(parts, start))
+        self.tables = list(table_index)
+        cols = {"grid_keys": grid_keys, "grid_table": grid_table, "part_keys": part_keys,
+                "part_table": part_table, "part_start": part_start, "part_step": part_step,
+                "part_amount": part_amount, "part_base": part_base}
+        for name, values in cols.items():
+            setattr(self, name, np.asarray(values, dtype=np.int64) if np is not None else values)
+
+    @classmethod
+    def from_files(cls, zones_path, snapshot_dir, today=None):
+        """Zone-documenten (--sink local uitvoer) + tariefdeel uit een snapshot (JSON of kolomformaat)."""
+        with open(zones_path, "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        zones = {doc_id: (d["mgr_id"], d["price_grid"]) for doc_id, d in docs.items()
+                 if d.get("price_grid") and "fare_code" in d["price_grid"]}
+        fareparts = snapshot_records(snapshot_dir, "tariefdeel", "fareparts") or []
+        return cls(zones, fare_tables(fareparts, today or time.strftime("%Y%m%d")))
+
+    # --- Splitsen op tariefcode ---
+
+    def _segments_numpy(self, zi, start, end):
+        """(sessie-index, tabel, duur) per aaneengesloten stuk met dezelfde tariefcode."""
+        n = len(zi)
+        zone_end = np.searchsorted(self.grid_keys, (zi + 1) * MINUTES_PER_WEEK, side="left")
+        sess = np.arange(n)
+        cur = start.copy()
+        run_table = np.full(n, -2, dtype=np.int64)
+        run_len = np.zeros(n, dtype=np.int64)
+        out_s, out_t, out_d = [], [], []
+        active = cur < end
+        while active.any():
+            s, c, z = sess[active], cur[active], zi[active]
+            week_start = c - c % MINUTES_PER_WEEK
+            pos = np.searchsorted(self.grid_keys, z * MINUTES_PER_WEEK + c % MINUTES_PER_WEEK, side="right") - 1
+            t = self.grid_table[pos]
+            nxt = np.where(pos + 1 < zone_end[s], self.grid_keys[np.minimum(pos + 1, len(self.grid_keys) - 1)]
+                           - z * MINUTES_PER_WEEK, MINUTES_PER_WEEK)
+            seg_end = np.minimum(end[s], week_start + nxt)
+            same = t == run_table[s]
+            close = s[~same & (run_len[s] > 0)]
+            out_s.append(close)
+            out_t.append(run_table[close])
+            out_d.append(run_len[close])
+            run_len[s] = np.where(same, run_len[s], 0) + (seg_end - c)
+            run_table[s] = t
+            cur[s] = seg_end
+            active = cur < end
+        done = sess[run_len > 0]
+        out_s.append(done)
+        out_t.append(run_table[done])
+        out_d.append(run_len[done])
+        return np.concatenate(out_s), np.concatenate(out_t), np.concatenate(out_d)
+
+    def _segments_python(self, zi, start, end):
+        keys, n_keys = self.grid_keys, len(self.grid_keys)
+        for si, (z, c, e) in enumerate(zip(zi, start, end)):
+            zone_end = bisect.bisect_left(keys, (z + 1) * MINUTES_PER_WEEK)
+            run_table, run_len = None, 0
+            while c < e:
+                pos = bisect.bisect_right(keys, z * MINUTES_PER_WEEK + c % MINUTES_PER_WEEK) - 1
+                nxt = keys[pos + 1] - z * MINUTES_PER_WEEK if pos + 1 < min(zone_end, n_keys) else MINUTES_PER_WEEK
+                seg_end = min(e, c - c % MINUTES_PER_WEEK + nxt)
+                t = self.grid_table[pos]
+                if t != run_table and run_len:
+                    yield si, run_table, run_len
+                    run_len = 0
+                run_table, run_len, c = t, run_len + seg_end - c, seg_end
+            if run_len:
+                yield si, run_table, run_len
+
+    # --- Afrekenen ---
+
+    def _table_costs_numpy(self, tables, durations):
+        """Kosten per (tabel, duur): cumulatief tot het laatste begonnen deel + begonnen stappen daarin."""
+        costs = np.zeros(len(tables), dtype=np.int64)
+        if not len(self.part_keys):
+            return costs
+        pos = np.searchsorted(self.part_keys, tables * DURATION_SPAN + durations - 1, side="right") - 1
+        pos_c = np.maximum(pos, 0)
+        ok = (tables >= 0) & (pos >= 0) & (self.part_table[pos_c] == tables)
+        step = self.part_step[pos_c]
+        steps = np.where(step > 0, -(-(durations - self.part_start[pos_c]) // np.maximum(step, 1)), 1)
+        costs[ok] = (self.part_base[pos_c] + self.part_amount[pos_c] * steps)[ok]
+        return costs
+
+    def _table_cost_python(self, t, duration):
+        pos = bisect.bisect_right(self.part_keys, t * DURATION_SPAN + duration - 1) - 1
+        if t < 0 or pos < 0 or self.part_table[pos] != t:
+            return 0
+        step = self.part_step[pos]
+        steps = -(-(duration - self.part_start[pos]) // step) if step > 0 else 1
+        return self.part_base[pos] + self.part_amount[pos] * steps
+
+    def cost_units(self, zone_ids, starts, ends):
+        """
+        Kosten in vaste komma (1/AMOUNT_SCALE euro) per sessie (zone_ids[i], starts[i], ends[i]);
+        starts/ends als datetime of als sessieminuten (session_minute). Onbekende zones: KeyError.
+        """
+        if starts and isinstance(starts[0], datetime):
+            starts = [session_minute(d) for d in starts]
+            ends = [session_minute(d) for d in ends]
+        zi = [self.index[z] for z in zone_ids]
+        if np is not None:
+            sess, tables, durations = self._segments_numpy(
+                np.asarray(zi, dtype=np.int64), np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64))
+            out = np.zeros(len(zi), dtype=np.int64)
+            np.add.at(out, sess, self._table_costs_numpy(tables, durations))
+            return out
+        out = [0] * len(zi)
+        for si, t, duration in self._segments_python(zi, starts, ends):
+            out[si] += self._table_cost_python(t, duration)
+        return out
+
+    def cost(self, zone_ids, starts, ends):
+        """Kosten in euro per sessie (zie cost_units)."""
+        units = self.cost_units(zone_ids, starts, ends)
+        return (units / AMOUNT_SCALE).tolist() if np is not None else [u / AMOUNT_SCALE for u in units]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price parking sessions from the full fare-part table")
+    parser.add_argument("zones", help="Local zone sink output (fetch_rdw_data.py --sink local)")
+    parser.add_argument("--snapshot", default="data/raw", help="Directory with tariefdeel (JSON or columnar)")
+    parser.add_argument("--sessions", help="CSV with columns zone,start,end (ISO datetimes)")
+    parser.add_argument("--out", help="Output CSV (default: stdout)")
+    parser.add_argument("--random", type=int, default=0,
+                        help="Instead of --sessions: time N random sessions spread over 30 days")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = CostEngine.from_files(args.zones, args.snapshot)
+    print(f"Loaded {len(engine.zone_ids)} zones, {len(engine.tables)} fare tables "
+          f"in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+    if args.random:
+        import random
+        rng = random.Random(0)
+        base = session_minute(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+        zone_ids = [rng.choice(engine.zone_ids) for _ in range(args.random)]
+        starts = [base + rng.randrange(30 * 24 * 60) for _ in range(args.random)]
+        ends = [s + rng.randrange(5, 10 * 60) for s in starts]
+        t0 = time.perf_counter()
+        costs = engine.cost(zone_ids, starts, ends)
+        elapsed = time.perf_counter() - t0
+        print(f"Priced {len(costs)} sessions in {elapsed:.2f}s (total EUR {sum(costs):.2f})", file=sys.stderr)
+        return
+
+    if not args.sessions:
+        parser.error("--sessions or --random is required")
+    with open(args.sessions, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    costs = engine.cost([r["zone"] for r in rows], [datetime.fromisoformat(r["start"]) for r in rows],
+                        [datetime.fromisoformat(r["end"]) for r in rows])
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["zone", "start", "end", "cost_eur"])
+    for r, c in zip(rows, costs):
+        writer.writerow([r["zone"], r["start"], r["end"], f"{c:.2f}"])
+    if args.out:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
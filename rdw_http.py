@@ -0,0 +1,444 @@
+"""
+Gedeelde HTTP-laag voor opendata.rdw.nl (SODA).
+
+- Keep-alive verbindingen per host (geen nieuwe TLS-handshake per request).
+- Begrensde thread pool: alle dataset/beheerder-requests lopen gelijktijdig.
+- Per run een samenvatting van bytes en latency per dataset.
+- Gepagineerde SODA-reader (keyset op :id): nooit stil afkappen op $limit,
+  rijen komen per pagina binnen (generator), geheugen begrensd per pagina.
+- On-disk HTTP-cache (gzip) met revalidatie via ETag/Last-Modified, TTL en LRU-limiet.
+- Retry bij 5xx, 429 (wacht Retry-After af) en netwerk-/protocolfouten (verse verbinding).
+
+Gebruik:
+  engine = FetchEngine(concurrency=8)
+  results = engine.fetch_all([("tijdvak", TIJDVAK_URL, {"areamanagerid": "363"}), ...])
+  engine.print_summary()
+  engine.close()
+
+  for row in engine.iter_rows(TIJDVAK_URL, {"areamanagerid": "363"}, dataset="tijdvak"):
+      ...
+
+  data = fetch_json(AREAS_URL, {"areamanagerid": "363"})   # debugscripts: één request, via de cache
+
+Concurrency-limiet via argument of omgeving: RDW_FETCH_CONCURRENCY (default 8).
+Paginagrootte: RDW_SODA_PAGE_SIZE (default 5000).
+Cache: RDW_HTTP_CACHE=0 (uit), RDW_HTTP_CACHE_DIR (default .cache/rdw_http),
+RDW_HTTP_CACHE_TTL (seconden zonder revalidatie, default 0: elke request is een conditional GET, zodat een
+pipeline-run nooit verouderde data ziet; > 0 alleen voor herhaald ad-hoc debuggen), RDW_HTTP_CACHE_MAX_MB (default 200).
+"""
+import gzip
+import hashlib
+import email.utils
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = int(os.environ.get("RDW_FETCH_CONCURRENCY", "8") or 8)
+REQUEST_TIMEOUT_SEC = 60
+USER_AGENT = "Q8-Parking-Pipeline/1.0"
+SODA_PAGE_SIZE = int(os.environ.get("RDW_SODA_PAGE_SIZE", "5000") or 5000)
+# Paging-parameters zijn van de reader; caller-waarden hiervoor worden genegeerd.
+_PAGING_PARAMS = ("$limit", "$offset", "$order")
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_ENABLED = os.environ.get("RDW_HTTP_CACHE", "1").strip().lower() in ("1", "true", "yes")
+CACHE_DIR = os.environ.get("RDW_HTTP_CACHE_DIR") or os.path.join(PROJECT_ROOT, ".cache", "rdw_http")
+CACHE_TTL_SEC = float(os.environ.get("RDW_HTTP_CACHE_TTL", "0") or 0)
+CACHE_MAX_BYTES = int(float(os.environ.get("RDW_HTTP_CACHE_MAX_MB", "200") or 200) * 1024 * 1024)
+MAX_RETRY_AFTER_SEC = 60  # langere Retry-After bij 429: niet blijven wachten maar na de laatste poging falen
+
+
+def build_url(url, params=None):
+    if params:
+        url += "?" + urllib.parse.urlencode(params)
+    return url
+
+
+def retry_delay(headers, default):
+    """Wachttijd voor een retry: Retry-After (seconden of HTTP-datum, max. MAX_RETRY_AFTER_SEC), anders default."""
+    value = (headers.get("Retry-After") or "").strip()
+    if value.isdigit():
+        delay = float(value)
+    else:
+        try:
+            delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(0.0, delay), MAX_RETRY_AFTER_SEC)
+
+
+def soda_page_params(params, last_id=None, page_size=SODA_PAGE_SIZE):
+    """
+    Params voor één keyset-pagina: stabiele `$order=:id` en `:id > last_id` in `$where`.
+    `$select` krijgt `:id` erbij (zonder `$select`: `:*, *` = systeemvelden + alle kolommen).
+    """
+    out = {k: v for k, v in (params or {}).items() if k not in _PAGING_PARAMS}
+    select = out.get("$select")
+    out["$select"] = f":id, {select}" if select else ":*, *"
+    where = out.get("$where")
+    if last_id is not None:
+        keyset = f":id > '{last_id}'"
+        where = f"({where}) AND {keyset}" if where else keyset
+    if where:
+        out["$where"] = where
+    out["$order"] = ":id"
+    out["$limit"] = page_size
+    return out
+
+
+def normalize_url(url):
+    """Cachesleutel-URL: scheme/host in kleine letters, queryparameters gesorteerd."""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+class HttpCache:
+    """
+    Response-bodies gzip op schijf, per genormaliseerde URL (sha256).
+    Per entry: <key>.json.gz (body) en <key>.meta.json (url, etag, last_modified, stored_at).
+    Binnen de TTL geen request; daarna conditional GET (304 = body hergebruiken).
+    LRU: mtime van de body = laatste gebruik; boven max_bytes worden de oudste entries verwijderd.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL_SEC, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".json.gz", base + ".meta.json"
+
+    def lookup(self, url):
+        """Retourneer meta-dict (met 'fresh': bool) of None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        meta["fresh"] = (time.time() - meta.get("stored_at", 0)) < self.ttl
+        return meta
+
+    def validators(self, meta):
+        """Headers voor een conditional GET."""
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def read(self, url):
+        body_path, _ = self._paths(url)
+        with open(body_path, "rb") as f:
+            body = gzip.decompress(f.read())
+        os.utime(body_path)  # LRU: laatst gebruikt
+        return body
+
+    def store(self, url, body, headers):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": normalize_url(url),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": time.time(),
+        }
+        _atomic_write(body_path, gzip.compress(body))
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        self.evict()
+
+    def revalidated(self, url):
+        """304 ontvangen: TTL opnieuw laten ingaan."""
+        _, meta_path = self._paths(url)
+        meta = self.lookup(url) or {}
+        meta.pop("fresh", None)
+        meta["stored_at"] = time.time()
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def evict(self):
+        """Verwijder least-recently-used entries tot de cache onder max_bytes zit."""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                for p in (path, path[: -len(".json.gz")] + ".meta.json"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                total -= size
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class HostConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port); max `max_per_host` bewaard."""
+
+    def __init__(self, max_per_host=DEFAULT_CONCURRENCY, timeout=REQUEST_TIMEOUT_SEC):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key, fresh=False):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle and not fresh:
+                return idle.pop()
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout)
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, url, headers=None):
+        """GET via een gepoolde verbinding. Retourneert (status, reason, headers, body-bytes op de lijn)."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        hdrs = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **(headers or {})}
+
+        # Een idle verbinding kan door de server gesloten zijn (RemoteDisconnected): één keer opnieuw met
+        # een verse verbinding, niet met de volgende idle verbinding die net zo oud kan zijn.
+        for attempt in range(2):
+            conn = self._acquire(key, fresh=attempt > 0)
+            try:
+                conn.request("GET", path, headers=hdrs)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if attempt == 0:
+                    continue
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, resp.reason, resp.headers, body
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+
+class FetchStats:
+    """Bytes (op de lijn) en latency per dataset, thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_dataset = {}
+        self.started = time.perf_counter()
+
+    def _entry(self, dataset):
+        return self.by_dataset.setdefault(dataset or "-", {
+            "requests": 0, "bytes": 0, "latency_sum": 0.0, "latency_max": 0.0,
+            "cache_fresh": 0, "cache_304": 0,
+        })
+
+    def record_cache(self, dataset, kind):
+        """kind: 'cache_fresh' (binnen TTL, geen request) of 'cache_304' (revalidatie)."""
+        with self._lock:
+            self._entry(dataset)[kind] += 1
+
+    def record(self, dataset, nbytes, latency):
+        with self._lock:
+            s = self._entry(dataset)
+            s["requests"] += 1
+            s["bytes"] += nbytes
+            s["latency_sum"] += latency
+            s["latency_max"] = max(s["latency_max"], latency)
+
+    def print_summary(self):
+        wall = time.perf_counter() - self.started
+        total_bytes = sum(s["bytes"] for s in self.by_dataset.values())
+        total_lat = sum(s["latency_sum"] for s in self.by_dataset.values())
+        print("\n=== RDW fetch summary ===")
+        print(f"{'DATASET':<14} | {'REQ':>4} | {'KB':>9} | {'SUM s':>7} | {'MAX s':>6} | {'FRESH':>5} | {'304':>4}")
+        print("-" * 68)
+        for name in sorted(self.by_dataset):
+            s = self.by_dataset[name]
+            print(f"{name:<14} | {s['requests']:>4} | {s['bytes'] / 1024:>9.1f} | {s['latency_sum']:>7.2f} | {s['latency_max']:>6.2f}"
+                  f" | {s['cache_fresh']:>5} | {s['cache_304']:>4}")
+        print("-" * 68)
+        print(f"Total {total_bytes / 1024:.1f} KB; sequential latency {total_lat:.2f}s, wall clock {wall:.2f}s")
+
+
+class FetchEngine:
+    """Concurrent JSON-fetcher voor SODA-endpoints met keep-alive pool en statistieken."""
+
+    def __init__(self, concurrency=None, retries=3, cache=None):
+        self.concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+        self.retries = retries
+        self.pool = HostConnectionPool(max_per_host=self.concurrency)
+        self.stats = FetchStats()
+        # cache=None: standaard HttpCache (tenzij RDW_HTTP_CACHE=0); cache=False: expliciet uit.
+        if cache is None and CACHE_ENABLED:
+            cache = HttpCache()
+        self.cache = cache or None
+
+    def get_json(self, url, params=None, dataset=None):
+        """GET URL (+ params) en retourneer JSON; cache/revalidatie, retry bij 5xx, 429 of netwerk-/protocolfout."""
+        full_url = build_url(url, params)
+        meta = self.cache.lookup(full_url) if self.cache else None
+        if meta and meta["fresh"]:
+            self.stats.record_cache(dataset, "cache_fresh")
+            return json.loads(self.cache.read(full_url).decode("utf-8"))
+        headers = self.cache.validators(meta) if meta else {}
+        print(f"  Requesting: {full_url}")
+        for attempt in range(self.retries):
+            t0 = time.perf_counter()
+            try:
+                status, reason, resp_headers, body = self.pool.request(full_url, headers)
+            except (http.client.HTTPException, OSError):
+                # HostConnectionPool heeft de kapotte verbinding al gesloten; de retry opent een nieuwe.
+                if attempt < self.retries - 1:
+                    time.sleep(0.5 * (attempt + 1))
+                    continue
+                raise
+            self.stats.record(dataset, len(body), time.perf_counter() - t0)
+            if status == 304 and meta:
+                self.stats.record_cache(dataset, "cache_304")
+                self.cache.revalidated(full_url)
+                return json.loads(self.cache.read(full_url).decode("utf-8"))
+            if (status == 429 or 500 <= status < 600) and attempt < self.retries - 1:
+                time.sleep(retry_delay(resp_headers, 1.0 * (attempt + 1)))
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(full_url, status, reason, resp_headers, None)
+            if resp_headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            data = json.loads(body.decode("utf-8"))
+            if self.cache:
+                self.cache.store(full_url, body, resp_headers)
+            return data
+
+    def iter_pages(self, url, params=None, dataset=None, page_size=SODA_PAGE_SIZE):
+        """Generator: één lijst rijen per SODA-pagina, tot een pagina korter is dan page_size."""
+        last_id = None
+        while True:
+            page = self.get_json(url, soda_page_params(params, last_id, page_size), dataset)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1][":id"]
+
+    def iter_rows(self, url, params=None, dataset=None, page_size=SODA_PAGE_SIZE):
+        """Generator over alle rijen (alle pagina's) van één query."""
+        for page in self.iter_pages(url, params, dataset, page_size):
+            yield from page
+
+    def stream_all(self, tasks, page_size=SODA_PAGE_SIZE):
+        """
+        Pagineer [(dataset, url, params), ...] gelijktijdig; yield (task_index, page) zodra een pagina binnen is.
+        De queue is begrensd, dus trage consumers remmen de downloads af i.p.v. alles te bufferen.
+        """
+        pages = queue.Queue(maxsize=self.concurrency * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def run(idx, dataset, url, params):
+            try:
+                for page in self.iter_pages(url, params, dataset, page_size):
+                    if stop.is_set():
+                        return
+                    put((idx, page))
+            except BaseException as e:
+                put((idx, e))
+            finally:
+                put((idx, done))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                for idx, (dataset, url, params) in enumerate(tasks):
+                    executor.submit(run, idx, dataset, url, params)
+                remaining = len(tasks)
+                while remaining:
+                    idx, item = pages.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, BaseException):
+                        raise item
+                    else:
+                        yield idx, item
+            finally:
+                # Consumer stopt (fout of break): workers niet laten hangen op een volle queue.
+                stop.set()
+
+    def fetch_all(self, tasks, page_size=SODA_PAGE_SIZE):
+        """Alle rijen per task (volledig gepagineerd), in dezelfde volgorde als tasks."""
+        buckets = [[] for _ in tasks]
+        for idx, page in self.stream_all(tasks, page_size):
+            buckets[idx].extend(page)
+        return buckets
+
+    def print_summary(self):
+        self.stats.print_summary()
+
+    def close(self):
+        self.pool.close()
+
+
+_default_engine = None
+
+
+def fetch_json(url, params=None):
+    """
+    Eén GET via een gedeelde engine (keep-alive + HttpCache), voor debug- en analysescripts.
+    Let op: geen paginering; gebruik FetchEngine.iter_rows voor volledige datasets.
+    """
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FetchEngine(concurrency=1)
+    return _default_engine.get_json(url, params)
@@ -0,0 +1,135 @@
+"""
+Relationele join gebied -> regeling -> tijdvak -> tariefberekening -> tariefdeel op getypeerde records
+(rdw_schema.py), gedeeld door fetch_rdw_data.py, rdw_cost.py en scripts/analyze_full_dataset.py.
+
+- "Nieuwste per sleutel" (mapping per (gebied, regeling), tijdvak per (regeling, dag, starttijd),
+  tariefdeel per (beheerder, code) t/m de tariefdatum) is een group-by argmax: één lexsort i.p.v.
+  sorteren + dedup-sets in Python.
+- join_pairs is een equi-join via sorteren + searchsorted i.p.v. dict-lookups per rij; de platte
+  optietabel van scripts/analyze_full_dataset.py is daarop gebouwd.
+
+Met NumPy lopen sorteren, factoriseren en joinen in C; zonder NumPy valt elke functie terug op een
+pure-Python implementatie met exact dezelfde uitkomst (zelfde rijen, zelfde volgorde).
+"""
+try:
+    import numpy as np
+except ImportError:  # optioneel: pure-Python fallback
+    np = None
+
+from rdw_schema import amount_to_float
+
+HAVE_NUMPY = np is not None
+
+
+def _date_ints(dates):
+    """YYYYMMDD[hhmmss]-strings als int64 (None bij niet-numerieke datums -> Python-pad)."""
+    try:
+        return np.array(dates, dtype=object).astype(np.int64)
+    except (TypeError, ValueError):
+        return None
+
+
+def _factorize(keys):
+    """Sleutels -> int-codes (volgorde van eerste voorkomen); één dict-pass, sneller dan np.unique op strings."""
+    codes = {}
+    return np.fromiter((codes.setdefault(k, len(codes)) for k in keys), dtype=np.intp, count=len(keys))
+
+
+def desc_order(dates):
+    """Rij-indices gesorteerd op datum aflopend; gelijke datums houden hun invoervolgorde (stabiel)."""
+    if HAVE_NUMPY and dates:
+        d = _date_ints(dates)
+        if d is not None:
+            return np.argsort(-d, kind="stable").tolist()
+    return sorted(range(len(dates)), key=dates.__getitem__, reverse=True)
+
+
+def latest_per_key(keys, dates, max_date=None):
+    """
+    Group-by argmax: per sleutel de rij met de hoogste datum (<= max_date indien gegeven); bij gelijke
+    datum de eerste in invoervolgorde. Sleutel None = rij doet niet mee. Retourneert de winnende
+    rij-indices in volgorde datum aflopend, dan invoervolgorde.
+    """
+    eligible = [i for i, k in enumerate(keys)
+                if k is not None and (max_date is None or dates[i] <= max_date)]
+    if not eligible:
+        return []
+    if HAVE_NUMPY:
+        d = _date_ints([dates[i] for i in eligible])
+        if d is not None:
+            idx = np.array(eligible)
+            codes = _factorize([keys[i] for i in eligible])
+            order = np.lexsort((idx, -d, codes))
+            c = codes[order]
+            first = order[np.concatenate(([True], c[1:] != c[:-1]))]
+            return idx[first[np.lexsort((first, -d[first]))]].tolist()
+    seen, winners = set(), []
+    for i in sorted(eligible, key=dates.__getitem__, reverse=True):
+        if keys[i] not in seen:
+            seen.add(keys[i])
+            winners.append(i)
+    return winners
+
+
+def join_pairs(left_keys, right_keys):
+    """
+    Equi-join op sleutel: alle (i, j) met left_keys[i] == right_keys[j], gesorteerd op i en dan j.
+    Retourneert twee lijsten (left-indices, right-indices).
+    """
+    if not left_keys or not right_keys:
+        return [], []
+    if HAVE_NUMPY:
+        codes = _factorize(list(left_keys) + list(right_keys))
+        lc, rc = codes[:len(left_keys)], codes[len(left_keys):]
+        r_order = np.argsort(rc, kind="stable")
+        rc_sorted = rc[r_order]
+        lo = np.searchsorted(rc_sorted, lc, side="left")
+        counts = np.searchsorted(rc_sorted, lc, side="right") - lo
+        li = np.repeat(np.arange(len(left_keys)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ri = r_order[np.repeat(lo, counts) + offsets]
+        return li.tolist(), ri.tolist()
+    index = {}
+    for j, k in enumerate(right_keys):
+        index.setdefault(k, []).append(j)
+    li, ri = [], []
+    for i, k in enumerate(left_keys):
+        for j in index.get(k, ()):
+            li.append(i)
+            ri.append(j)
+    return li, ri
+
+
+def build_join(typed, today):
+    """
+    Koppelstructuren voor de zone-transform:
+    - mapping_sorted : mapping-records, nieuwste eerst
+    - area_to_reg    : areaid -> [regulationid] (uniek per paar, nieuwste eerst)
+    - tijdvak_map    : regulationid -> [TimeFrame] (alle tijdvakken, nieuwste eerst)
+    - tariff_parts_map: (mgr, code) -> (rate €/u, step, amount €) van het nieuwste tariefdeel t/m today
+    """
+    mapping = typed["mapping"]
+    mapping_sorted = [mapping[i] for i in desc_order([m.start_date for m in mapping])]
+    area_to_reg = {}
+    pair_keys = [(m.area_id, m.regulation_id) if m.area_id and m.regulation_id else None for m in mapping]
+    for i in latest_per_key(pair_keys, [m.start_date for m in mapping]):
+        area_to_reg.setdefault(mapping[i].area_id, []).append(mapping[i].regulation_id)
+
+    slots = typed["timeframes"]
+    tijdvak_map = {}
+    for i in desc_order([s.start_date for s in slots]):
+        s = slots[i]
+        if s.regulation_id:
+            tijdvak_map.setdefault(s.regulation_id, []).append(s)
+
+    parts = typed["fareparts"]
+    tariff_parts_map = {}
+    part_keys = [(p.manager, p.fare_code) if p.fare_code else None for p in parts]
+    for i in latest_per_key(part_keys, [p.start_date for p in parts], max_date=today):
+        p = parts[i]
+        amt, step = amount_to_float(p.amount), float(p.step)
+        rate = (amt/step)*60 if step > 0 else 0
+        tariff_parts_map[(p.manager, p.fare_code)] = (rate, step, amt)
+
+    return {"mapping_sorted": mapping_sorted, "area_to_reg": area_to_reg, "tijdvak_map": tijdvak_map,
+            "tariff_parts_map": tariff_parts_map}
@@ -0,0 +1,65 @@
+"""
+Content-hash per document en een lokaal manifest van de gepubliceerde hashes, zodat een run alleen
+gewijzigde documenten schrijft.
+
+- content_hash(doc): sha256 over de canonieke JSON (gesorteerde sleutels, compacte separators) zonder
+  de volatiele velden (updated_at, content_hash zelf); gelijke inhoud = gelijke hash, ook tussen processen
+- Manifest: {doc_id: hash} per (project, collectie) in .cache/manifests/, atomair weggeschreven; wordt pas
+  bijgewerkt nadat de upload gelukt is
+- remote_hashes(sink, collectie): dezelfde map direct uit de sink (rdw_sink.py) met een field mask; in
+  Firestore een projectie (select(["content_hash"])), voor de eerste run of als het manifest niet meer te
+  vertrouwen is. Lokale sinks (SQLite/JSONL) lezen de hashes altijd zelf en hebben geen manifest nodig
+
+Ongewijzigde documenten houden zo ook hun updated_at; de PWA-listeners (onSnapshot) vuren alleen voor
+zones die echt veranderd zijn.
+"""
+import hashlib
+import json
+import os
+
+HASH_FIELD = "content_hash"
+VOLATILE_FIELDS = ("updated_at", HASH_FIELD)
+MANIFEST_DIR = os.path.join(".cache", "manifests")
+
+
+def content_hash(doc, exclude=VOLATILE_FIELDS):
+    """Stabiele hash (32 hex-tekens) van de inhoud van doc, zonder de velden in exclude."""
+    canonical = json.dumps({k: v for k, v in doc.items() if k not in exclude}, sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def remote_hashes(sink, collection):
+    """{doc_id: content_hash} van de bestaande documenten, met alleen het hash-veld over de lijn."""
+    return {doc_id: data.get(HASH_FIELD) for doc_id, data in sink.stream(collection, [HASH_FIELD])}
+
+
+class Manifest:
+    """Gepubliceerde hashes van één collectie in één project (lokaal JSON-bestand)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}
+        self.loaded = False
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.hashes = json.load(f)
+            self.loaded = True
+
+    @classmethod
+    def for_target(cls, project, collection, directory=MANIFEST_DIR):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in f"{project or 'default'}_{collection}")
+        return cls(os.path.join(directory, safe + ".json"))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f, sort_keys=True, indent=0)
+        os.replace(tmp, self.path)
+
+
+def split_changed(docs, published):
+    """docs [(doc_id, doc met content_hash)] -> (gewijzigd of nieuw, aantal ongewijzigd)."""
+    changed = [(doc_id, doc) for doc_id, doc in docs if published.get(doc_id) != doc[HASH_FIELD]]
+    return changed, len(docs) - len(changed)
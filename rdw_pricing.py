@@ -0,0 +1,146 @@
+"""
+Prijs per minuut van de week voor parkeerzones.
+
+fetch_rdw_data.py zet in elk zone-document een veld `price_grid`: de run-length encoding van een
+array over de 7 * 1440 minuten van de week (maandag 00:00 = 0):
+  {"minutes": [0, 540, 1080, ...], "rate_cents": [0, 250, 0, ...], "max_duration": [0, 180, 0, ...],
+   "fare_code": ["", "T1", "", ...]}
+Vanaf minutes[i] geldt rate_cents[i] (uurtarief in centen), max_duration[i] (minuten, 0 = geen
+maximum) en tariefcode fare_code[i] ("" = vrij; voor rdw_cost.py) tot het volgende breekpunt. Bijzondere dagen (FEESTDAG, KOOPAVOND, ...) zitten niet in de grid.
+
+PriceGrid bundelt de grids van veel zones in drie platte arrays, zodat "tarief voor zones Z op tijden T"
+voor duizenden paren één searchsorted is (NumPy) of per paar een bisect (zonder NumPy).
+
+Gebruik:
+  grid = PriceGrid.from_file("data/processed/zones.json")     # --sink local uitvoer
+  grid.rate_at(["363_T12B", "599_1234"], [minute_of_week(dt1), minute_of_week(dt2)])
+  python rdw_pricing.py data/processed/zones.json --at 2026-10-19T10:30
+"""
+import argparse
+import bisect
+import json
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optioneel: bisect-fallback
+    np = None
+
+from rdw_schema import MINUTES_PER_DAY
+
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def minute_of_week(dt):
+    """datetime -> minuut van de week (maandag 00:00 = 0)."""
+    return dt.weekday() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+def encode_grid(segments):
+    """
+    [(minuut van de week, rate_cents, max_duration, fare_code)] (oplopend, eerste op 0) -> price_grid-dict;
+    opeenvolgende segmenten met dezelfde waarden worden samengevoegd.
+    """
+    fields = ("rate_cents", "max_duration", "fare_code")
+    grid = {"minutes": [], **{f: [] for f in fields}}
+    for minute, *values in segments:
+        if grid["minutes"] and all(grid[f][-1] == v for f, v in zip(fields, values)):
+            continue
+        grid["minutes"].append(minute)
+        for f, v in zip(fields, values):
+            grid[f].append(v)
+    return grid
+
+
+def dense_grid(price_grid, resolution=1):
+    """price_grid -> (rate_cents, max_duration) als lijsten per `resolution` minuten over de hele week."""
+    n = MINUTES_PER_WEEK // resolution
+    rates, durations = [0] * n, [0] * n
+    bounds = price_grid["minutes"][1:] + [MINUTES_PER_WEEK]
+    for start, end, cents, max_dur in zip(price_grid["minutes"], bounds, price_grid["rate_cents"],
+                                          price_grid["max_duration"]):
+        for i in range(start // resolution, -(-end // resolution)):
+            rates[i], durations[i] = cents, max_dur
+    return rates, durations
+
+
+class PriceGrid:
+    """Grids van veel zones als platte arrays: sleutel = zone-index * MINUTES_PER_WEEK + breekpunt."""
+
+    def __init__(self, grids):
+        """grids: {zone_id: price_grid}."""
+        self.zone_ids = list(grids)
+        self.index = {zid: i for i, zid in enumerate(self.zone_ids)}
+        keys, rates, durations = [], [], []
+        for i, zid in enumerate(self.zone_ids):
+            g = grids[zid]
+            keys.extend(i * MINUTES_PER_WEEK + m for m in g["minutes"])
+            rates.extend(g["rate_cents"])
+            durations.extend(g["max_duration"])
+        if np is not None:
+            self.keys = np.asarray(keys, dtype=np.int64)
+            self.rates = np.asarray(rates, dtype=np.int32)
+            self.durations = np.asarray(durations, dtype=np.int32)
+        else:
+            self.keys, self.rates, self.durations = keys, rates, durations
+
+    @classmethod
+    def from_zones(cls, zones, id_key="doc_id"):
+        """Uit zone-documenten (dicts met price_grid); id_key bepaalt de zone-ID (standaard doc_id)."""
+        return cls({z[id_key]: z["price_grid"] for z in zones if z.get("price_grid")})
+
+    @classmethod
+    def from_file(cls, path):
+        """Uit de --sink local uitvoer van fetch_rdw_data.py (doc_id -> document)."""
+        with open(path, "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        return cls({doc_id: d["price_grid"] for doc_id, d in docs.items() if d.get("price_grid")})
+
+    def _positions(self, zone_ids, minutes):
+        """Index in de platte arrays van het segment dat op (zone, minuut) geldt."""
+        if isinstance(zone_ids, str):
+            zone_ids = [zone_ids] * len(minutes)
+        if np is not None:
+            zi = np.fromiter((self.index[z] for z in zone_ids), dtype=np.int64, count=len(zone_ids))
+            q = zi * MINUTES_PER_WEEK + np.asarray(minutes, dtype=np.int64) % MINUTES_PER_WEEK
+            return np.searchsorted(self.keys, q, side="right") - 1
+        return [bisect.bisect_right(self.keys, self.index[z] * MINUTES_PER_WEEK + m % MINUTES_PER_WEEK) - 1
+                for z, m in zip(zone_ids, minutes)]
+
+    def rate_at(self, zone_ids, minutes):
+        """
+        Uurtarief in centen voor paren (zone_ids[i], minutes[i]); minutes = minuut van de week
+        (zie minute_of_week). zone_ids mag ook één ID zijn voor alle tijden.
+        """
+        pos = self._positions(zone_ids, minutes)
+        return self.rates[pos] if np is not None else [self.rates[p] for p in pos]
+
+    def max_duration_at(self, zone_ids, minutes):
+        """Maximale parkeerduur (minuten, 0 = geen maximum) voor paren (zone, minuut van de week)."""
+        pos = self._positions(zone_ids, minutes)
+        return self.durations[pos] if np is not None else [self.durations[p] for p in pos]
+
+    def rates_for_all(self, minute):
+        """Uurtarief (centen) van alle zones op één moment, in volgorde van self.zone_ids (kaartpins)."""
+        return self.rate_at(self.zone_ids, [minute] * len(self.zone_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query hourly rates per zone at a moment of the week")
+    parser.add_argument("zones", help="Local zone sink output (fetch_rdw_data.py --sink local)")
+    parser.add_argument("--at", help="ISO datetime (default: now)")
+    parser.add_argument("--zone", action="append", help="Zone doc ID (repeatable; default: all zones)")
+    args = parser.parse_args()
+    grid = PriceGrid.from_file(args.zones)
+    at = datetime.fromisoformat(args.at) if args.at else datetime.now()
+    zone_ids = args.zone or grid.zone_ids
+    minute = minute_of_week(at)
+    rates = grid.rate_at(zone_ids, [minute] * len(zone_ids))
+    durations = grid.max_duration_at(zone_ids, [minute] * len(zone_ids))
+    print(f"{'ZONE':<30} {'EUR/H':>7} {'MAX MIN':>8}   ({at:%A %H:%M})")
+    for zid, cents, max_dur in zip(zone_ids, rates, durations):
+        print(f"{zid:<30} {cents / 100:>7.2f} {int(max_dur) or '-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Schema-registry voor de RDW-datasets uit fetch_rdw_data.DATASET_SPECS.
+
+Elke SODA-rij (dict met strings) wordt één keer omgezet naar een compact, getypeerd record
+(NamedTuple); de transform rekent daarna alleen nog met ints/enums:
+- dag       : Day (IntEnum); afwijkende dagen (FEESTDAG, KOOPAVOND, ...) worden Day.SPECIAL, de
+              oorspronkelijke naam blijft in `day_name`
+- tijden    : minuten sinds middernacht ("0930" -> 570, "2400" -> 1440)
+- bedragen  : vaste-komma int in eenheden van 1/AMOUNT_SCALE euro. RDW publiceert 8 decimalen en
+              minuuttarieven als 0.04166667 zijn gangbaar; afronden op hele centen zou tarieven wijzigen.
+- datums    : blijven YYYYMMDD[hhmmss]-strings (sorteerbaar, vergelijkbaar met het referentiedatum);
+              einddatum None = open einde (zie rdw_temporal.py)
+
+Gebruik:
+  typed = parse_datasets(raw)          # raw = {"timeframes": [dict, ...], ...}
+  for tf in typed["timeframes"]: tf.start, tf.day, ...
+"""
+import sys
+from enum import IntEnum
+from typing import NamedTuple, Optional
+
+AMOUNT_SCALE = 10 ** 8
+MINUTES_PER_DAY = 24 * 60
+
+
+class Day(IntEnum):
+    MAANDAG = 0
+    DINSDAG = 1
+    WOENSDAG = 2
+    DONDERDAG = 3
+    VRIJDAG = 4
+    ZATERDAG = 5
+    ZONDAG = 6
+    DAGELIJKS = 7
+    SPECIAL = 8
+
+
+WEEKDAYS = tuple(Day(i) for i in range(7))
+_DAY_ALIASES = {"DAILY": Day.DAGELIJKS, "ELKE DAG": Day.DAGELIJKS}
+
+
+def parse_day(value):
+    """'MAANDAG' -> Day.MAANDAG; DAGELIJKS/DAILY/ELKE DAG -> Day.DAGELIJKS; overige -> Day.SPECIAL."""
+    name = (value or "").upper()
+    if name in _DAY_ALIASES:
+        return _DAY_ALIASES[name]
+    day = Day.__members__.get(name)
+    return Day.SPECIAL if day is None or day is Day.SPECIAL else day
+
+
+def _day_name(value):
+    """Dagnaam in hoofdletters, geïnterned: duizenden tijdvakken delen dezelfde paar strings."""
+    return sys.intern(value.upper())
+
+
+def parse_hhmm(value):
+    """SODA-tijd ('0', '930', '0930', '2400') -> minuten sinds middernacht."""
+    hhmm = int(value.zfill(4))
+    return (hhmm // 100) * 60 + hhmm % 100
+
+
+def format_hhmm(minutes):
+    """Minuten sinds middernacht -> 'HH:MM' (1440 -> '24:00')."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_amount(value):
+    """'0.04166667' -> 4166667 (exact, zie AMOUNT_SCALE)."""
+    neg = value.startswith("-")
+    whole, _, frac = value.lstrip("-").partition(".")
+    units = int(whole or "0") * AMOUNT_SCALE + int((frac + "00000000")[:8])
+    return -units if neg else units
+
+
+def amount_to_float(units):
+    """Vaste-komma bedrag -> float (gelijk aan float() van de oorspronkelijke string)."""
+    return units / AMOUNT_SCALE
+
+
+# --- Records ---
+
+class Area(NamedTuple):
+    manager: str
+    area_id: str
+    desc: Optional[str]
+    geometry: Optional[dict]
+
+
+class AreaRegulation(NamedTuple):
+    manager: str
+    area_id: str
+    regulation_id: str
+    usage_id: Optional[str]
+    start_date: str
+    end_date: Optional[str]
+
+
+class TimeFrame(NamedTuple):
+    manager: str
+    regulation_id: str
+    day: Day
+    day_name: str
+    start: int
+    end: int
+    fare_code: Optional[str]
+    max_duration: int
+    start_date: str
+    end_date: Optional[str]
+
+
+class FarePart(NamedTuple):
+    manager: str
+    fare_code: str
+    amount: int
+    step: int
+    start_duration: int
+    start_date: str
+    end_date: Optional[str]
+
+
+class Regulation(NamedTuple):
+    manager: str
+    regulation_id: str
+    desc: Optional[str]
+    type: str
+    start_date: str
+    end_date: Optional[str]
+
+
+class FareCalculation(NamedTuple):
+    manager: str
+    fare_code: str
+    desc: Optional[str]
+    start_date: str
+    end_date: Optional[str]
+
+
+# Per dataset: recordtype + (SODA-kolom, default bij ontbreken, parser) per veld, in veldvolgorde.
+# Een parser wordt alleen aangeroepen als de waarde niet None is.
+SCHEMAS = {
+    "areas": (Area, (
+        ("areamanagerid", None, None),
+        ("areaid", None, None),
+        ("areadesc", None, None),
+        ("areageometryaswgs84", None, None),
+    )),
+    "mapping": (AreaRegulation, (
+        ("areamanagerid", None, None),
+        ("areaid", None, None),
+        ("regulationid", None, None),
+        ("usageid", None, None),
+        ("startdatearearegulation", "0", None),
+        ("enddatearearegulation", None, None),
+    )),
+    "timeframes": (TimeFrame, (
+        ("areamanagerid", None, None),
+        ("regulationid", None, None),
+        ("daytimeframe", "", parse_day),
+        ("daytimeframe", "", _day_name),
+        ("starttimetimeframe", "0", parse_hhmm),
+        ("endtimetimeframe", "2400", parse_hhmm),
+        ("farecalculationcode", None, None),
+        ("maxdurationright", "0", int),
+        ("startdatetimeframe", "0", None),
+        ("enddatetimeframe", None, None),
+    )),
+    "fareparts": (FarePart, (
+        ("areamanagerid", None, None),
+        ("farecalculationcode", None, None),
+        ("amountfarepart", "0", parse_amount),
+        ("stepsizefarepart", "1", int),
+        ("startdurationfarepart", "0", int),
+        ("startdatefarepart", "0", None),
+        ("enddatefarepart", None, None),
+    )),
+    "regulations": (Regulation, (
+        ("areamanagerid", None, None),
+        ("regulationid", None, None),
+        ("regulationdesc", None, None),
+        ("regulationtype", "B", None),
+        ("startdateregulation", "0", None),
+        ("enddateregulation", None, None),
+    )),
+    "calculations": (FareCalculation, (
+        ("areamanagerid", None, None),
+        ("farecalculationcode", None, None),
+        ("farecalculationdesc", None, None),
+        ("startdatefare", "0", None),
+        ("enddatefare", None, None),
+    )),
+}
+
+
+def parse_rows(name, rows):
+    """Zet de SODA-rijen van dataset `name` om naar records uit SCHEMAS[name]."""
+    record, fields = SCHEMAS[name]
+    out = []
+    for row in rows:
+        values = []
+        for col, default, parse in fields:
+            v = row.get(col, default)
+            values.append(parse(v) if parse and v is not None else v)
+        out.append(record._make(values))
+    return out
+
+
+def parse_datasets(raw):
+    """{dataset: [SODA-rij]} -> {dataset: [record]} voor alle datasets in SCHEMAS."""
+    return {name: parse_rows(name, raw.get(name, [])) for name in SCHEMAS}
@@ -0,0 +1,343 @@
+"""
+Opslag-interface voor de pipelines (zones, facilities, adresverrijking), zodat ze niet meer direct met
+firestore.client() praten en ook volledig offline kunnen draaien.
+
+Elke sink heeft dezelfde vier operaties per collectie:
+- upsert_many(collectie, [(doc_id, doc)], merge=False): schrijven (merge=True werkt alleen de gegeven velden bij)
+- delete_many(collectie, doc_ids)
+- list_ids(collectie): set met document-ID's
+- stream(collectie, fields=None): (doc_id, doc) per document; met fields alleen die velden (field mask)
+
+Implementaties:
+- FirestoreSink: via rdw_upload.py (batches, parallel, retry; emulator met FIRESTORE_EMULATOR_HOST)
+- SQLiteSink: één SQLite-bestand (WAL), tabel documents (collectie, id, JSON); schrijven in één transactie
+- JsonlSink: map met <collectie>.jsonl (één document per regel, gesorteerd op ID), atomair herschreven
+- JsonFileSink: één collectie als JSON-object {doc_id: document} in één bestand (fetch_rdw_data.py
+  --sink local, data/processed/zones.json); zonder pad <collectie>.json in data/local/
+
+open_sink(spec) maakt een sink uit een CLI-waarde: "firestore", "sqlite[:PAD]", "jsonl[:MAP]" of
+"local[:BESTAND]".
+Zelfde spec in fetch_rdw_data.py (--sink), scripts/fetch_npropendata_facilities.py en
+scripts/enrich_zones_with_addresses.py; rdw_upload.py --sink meet de schrijfsnelheid per backend.
+
+Gebruik (vanuit projectroot):
+  python rdw_sink.py --sink sqlite stats
+  python rdw_sink.py --sink sqlite:data/local/rdw.sqlite3 export zones /tmp/zones.jsonl
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from rdw_upload import UPLOAD_MODE, delete_documents, firestore_client, list_document_ids, upload_documents
+
+LOCAL_SQLITE_PATH = os.path.join("data", "local", "rdw.sqlite3")
+LOCAL_JSONL_DIR = os.path.join("data", "local", "jsonl")
+LOCAL_JSON_DIR = os.path.join("data", "local")
+SINK_KINDS = ("firestore", "sqlite", "jsonl", "local")
+DEFAULT_SINK = os.environ.get("RDW_SINK", "firestore")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+"""
+
+
+def _project(doc, fields):
+    return dict(doc) if fields is None else {f: doc[f] for f in fields if f in doc}
+
+
+def _report(kind, verb, n, collection, t0):
+    seconds = time.perf_counter() - t0
+    rate = f" ({n / seconds:.0f} docs/s)" if seconds > 0 and n else ""
+    print(f"{kind}: {verb} {n} documents in '{collection}' in {seconds:.2f}s{rate}")
+    return {"documents": n, "seconds": seconds, "docs_per_second": n / seconds if seconds > 0 else 0.0}
+
+
+class FirestoreSink:
+    """Firestore (of de emulator); de client wordt pas bij het eerste gebruik gemaakt."""
+
+    local = False
+
+    def __init__(self, db=None, cred_path="service-account.json", mode=UPLOAD_MODE):
+        self._db, self.cred_path, self.mode = db, cred_path, mode
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = firestore_client(self.cred_path)
+        return self._db
+
+    @property
+    def target(self):
+        """Naam van het doel voor het hash-manifest (rdw_manifest.Manifest.for_target)."""
+        return getattr(self.db, "project", None)
+
+    def upsert_many(self, collection, docs, merge=False):
+        return upload_documents(self.db, collection, docs, self.mode, merge=merge)
+
+    def delete_many(self, collection, doc_ids):
+        return delete_documents(self.db, collection, doc_ids)
+
+    def list_ids(self, collection):
+        return list_document_ids(self.db, collection)
+
+    def stream(self, collection, fields=None):
+        query = self.db.collection(collection)
+        if fields is not None:
+            query = query.select(list(fields))
+        for snap in query.stream():
+            yield snap.id, snap.to_dict() or {}
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return "firestore"
+
+
+class SQLiteSink:
+    """Lokale documentopslag in SQLite (WAL); meerdere processen/scripts tegelijk is veilig."""
+
+    local = True
+
+    def __init__(self, path=LOCAL_SQLITE_PATH, timeout=30.0):
+        self.path, self.timeout = path, timeout
+        self._conn, self._pid = None, None
+
+    def _db(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _write(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def upsert_many(self, collection, docs, merge=False):
+        docs = list(docs)
+        t0 = time.perf_counter()
+        with self._write() as db:
+            if merge:
+                merged = []
+                for doc_id, data in docs:
+                    row = db.execute("SELECT data FROM documents WHERE collection = ? AND id = ?",
+                                     (collection, doc_id)).fetchone()
+                    merged.append((doc_id, {**(json.loads(row[0]) if row else {}), **data}))
+                docs = merged
+            db.executemany("INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+                           [(collection, doc_id, json.dumps(data, ensure_ascii=False, sort_keys=True))
+                            for doc_id, data in docs])
+        return _report("SQLite", "wrote", len(docs), collection, t0)
+
+    def delete_many(self, collection, doc_ids):
+        doc_ids = list(doc_ids)
+        t0 = time.perf_counter()
+        with self._write() as db:
+            db.executemany("DELETE FROM documents WHERE collection = ? AND id = ?",
+                           [(collection, doc_id) for doc_id in doc_ids])
+        return _report("SQLite", "deleted", len(doc_ids), collection, t0)
+
+    def list_ids(self, collection):
+        rows = self._db().execute("SELECT id FROM documents WHERE collection = ?", (collection,))
+        return {doc_id for doc_id, in rows}
+
+    def stream(self, collection, fields=None):
+        rows = self._db().execute("SELECT id, data FROM documents WHERE collection = ? ORDER BY id", (collection,))
+        for doc_id, data in rows.fetchall():
+            yield doc_id, _project(json.loads(data), fields)
+
+    def counts(self):
+        return dict(self._db().execute("SELECT collection, COUNT(*) FROM documents GROUP BY collection").fetchall())
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def __str__(self):
+        return f"sqlite:{self.path}"
+
+
+class JsonlSink:
+    """Lokale documentopslag als <map>/<collectie>.jsonl; handig om te diffen en in te lezen met andere tools."""
+
+    local = True
+    label, suffix = "JSONL", ".jsonl"
+
+    def __init__(self, directory=LOCAL_JSONL_DIR):
+        self.directory = directory
+
+    def _path(self, collection):
+        return os.path.join(self.directory, collection + self.suffix)
+
+    def _load(self, collection):
+        docs = {}
+        path = self._path(collection)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        docs[row["id"]] = row["data"]
+        return docs
+
+    def _save(self, collection, docs):
+        path = self._path(collection)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            self._dump(docs, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _dump(docs, f):
+        for doc_id in sorted(docs):
+            f.write(json.dumps({"id": doc_id, "data": docs[doc_id]}, ensure_ascii=False, sort_keys=True) + "\n")
+
+    def upsert_many(self, collection, docs, merge=False):
+        docs = list(docs)
+        t0 = time.perf_counter()
+        if docs:
+            current = self._load(collection)
+            for doc_id, data in docs:
+                current[doc_id] = {**current.get(doc_id, {}), **data} if merge else data
+            self._save(collection, current)
+        return _report(self.label, "wrote", len(docs), collection, t0)
+
+    def delete_many(self, collection, doc_ids):
+        doc_ids = list(doc_ids)
+        t0 = time.perf_counter()
+        if doc_ids:
+            current = self._load(collection)
+            for doc_id in doc_ids:
+                current.pop(doc_id, None)
+            self._save(collection, current)
+        return _report(self.label, "deleted", len(doc_ids), collection, t0)
+
+    def list_ids(self, collection):
+        return set(self._load(collection))
+
+    def stream(self, collection, fields=None):
+        for doc_id, doc in sorted(self._load(collection).items()):
+            yield doc_id, _project(doc, fields)
+
+    def counts(self):
+        if not os.path.isdir(self.directory):
+            return {}
+        names = [name[:-len(self.suffix)] for name in sorted(os.listdir(self.directory)) if name.endswith(self.suffix)]
+        return {name: len(self._load(name)) for name in names}
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return f"jsonl:{self.directory}"
+
+
+class JsonFileSink(JsonlSink):
+    """
+    Eén collectie als JSON-object {doc_id: document} (gesorteerd, ingesprongen) in één bestand: de uitvoer
+    van --sink local, die rdw_pricing.py en de mock direct inlezen. Met path is dat bestand de collectie
+    (de collectienaam staat dan alleen in meldingen); zonder path <map>/<collectie>.json.
+    """
+
+    label, suffix = "JSON", ".json"
+
+    def __init__(self, path=None, directory=LOCAL_JSON_DIR):
+        super().__init__(directory)
+        self.path = path
+
+    def _path(self, collection):
+        return self.path or super()._path(collection)
+
+    def _load(self, collection):
+        try:
+            with open(self._path(collection), "r", encoding="utf-8") as f:
+                docs = json.load(f)
+        except (OSError, ValueError):
+            return {}  # ontbrekend of onleesbaar bestand: leeg beginnen, wordt bij de volgende write vervangen
+        return docs if isinstance(docs, dict) else {}
+
+    @staticmethod
+    def _dump(docs, f):
+        json.dump(docs, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def counts(self):
+        if self.path:
+            return {os.path.splitext(os.path.basename(self.path))[0]: len(self._load(None))}
+        return super().counts()
+
+    def __str__(self):
+        return f"local:{self.path or self.directory}"
+
+
+def parse_sink(spec):
+    """Controleer een sink-spec ("firestore", "sqlite[:PAD]", "jsonl[:MAP]", "local[:BESTAND]"); argparse type."""
+    kind = spec.split(":", 1)[0]
+    if kind not in SINK_KINDS:
+        raise argparse.ArgumentTypeError(f"unknown sink {spec!r} "
+                                         f"(expected firestore, sqlite[:PATH], jsonl[:DIR] or local[:FILE])")
+    if kind == "firestore" and spec != "firestore":
+        raise argparse.ArgumentTypeError("the firestore sink takes no path (use FIRESTORE_EMULATOR_HOST for the emulator)")
+    return spec
+
+
+def open_sink(spec=DEFAULT_SINK, **firestore_options):
+    """Sink voor een spec; firestore_options (cred_path, mode, db) gaan alleen naar FirestoreSink."""
+    kind, _, path = parse_sink(spec).partition(":")
+    if kind == "sqlite":
+        return SQLiteSink(path or LOCAL_SQLITE_PATH)
+    if kind == "jsonl":
+        return JsonlSink(path or LOCAL_JSONL_DIR)
+    if kind == "local":
+        return JsonFileSink(path or None)
+    return FirestoreSink(**firestore_options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a local document sink (SQLite, JSONL or JSON)")
+    parser.add_argument("--sink", type=parse_sink, default="sqlite",
+                        help="sqlite[:PATH], jsonl[:DIR] or local[:FILE] (default sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Documents per collection")
+    p_export = sub.add_parser("export", help="Write one collection as JSONL ({id, data} per line)")
+    p_export.add_argument("collection")
+    p_export.add_argument("path")
+    args = parser.parse_args()
+    sink = open_sink(args.sink)
+    if not sink.local:
+        parser.error("use a local sink (sqlite, jsonl or local); Firestore has its own console")
+    if args.command == "stats":
+        counts = sink.counts()
+        for collection, n in sorted(counts.items()):
+            print(f"{collection}: {n} documents")
+        if not counts:
+            print(f"{sink}: empty")
+    else:
+        with open(args.path, "w", encoding="utf-8") as f:
+            n = 0
+            for doc_id, doc in sink.stream(args.collection):
+                f.write(json.dumps({"id": doc_id, "data": doc}, ensure_ascii=False, sort_keys=True) + "\n")
+                n += 1
+        print(f"Exported {n} documents from '{args.collection}' to {args.path}")
+    sink.close()
+
+
+if __name__ == "__main__":
+    main()
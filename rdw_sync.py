@@ -0,0 +1,107 @@
+"""
+Incrementele sync van RDW-datasets via het SODA-systeemveld `:updated_at`.
+
+Per (dataset, beheerder) een lokale kopie (rijen per `:id`) en een high-water mark (hoogste
+`:updated_at`). Een run haalt alleen rijen op met `:updated_at >= hwm` en voegt ze samen in de kopie.
+Inclusief de grens: rijen met dezelfde `:updated_at` als de hwm die pas na de vorige lezing zijn
+gecommit, worden zo niet overgeslagen. De opnieuw geleverde grensrijen komen via `:id` op dezelfde plek
+terecht en tellen alleen als gewijzigd als hun inhoud echt anders is.
+
+Beperking: SODA levert geen verwijderde rijen. Draai periodiek `--full-resync` om de lokale
+kopie opnieuw op te bouwen.
+
+Opslag: data/rdw_sync/<dataset>_<beheerder>.json en data/rdw_sync/_meta.json (vorige referentiedatum).
+sync() en save_meta() houden de nieuwe kopieën en marks in het geheugen; pas commit() schrijft ze, na
+een geslaagde upload. Een dry run of een run die eerder stopt (integriteitscheck, uploadfout) laat de
+vorige stand staan, zodat de volgende run dezelfde delta opnieuw ophaalt.
+"""
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "data", "rdw_sync")
+
+
+class SyncState:
+    """Lokale kopieën + high-water marks per (dataset, beheerder)."""
+
+    def __init__(self, directory=STATE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.last_reference_date = self._read(self._meta_path()).get("reference_date")
+        self.pending = {}  # pad -> inhoud, geschreven door commit()
+
+    def _meta_path(self):
+        return os.path.join(self.directory, "_meta.json")
+
+    def _path(self, dataset, mgr):
+        return os.path.join(self.directory, f"{dataset}_{mgr}.json")
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write(path, data):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, dataset, mgr):
+        data = self._read(self._path(dataset, mgr))
+        return data.get("hwm"), data.get("rows") or {}
+
+    def save(self, dataset, mgr, hwm, rows):
+        self.pending[self._path(dataset, mgr)] = {"hwm": hwm, "rows": rows}
+
+    def save_meta(self, reference_date):
+        self.pending[self._meta_path()] = {"reference_date": reference_date}
+
+    def commit(self):
+        """Vastgehouden kopieën en marks wegschrijven (elk bestand atomair; _meta.json als laatste)."""
+        meta = self.pending.pop(self._meta_path(), None)
+        for path, data in self.pending.items():
+            self._write(path, data)
+        if meta is not None:
+            self._write(self._meta_path(), meta)
+            self.last_reference_date = meta["reference_date"]
+        self.pending.clear()
+
+    def sync(self, engine, queries, full=False):
+        """
+        queries: [(dataset, url, mgr, params)] met params zonder beheerderfilter.
+        Retourneert (raw, changed): per dataset alle rijen uit de lokale kopie en de zojuist opgehaalde rijen.
+        Met full=True wordt de kopie vervangen door een volledige fetch. Niets wordt geschreven vóór commit().
+        """
+        tasks, states = [], []
+        for dataset, url, mgr, params in queries:
+            hwm, rows = (None, {}) if full else self.load(dataset, mgr)
+            q = {"areamanagerid": mgr, **params}
+            if q.get("$select"):  # zonder $select levert de reader `:*, *` (incl. :updated_at)
+                q["$select"] = ":updated_at, " + q["$select"]
+            if hwm:
+                since = f":updated_at >= '{hwm.rstrip('Z')}'"
+                q["$where"] = f"({q['$where']}) AND {since}" if q.get("$where") else since
+            tasks.append((dataset, url, q))
+            states.append((dataset, mgr, hwm, rows))
+
+        results = engine.fetch_all(tasks)
+
+        raw, changed = {}, {}
+        for (dataset, mgr, hwm, rows), fetched in zip(states, results):
+            fresh = []
+            for r in fetched:
+                if rows.get(r[":id"]) != r:  # grensrijen (:updated_at == hwm) komen elke run terug
+                    fresh.append(r)
+                rows[r[":id"]] = r
+                if r.get(":updated_at") and (hwm is None or r[":updated_at"] > hwm):
+                    hwm = r[":updated_at"]
+            self.save(dataset, mgr, hwm, rows)
+            raw.setdefault(dataset, []).extend(rows.values())
+            changed.setdefault(dataset, []).extend(fresh)
+        return raw, changed
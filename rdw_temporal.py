@@ -0,0 +1,114 @@
+"""
+Tijdsindex op de gedateerde RDW-datasets: per sleutel (bijv. (beheerder, tariefcode) of
+(beheerder, gebied, regeling)) de geldigheidsintervallen [startdatum, einddatum] gesorteerd op start,
+zodat "wat geldt op datum D" een bisect is i.p.v. een filter over alle rijen.
+
+Geldigheid is dezelfde als het $where-filter in fetch_rdw_data.validity_where: een rij geldt op D als
+start leeg is of <= D (bij datetime-kolommen: <= D 23:59:59) en eind leeg is of >= D (00:00:00).
+
+TemporalDatasets bundelt de indexen van alle datasets. as_of(D) geeft de getypeerde records die op D
+gelden (invoervolgorde behouden, zoals filter_valid), en epoch(D) nummert de perioden tussen
+opeenvolgende wijzigingsdatums: datums met dezelfde epoch geven exact dezelfde uitkomst, dus een batch
+datums (bijv. 31-12 en 01-01) kost maar één berekening per epoch.
+
+Gebruik:
+  temporal = TemporalDatasets(typed, {"fareparts": "date", "timeframes": "datetime", ...})
+  temporal.indexes["fareparts"].at(("363", "T1"), "20270101")   # tariefdelen op 1 januari, nieuwste eerst
+  typed_ny = temporal.as_of("20270101")
+"""
+import bisect
+
+# Sleutel per dataset voor TemporalIndex.at (de records zelf komen uit rdw_schema).
+INDEX_KEYS = {
+    "mapping": lambda r: (r.manager, r.area_id, r.regulation_id),
+    "timeframes": lambda r: (r.manager, r.regulation_id, r.day_name, r.start),
+    "fareparts": lambda r: (r.manager, r.fare_code),
+    "regulations": lambda r: (r.manager, r.regulation_id),
+    "calculations": lambda r: (r.manager, r.fare_code),
+}
+
+
+def date_bounds(date, kind="date"):
+    """YYYYMMDD -> (laagste, hoogste) vergelijkingswaarde voor kolommen van type kind."""
+    return (date + "000000", date + "235959") if kind == "datetime" else (date, date)
+
+
+def valid_on(start, end, date, kind="date", window_end=None):
+    """True als [start, end] (lege waarde = open) de datum (of het venster date..window_end) overlapt."""
+    lo = date_bounds(date, kind)[0]
+    hi = date_bounds(window_end or date, kind)[1]
+    return (not start or start <= hi) and (not end or end >= lo)
+
+
+class TemporalIndex:
+    """Geldigheidsintervallen van één dataset per sleutel, gesorteerd op startdatum."""
+
+    def __init__(self, records, key, kind="date"):
+        self.kind = kind
+        groups = {}
+        for seq, r in enumerate(records):
+            groups.setdefault(key(r), []).append((r.start_date or "", -seq, r))
+        self.starts, self.entries = {}, {}
+        for k, items in groups.items():
+            items.sort(key=lambda x: (x[0], x[1]))  # start oplopend; bij gelijke start de laatste rij eerst
+            self.starts[k] = [x[0] for x in items]
+            self.entries[k] = [(-neg_seq, r) for _, neg_seq, r in items]
+
+    def _valid(self, k, date):
+        """(seq, record) die op date gelden voor sleutel k, nieuwste start eerst (gelijke start: invoervolgorde)."""
+        starts = self.starts.get(k)
+        if not starts:
+            return []
+        lo, hi = date_bounds(date, self.kind)
+        pos = bisect.bisect_right(starts, hi)
+        return [e for e in reversed(self.entries[k][:pos]) if not e[1].end_date or e[1].end_date >= lo]
+
+    def at(self, k, date):
+        """Records voor sleutel k die op date gelden, nieuwste eerst."""
+        return [r for _, r in self._valid(k, date)]
+
+    def latest_at(self, k, date):
+        """Het nieuwste record voor sleutel k dat op date geldt (None als er geen is)."""
+        valid = self._valid(k, date)
+        return valid[0][1] if valid else None
+
+    def valid_at(self, date):
+        """Alle records die op date gelden, in oorspronkelijke invoervolgorde."""
+        hits = []
+        for k in self.starts:
+            hits.extend(self._valid(k, date))
+        hits.sort(key=lambda e: e[0])
+        return [r for _, r in hits]
+
+    def boundaries(self):
+        """Datums (YYYYMMDD-sorteerbaar) waarop de geldige set kan wijzigen: starts en de dag na elk einde."""
+        out = set()
+        for entries in self.entries.values():
+            for _, r in entries:
+                if r.start_date:
+                    out.add(r.start_date[:8])
+                if r.end_date:
+                    out.add(r.end_date[:8] + "\x00")  # sorteert direct na de einddag, vóór de dag erna
+        return out
+
+
+class TemporalDatasets:
+    """TemporalIndex per gedateerde dataset; ongedateerde datasets (gebieden) gaan ongewijzigd mee."""
+
+    def __init__(self, typed, kinds):
+        """typed: parse_datasets-uitvoer; kinds: {dataset: "date" | "datetime"} voor gedateerde datasets."""
+        self.typed = typed
+        self.indexes = {name: TemporalIndex(typed[name], INDEX_KEYS[name], kind) for name, kind in kinds.items()}
+        bounds = set()
+        for index in self.indexes.values():
+            bounds |= index.boundaries()
+        self.boundaries = sorted(bounds)
+
+    def epoch(self, date):
+        """Volgnummer van de periode waarin date valt; gelijke epoch = gelijke as_of-uitkomst."""
+        return bisect.bisect_right(self.boundaries, date)
+
+    def as_of(self, date):
+        """{dataset: [record]} met per gedateerde dataset alleen de records die op date gelden."""
+        return {name: self.indexes[name].valid_at(date) if name in self.indexes else records
+                for name, records in self.typed.items()}
@@ -0,0 +1,388 @@
+"""
+Vertaalstap voor tariefomschrijvingen (NL -> EN) als aparte pipeline-stage.
+
+Vertalingen zijn sjablonen, onafhankelijk van het uurtarief: bedragen ("0,20") en minuten ("30min") in
+de omschrijving worden placeholders ({a0}, {m0}, ...), en het model antwoordt met {rate} voor het
+uurtarief van het blok. Eén vertaling per omschrijvingspatroon dient zo alle zones en tarieven; invullen
+gebeurt lokaal (fill_template). Oude cache-entries "<omschrijving>|<uurtarief>" zet migrate_cache om.
+
+fetch_rdw_data.py verzamelt eerst alle patronen die niet in de cache staan; TranslationStage vertaalt die
+daarna in één keer:
+- dedup: elk patroon één keer, ongeacht hoeveel zones/blokken/tarieven het gebruiken
+- batching: meerdere omschrijvingen per prompt (genummerde regels in, genummerde regels uit)
+- concurrency: meerdere requests tegelijk (thread pool), begrensd door een token bucket (requests/min)
+- items die in het antwoord ontbreken of in een mislukte batch zaten, worden één keer los herhaald;
+  wat daarna nog ontbreekt krijgt de regex-fallback (niet gecached, volgende run opnieuw)
+- statistieken: cache-hitratio, aantal requests, latency-percentielen, mislukte items
+
+Het model is alles met generate_content(prompt) -> object met .text (google.generativeai of StubModel).
+Offline testen:
+  python rdw_translate.py --snapshot data/raw --latency 0.2 --concurrency 4 --batch-size 10
+"""
+import argparse
+import math
+import os
+import re
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_SIZE = int(os.environ.get("RDW_LLM_BATCH_SIZE", "10"))
+CONCURRENCY = int(os.environ.get("RDW_LLM_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.environ.get("RDW_LLM_RPM", "600"))
+
+_LINE_RE = re.compile(r"^\s*(\d+)\s*[|.:)]\s*(.+?)\s*$")
+# Bedragen (2 decimalen, komma of punt) en minuten (getal vóór "min") in een omschrijving.
+_NUMBER_RE = re.compile(r"(?<![\d,.])(\d+[,.]\d{2}(?!\d)|\d+(?=\s*min))")
+_MONEY_RE = re.compile(r"\d+\.\d{2}(?!\d)")
+TEMPLATE_PREFIX = "tpl:"
+
+
+def describe_template(text):
+    """
+    Omschrijving -> (patroon, waarden): bedragen worden {a0}, {a1}, ... (waarde met decimale punt),
+    minuten {m0}, {m1}, ...; overige accolades worden ge-escaped zodat het patroon een format-string is.
+    """
+    values, parts, pos = {}, [], 0
+    for m in _NUMBER_RE.finditer(text):
+        token = m.group(1)
+        kind = "a" if len(token) > 3 and token[-3] in ",." else "m"
+        name = f"{kind}{sum(1 for k in values if k[0] == kind)}"
+        values[name] = token.replace(",", ".")
+        parts.append(text[pos:m.start()].replace("{", "{{").replace("}", "}}"))
+        parts.append("{" + name + "}")
+        pos = m.end()
+    parts.append(text[pos:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts), values
+
+
+def template_key(pattern):
+    """Sleutel in de vertaalcache voor een omschrijvingspatroon."""
+    return TEMPLATE_PREFIX + pattern
+
+
+def legacy_cache_key(text, rate):
+    """Sleutel van de oude, tariefafhankelijke vertalingen (translation_cache.json)."""
+    return f"{text}|{rate}"
+
+
+def template_fields(template):
+    """Namen van de placeholders in template; None als het geen geldige (eenvoudige) format-string is."""
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError:
+        return None
+    fields = set()
+    for _, name, spec, conversion in parsed:
+        if name is None:
+            continue
+        if not name.isidentifier() or spec or conversion:
+            return None
+        fields.add(name)
+    return fields
+
+
+def valid_template(template, pattern):
+    """True als template alleen {rate} en de placeholders uit pattern gebruikt."""
+    fields = template_fields(template)
+    allowed = template_fields(pattern)
+    return fields is not None and allowed is not None and fields <= allowed | {"rate"}
+
+
+def fill_template(template, rate, values):
+    """Vul een vertaalsjabloon in voor een uurtarief en de waarden uit describe_template."""
+    return template.format(rate=f"{rate:.2f}", **values)
+
+
+def build_prompt(patterns):
+    """Eén prompt voor omschrijvingspatronen; antwoord: per item een regel '<nummer> | <Engels sjabloon>'."""
+    lines = "\n".join(f'{i} | "{pattern}"' for i, pattern in enumerate(patterns, 1))
+    return f"""
+    You are a helpful assistant for a parking app.
+    Translate each of the following Dutch parking tariff descriptions into a specific English format.
+
+    Each input line is: number | Dutch description. Amounts in the description are written as
+    placeholders {{a0}}, {{a1}}, ... (in euros) and minute counts as {{m0}}, {{m1}}, ...
+    The descriptions describe specific rules like "Start tariffs" (Stop & Shop) or "Step sizes".
+
+    Rules (write {{rate}} for the Current Hourly Rate; it is filled in later):
+    1. If the text mentions "stappen van X min" (steps of X min), output: "€ {{rate}}/h > payment per X minutes"
+    2. If the text mentions "Stop en Shop" or "eerste X min Y...", output: "€ [Price] for the first [X] minutes. € {{rate}} per hour after [X] minutes".
+       (Note: The 'after' price is always {{rate}}).
+    3. If the text is generic or just repeats the rate, output it simply as "€ {{rate}} per hour".
+    4. Keep the placeholders from the description where the rule uses them (e.g. X = {{m0}}, Price = {{a0}}).
+       Use no other placeholders and no other curly braces.
+    5. Keep it concise. No markdown, no explanations.
+
+    Output exactly one line per input, in the form: number | English text
+
+    Input:
+{lines}
+    Output:
+    """
+
+
+def parse_response(text, n_items):
+    """Antwoordtekst -> {index (0-based): vertaling} voor de regels die te herkennen zijn."""
+    out = {}
+    for line in (text or "").splitlines():
+        m = _LINE_RE.match(line)
+        if m and 1 <= int(m.group(1)) <= n_items:
+            out[int(m.group(1)) - 1] = m.group(2).replace('"', '').replace("'", "")
+    return out
+
+
+def fallback_translation(text, current_rate):
+    """Regex-fallback als het model geen (bruikbaar) antwoord gaf."""
+    if "stappen van" in text:
+        match = re.search(r"stappen van (\d+) min", text)
+        if match:
+            mins = match.group(1)
+            return f"€ {current_rate:.2f}/h > payment per {mins} minutes"
+    if "Stop en Shop" in text:
+        match = re.search(r"eerste (\d+)min ([\d,]+)", text)
+        if match:
+            mins = match.group(1)
+            price = match.group(2).replace(',', '.')
+            return f"€ {price} for the first {mins} minutes. € {current_rate:.2f} per hour after {mins} minutes"
+    return text
+
+
+def migrate_cache(cache):
+    """
+    Zet oude entries "<omschrijving>|<uurtarief>" om naar sjablonen (in place; oude entries blijven staan).
+    Per oude vertaling worden getallen die gelijk zijn aan het tarief {rate} en getallen die gelijk zijn
+    aan een bedrag/minuten uit de omschrijving de bijbehorende placeholder. Een entry is dubbelzinnig als
+    het tarief of een waarde op meer dan één manier past (bijv. tarief == bedrag), of als er een ander
+    bedrag in de vertaling staat (afgeleid, bijv. "50% korting"); een sjabloon wordt alleen overgenomen
+    als het alle oude entries van hetzelfde patroon exact reproduceert.
+    Retourneert {"converted": n, "ambiguous": n, "conflicting": n} (aantallen patronen).
+    """
+    groups = {}
+    for key, value in cache.items():
+        if key.startswith(TEMPLATE_PREFIX) or "|" not in key:
+            continue
+        text, rate = key.rsplit("|", 1)
+        try:
+            rate = float(rate)
+        except ValueError:
+            continue
+        pattern, values = describe_template(text)
+        groups.setdefault(pattern, []).append((rate, values, value))
+
+    stats = {"converted": 0, "ambiguous": 0, "conflicting": 0}
+    templates = {}
+    for pattern, entries in groups.items():
+        if cache.get(template_key(pattern)) is not None:
+            continue
+        candidates = [c for c in (_legacy_template(*e) for e in entries) if c is not None]
+        if not candidates:
+            stats["ambiguous"] += 1
+            continue
+        for template in candidates:
+            if all(fill_template(template, rate, values) == value for rate, values, value in entries):
+                templates[template_key(pattern)] = template
+                stats["converted"] += 1
+                break
+        else:
+            stats["conflicting"] += 1
+    cache.update(templates)
+    return stats
+
+
+def _legacy_template(rate, values, translation):
+    """Sjabloon voor één oude vertaling, of None als dat niet eenduidig kan (zie migrate_cache)."""
+    rate_str = f"{rate:.2f}"
+    by_value = {}
+    for name, value in values.items():
+        by_value.setdefault(value, []).append(name)
+    if rate_str in by_value or any(len(names) > 1 for names in by_value.values()):
+        return None
+    parts, pos, rate_seen = [], 0, 0
+    for m in re.finditer(r"\d+(?:\.\d+)?", translation):
+        token = m.group(0)
+        if token == rate_str:
+            rate_seen += 1
+            name = "rate"
+        elif token in by_value:
+            name = by_value[token][0]
+        elif _MONEY_RE.fullmatch(token):
+            return None  # bedrag dat niet uit tarief of omschrijving komt
+        else:
+            continue
+        parts.append(translation[pos:m.start()].replace("{", "{{").replace("}", "}}"))
+        parts.append("{" + name + "}")
+        pos = m.end()
+    if rate_seen > 1:
+        return None
+    parts.append(translation[pos:].replace("{", "{{").replace("}", "}}"))
+    template = "".join(parts)
+    return template if fill_template(template, rate, values) == translation else None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentiel van een gesorteerde lijst (0.0 als leeg)."""
+    if not sorted_values:
+        return 0.0
+    k = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per seconde, maximaal `capacity` opgespaard."""
+
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blokkeer tot er een token is en neem het."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class StubModel:
+    """
+    Offline model met de interface van genai.GenerativeModel: beantwoordt het batchformaat van
+    build_prompt met translate(patroon) -> sjabloon per regel, na `latency` seconden. fail_every=N laat
+    elke N-de request mislukken (exception) om de retry/fallback te testen.
+    """
+
+    _INPUT_RE = re.compile(r'^\s*(\d+) \| "(.*)"\s*$')
+
+    def __init__(self, translate=None, latency=0.0, fail_every=0):
+        self.translate = translate or (lambda pattern: f"€ {{rate}} per hour ({pattern})")
+        self.latency, self.fail_every = latency, fail_every
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.requests += 1
+            n = self.requests
+        time.sleep(self.latency)
+        if self.fail_every and n % self.fail_every == 0:
+            raise RuntimeError("stub model: simulated failure")
+        lines = []
+        for line in prompt.splitlines():
+            m = self._INPUT_RE.match(line)
+            if m:
+                lines.append(f"{m.group(1)} | {self.translate(m.group(2))}")
+
+        class Response:
+            text = "\n".join(lines)
+        return Response()
+
+
+class TranslationStage:
+    """Vertaal alle ontbrekende patronen in batches, concurrent en rate-limited; vult `cache` in place."""
+
+    def __init__(self, model, cache, batch_size=BATCH_SIZE, concurrency=CONCURRENCY,
+                 requests_per_minute=REQUESTS_PER_MINUTE):
+        self.model, self.cache = model, cache
+        self.batch_size, self.concurrency = max(1, batch_size), max(1, concurrency)
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=self.concurrency)
+        self.latencies = []
+        self.requests = 0
+        self.failed_requests = 0
+        self.lock = threading.Lock()
+
+    def _request(self, items):
+        """Eén prompt voor items; retourneert {index: vertaling} (leeg bij een fout)."""
+        self.bucket.acquire()
+        t0 = time.perf_counter()
+        try:
+            response = self.model.generate_content(build_prompt(items))
+            result = parse_response(response.text, len(items))
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            result = None
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - t0)
+            if result is None:
+                self.failed_requests += 1
+        return result or {}
+
+    def _run_batches(self, items, batch_size):
+        """Vertaal items in batches; retourneert de items zonder vertaling."""
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        missing = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for batch, result in zip(batches, pool.map(self._request, batches)):
+                done = {}
+                for i, pattern in enumerate(batch):
+                    if i in result and valid_template(result[i], pattern):
+                        done[template_key(pattern)] = result[i]
+                    else:
+                        missing.append(pattern)
+                self.cache.update(done)  # één schrijfactie per batch (dict of TranslationStore)
+        return missing
+
+    def run(self, patterns, lookups=0, hits=0, rules=0):
+        """
+        patterns: omschrijvingspatronen (describe_template) zonder regel of cache-entry (dubbels
+        toegestaan); lookups/hits/rules: lookups, cache-hits en regel-vertalingen uit de verzamelfase, voor
+        de hitratio. Retourneert de
+        statistieken als dict en print een samenvatting. Antwoorden met onbekende placeholders tellen als
+        ontbrekend.
+        """
+        t0 = time.perf_counter()
+        todo = [p for p in dict.fromkeys(patterns) if template_key(p) not in self.cache]
+        missing = self._run_batches(todo, self.batch_size) if todo else []
+        retried = len(missing)
+        if missing and self.batch_size > 1:
+            missing = self._run_batches(missing, 1)
+        lat = sorted(self.latencies)
+        stats = {
+            "lookups": lookups, "rules": rules, "hits": hits, "distinct_misses": len(todo),
+            "requests": self.requests,
+            "failed_requests": self.failed_requests, "retried": retried, "fallback": len(missing),
+            "p50": percentile(lat, 50), "p90": percentile(lat, 90), "p99": percentile(lat, 99),
+            "wall": time.perf_counter() - t0,
+        }
+        ratio = f"{(rules + hits) / lookups:.0%}" if lookups else "n/a"
+        print(f"Translation: {lookups} lookups, {rules} by rules, {hits} cache hits ({ratio} without LLM); "
+              f"{len(todo)} distinct misses in "
+              f"{self.requests} requests ({self.failed_requests} failed, {retried} items retried, "
+              f"{len(missing)} fallback); latency p50 {stats['p50']:.2f}s p90 {stats['p90']:.2f}s "
+              f"p99 {stats['p99']:.2f}s; wall {stats['wall']:.2f}s")
+        return stats
+
+
+def main():
+    import json
+    from rdw_columnar import snapshot_records
+    parser = argparse.ArgumentParser(description="Run the translation stage offline against a stub model")
+    parser.add_argument("--snapshot", default="data/raw", help="Directory with tariefberekening (JSON or columnar)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub latency per request in seconds")
+    parser.add_argument("--fail-every", type=int, default=0, help="Let every N-th stub request fail")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=6000, help="Requests per minute (token bucket)")
+    parser.add_argument("--limit", type=int, default=500, help="Max. descriptions to translate")
+    args = parser.parse_args()
+    calculations = snapshot_records(args.snapshot, "tariefberekening", "calculations") or []
+    texts = list(dict.fromkeys(c.desc for c in calculations if c.desc))
+    patterns = [describe_template(t)[0] for t in texts[:args.limit]]
+    cache = {}
+    stage = TranslationStage(StubModel(latency=args.latency, fail_every=args.fail_every), cache,
+                             args.batch_size, args.concurrency, args.rpm)
+    stage.run(patterns, lookups=len(patterns))
+    print(f"{len(texts[:args.limit])} descriptions -> {len(set(patterns))} patterns")
+    print(json.dumps(dict(list(cache.items())[:3]), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
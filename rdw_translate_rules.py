@@ -0,0 +1,246 @@
+"""
+Regelgebaseerde vertaling van tariefomschrijvingen (eerste laag vóór cache en LLM).
+
+Werkt op omschrijvingspatronen uit rdw_translate.describe_template (bedragen {a0}, {a1}, ..., minuten
+{m0}, {m1}, ...) en geeft een sjabloon in hetzelfde formaat als het LLM ({rate} = uurtarief van het
+blok), of None als geen regel past. Regels zijn deterministisch en worden niet gecached: een aangepaste
+regel geldt direct bij de volgende run. Alleen patronen zonder passende regel gaan naar het LLM.
+
+Volgorde: eerst de hele omschrijving; past niets, dan nogmaals zonder toevoeging achteraan
+(" - Binnenstad", " (groen)", ", laagtarief"), zoals het LLM die ook negeert. Een toevoeging als
+" (niet in gebruik)" wordt niet weggelaten; zulke tarieven en "NULL"/"Verwijderen" krijgen geen regel.
+
+Dekking tegen een snapshot:
+  python rdw_translate_rules.py --snapshot data/raw --top 25
+"""
+import argparse
+import re
+from collections import Counter
+from functools import lru_cache
+
+_A = r"(?:€|e|eur)?\s*(?P<a>\{a\d+\})(?:\s*(?:euro|eur|,-))?"
+_A2 = _A.replace("?P<a>", "?P<a2>")
+_M = r"(?P<m>\{m\d+\})\s*(?:min(?:uten|uut|\.)?|m)"
+_M2 = _M.replace("?P<m>", "?P<m2>")
+# naam voor een bedrag: "Uurtarief {a0}", "Dagparkeren {a0}/u"
+_NAME = r"(?:(?:(?:uur|kort|straat|garage)?tarief|(?:dag|kort|garage |straat)?parkeren|p\+r,?)\s*)?"
+_HOUR = r"(?:per uur|p/u|p/uur|p\.u\.|/uur|/u|per 60 min(?:uten|\.)?)"
+_PART = r"(?:\s*(?:,|of)?\s*(?:een |het )?(?:gedee?lte|deel) (?:hiervan|daarvan|ervan))?"
+_STEPS = r"(?:te betalen )?in (?:stappen|stapgroottes|stapgrootte) van " + _M
+
+HOURLY = "€ {rate} per hour"
+STEPPED = "€ {rate}/h > payment per {m} minutes"
+PER_STEP = "€ {a} per {m} minutes"
+FREE = "Free parking"
+
+
+def _first_free(m):
+    """'eerste half uur / uur / N uur / X min gratis' -> aantal minuten (placeholder of getal)."""
+    if m.group("m"):
+        return m.group("m")
+    if m.group("half"):
+        return "30"
+    return str(60 * int(m.group("hours") or 1))
+
+
+def _free_then(m):
+    minutes = _first_free(m)
+    if m.groupdict().get("m2"):
+        return f"€ 0.00 for the first {minutes} minutes. € {{rate}}/h > payment per {m.group('m2')} minutes"
+    return f"€ 0.00 for the first {minutes} minutes. € {{rate}} per hour after {minutes} minutes"
+
+
+def _hourly_steps(m):
+    """'X per uur, te betalen in stappen van Y min': het genoemde uurtarief, anders {rate}."""
+    return f"€ {m.group('a')}/h > payment per {m.group('m')} minutes" if m.group("a") else \
+        STEPPED.replace("{m}", m.group("m"))
+
+
+def _max_hours(m):
+    n = int(m.group("n"))
+    return f"{HOURLY}, max. {n} hour{'s' if n != 1 else ''}"
+
+
+def _day_ticket(m):
+    return f"Day ticket € {m.group('a')}" if m.group("a") else "Day ticket"
+
+
+def _night_rate(m):
+    text = m.group(0).lower()
+    label = "Evening and night rate" if "avond- en" in text else "Evening rate" if text.startswith("avond") \
+        else "Night rate"
+    return f"{label} € {m.group('a')}"
+
+
+_FIRST_FREE = r"(?:de )?(?:eerste|1e) (?:(?P<half>half uur)|(?:(?P<hours>\d+) )?uur|" + _M + r") gratis"
+_MAX = r"max(?:\.|imaal|imum)?"
+# losse 0 / 00 als tarief(code), niet in "0,5 uur" of "10:00"
+_ZERO = r"(?<![\w:,.])0+\b(?![,.:]\d)"
+# tarief niet (meer) in gebruik: geen uurtarief verzinnen
+_UNUSED = r"\bnull\b|verwijder|overbodig|niet (?:meer )?in gebruik|niet gebruiken|\bn\.?v\.?t\b"
+
+# (regex op het genormaliseerde patroon, sjabloon of functie(match) -> sjabloon). Volgorde telt; in een
+# sjabloon worden {a}, {a2}, {m} en {m2} vervangen door de placeholder uit het patroon.
+RULES = [
+    # gratis
+    (r"(?:gratis|vrij)(?: parkeren)?(?: 24/7| 24 uur)?|(?:nul|0) ?tarief.*|null tarief"
+     r"|tarief(?:code)? (?:0+(?: euro)?|nul)|geen betaald parkeren", FREE),
+    (r"(?:algemeen erkende )?feestdag(?:en)?,? gratis(?: parkeren)?|gratis parkeren op feestdagen",
+     "Free parking on public holidays"),
+    (r"koopzondag(?:en)?,? gratis(?: parkeren)?", "Free parking on shopping Sundays"),
+    (r"koopzondag(?:en)? (?:of|en) feestdag(?:en)?,? gratis(?: parkeren)?",
+     "Free parking on shopping Sundays and public holidays"),
+    (r"blauwe zone(?:\W.*)?", "Blue zone (free with parking disc)"),
+    (r"carpool,? gratis parkeren", "Carpool, free parking"),
+    (r"vrij parkeren toegestaan|[^{},]+, gratis(?: parkeren)?", FREE),
+    (r"carpool ?(?:parkeren|plaats(?:en)?)?", "Carpool parking"),
+    (r"vergunning(?:parkeren| parkeren)?|vergunninghouders", "Permit parking"),
+    (r"bezoekersregeling", "Visitor parking scheme"),
+    # eerst gratis, daarna betalen
+    (_FIRST_FREE + r",? daarna " + _A + r" " + _HOUR, _free_then),
+    (_FIRST_FREE + r",? daarna " + _A + r" per " + _M2 + _PART, _free_then),
+    (_FIRST_FREE + r",? daarna " + _A + r" " + _HOUR + r",? " + _STEPS.replace("?P<m>", "?P<m2>"), _free_then),
+    (_A + r" " + _HOUR + r",? " + _FIRST_FREE, _free_then),
+    (r"(?:eerste|1e) uur " + _A + r",? (?:daarna|vanaf (?:het )?2e uur) " + _A2 + r" " + _HOUR,
+     "€ {a} for the first 60 minutes. € {rate} per hour after 60 minutes"),
+    # stop en shop / startbedrag
+    (r"(?:stop (?:en|&) (?:shop|sport)[:,]? )?(?:de )?eerste " + _M + r",? " + _A + r"(?:,? daarna .*)?",
+     "€ {a} for the first {m} minutes. € {rate} per hour after {m} minutes"),
+    # stapgrootte: een genoemd bedrag per stap blijft dat bedrag ("12,00 euro/1440 min" is geen uurtarief)
+    (_A + r"(?: ct| cent)? per " + _M + _PART, PER_STEP),
+    (r"(?:garage|terrein|straat|dag|kort)?(?:tarief|parkeren) \(?" + _A + r"\s*(?:per|/)\s*" + _M + r"\)?" + _PART, PER_STEP),
+    (r"(?:" + _A + r" " + _HOUR + r",? )?" + _STEPS + r"(?:,? .*)?", _hourly_steps),
+    (r".*(?:stappen|stapgroottes|stapgrootte) van " + _M + r".*", STEPPED),
+    # uurtarief
+    (_NAME + _A + r" ?" + _HOUR + r",? max(?:\.|imaal)? (?P<n>\d+) uur", _max_hours),
+    (_NAME + _A + r" ?" + _HOUR + r",? max(?:\.|imaal)? " + _M, HOURLY + ", max. {m} minutes"),
+    (_A + r" " + _HOUR + r" \(?betalen per minuut\)?", HOURLY + " (pay per minute)"),
+    (_A + r" per minuut", HOURLY + " (pay per minute)"),
+    (_A + r" " + _HOUR + r"[:,]? (?:minimaal tarief|minimale inworp|minimum) " + _A2,
+     HOURLY + ", minimum € {a2}"),
+    (_A + r" " + _HOUR + r",? max(?:\.|imaal)? " + _A2 + r"(?: per dag)?", HOURLY + ", max. € {a2} per day"),
+    (r"maximale parkeerduur (?P<n>\d+) uur", _max_hours),
+    (_A + r" " + _HOUR + r",? (?:aflopend|oplopend|progressief) tarief", HOURLY),
+    (_NAME + _A + r"(?:\s*" + _HOUR + r")?", HOURLY),
+    # dag-, week-, avond- en nachtkaarten
+    (r"(?:dagkaart|dagtarief|dagticket)(?: " + _A + r")?(?: per dag)?(?: \(dagkaart\))?", _day_ticket),
+    (r"(?:dagkaart|dagtarief) (?:eu|€)?(?P<n>\d+) ?(?:euro|e|,-)", lambda m: f"Day ticket € {m.group('n')}"),
+    (r"dagkaart 24 ?u(?:ur)? " + _A, "Day ticket (24 hours) € {a}"),
+    (r"dagkaart [^{}]*", "Day ticket"),
+    (r"weekkaart [^{}]*", "Week ticket"),
+    (_A + r" (?:per dag|dagkaart|per dag dagkaart)", "€ {a} per day"),
+    (_MAX + r" ?(?:dag|etmaal)?tarief(?: per dag)? " + _A, "Max. € {a} per day"),
+    (_MAX + r" ?tarief per 24 ?u(?:ur)? " + _A, "Max. € {a} per 24 hours"),
+    (_A + r" per 24 ?u(?:ur)?", "€ {a} per 24 hours"),
+    (_A + r" per (?P<n>\d+) uur", lambda m: f"€ {m.group('a')} per {m.group('n')} hours"),
+    (_MAX + r" tarief tot einde dag " + _A, "Max. € {a} until end of day"),
+    (r"weekkaart " + _A, "Week ticket € {a}"),
+    (r"avondkaart " + _A, "Evening ticket € {a}"),
+    (r"nachtkaart " + _A, "Night ticket € {a}"),
+    (r"(?:avond- en nacht|avond|nacht)tarief " + _A + r"(?: per (?:parkering|avond|nacht))?", _night_rate),
+    # gratis ergens in een omschrijving zonder bedragen ("Tarief - Gratis parkeren", "Tariefcode 00 (gratis)"),
+    # behalve een gratis begin ("eerste uur gratis") of een opmerking voor de beheerder
+    (r"(?![^{}]*(?:eerste|\b[12]e\b|kwartier|incl|niet gebruiken))[^{}]*\b(?:gratis|nul-?tarief|(?:nul|0) tarief)\b"
+     r"[^{}]*", FREE),
+    # algemene namen van tarieven/gebieden: zoals het LLM, alleen het uurtarief. Niet voor gratis/0-tarieven,
+    # omschrijvingen met een bedrag ("Tarief deelauto's {a0} p/u") of tarieven die niet (meer) in gebruik
+    # zijn ("NULL", "Verwijderen", "Tarief niet in gebruik"): die gaan naar het LLM.
+    (r"(?!.*(?:\b(?:gratis|null?|nultarief)\b|" + _ZERO + r"|" + _UNUSED + r"))"
+     r"(?:(?:uur|kort|lang|dag|basis|regulier|garage|straat|terrein|parkeer|kortparkeer)?tarief(?:code)?"
+     r"|(?:kort|lang|dag|straat|terrein|garage ?)?parkeren|runshop tariefzone|centrum|binnenstad)(?: [^{}]*)?",
+     HOURLY),
+    (r"(?![^{}]*(?:korting|gratis|eerste|1e |nultarief|" + _ZERO + r"|" + _UNUSED + r"))[^{}]*tarief[^{}]*"
+     r"|24 uur per dag", HOURLY),
+]
+_COMPILED = [(re.compile(regex, re.IGNORECASE), template) for regex, template in RULES]
+_SUFFIX_RE = re.compile(r"\s*(?:\s-\s.*|\([^()]*\)|,\s*\w*tarief)\s*$", re.IGNORECASE)
+_UNUSED_RE = re.compile(_UNUSED, re.IGNORECASE)
+
+
+_PR_RE = re.compile(r"p ?\+ ?r(?:-terrein)?[,:]? (?=\S)", re.IGNORECASE)
+
+
+def _normalize(pattern):
+    return re.sub(r"\s+", " ", pattern).strip().rstrip(".").strip()
+
+
+def _apply(text):
+    for regex, template in _COMPILED:
+        m = regex.fullmatch(text)
+        if m is None:
+            continue
+        if callable(template):
+            return template(m)
+        for name in ("a", "a2", "m", "m2"):
+            template = template.replace("{" + name + "}", m.groupdict().get(name) or "{" + name + "}")
+        return template
+    return None
+
+
+@lru_cache(maxsize=None)
+def rule_template(pattern):
+    """Sjabloon voor een omschrijvingspatroon volgens de regels, of None (dan cache/LLM)."""
+    text = _normalize(pattern)
+    if not text:
+        return None
+    prefix = _PR_RE.match(text)
+    if prefix:
+        rest = rule_template(text[prefix.end():])
+        return None if rest is None else "P+R, " + rest[:1].lower() + rest[1:]
+    template = _apply(text)
+    while template is None:
+        stripped = _SUFFIX_RE.sub("", text)
+        if stripped == text or not stripped or _UNUSED_RE.search(text[len(stripped):]):
+            break  # "Basistarief (niet in gebruik)" is geen Basistarief
+        text = _normalize(stripped)
+        template = _apply(text)
+    return template
+
+
+def coverage(descriptions):
+    """Counter met 'rows', 'rule_rows', 'patterns', 'rule_patterns' en de niet gedekte patronen per aantal."""
+    from rdw_translate import describe_template, valid_template
+    rows = Counter()
+    for text in descriptions:
+        if text:
+            rows[describe_template(text)[0]] += 1
+    uncovered = Counter()
+    stats = Counter(rows=sum(rows.values()), patterns=len(rows))
+    for pattern, n in rows.items():
+        template = rule_template(pattern)
+        if template is None:
+            uncovered[pattern] = n
+            continue
+        if not valid_template(template, pattern):
+            raise ValueError(f"rule gives an invalid template for {pattern!r}: {template!r}")
+        stats["rule_rows"] += n
+        stats["rule_patterns"] += 1
+    return stats, uncovered
+
+
+def main():
+    from rdw_columnar import snapshot_records
+    parser = argparse.ArgumentParser(description="Coverage of the rule-based translator on tariefberekening")
+    parser.add_argument("--snapshot", default="data/raw", help="Directory with tariefberekening (JSON or columnar)")
+    parser.add_argument("--top", type=int, default=25, help="Show the N most frequent uncovered patterns")
+    parser.add_argument("--show", action="store_true", help="Print every covered pattern with its template")
+    args = parser.parse_args()
+    calculations = snapshot_records(args.snapshot, "tariefberekening", "calculations") or []
+    texts = [c.desc for c in calculations]
+    stats, uncovered = coverage(texts)
+    if args.show:
+        from rdw_translate import describe_template
+        for pattern in sorted({describe_template(t)[0] for t in texts if t}):
+            if rule_template(pattern) is not None:
+                print(f"{pattern!r} -> {rule_template(pattern)!r}")
+    print(f"Rules cover {stats['rule_rows']}/{stats['rows']} descriptions "
+          f"({stats['rule_rows'] / max(1, stats['rows']):.1%}) and {stats['rule_patterns']}/{stats['patterns']} "
+          f"distinct patterns ({stats['rule_patterns'] / max(1, stats['patterns']):.1%}).")
+    if uncovered and args.top:
+        print(f"Most frequent uncovered patterns ({len(uncovered)} in total, these go to the LLM):")
+        for pattern, n in uncovered.most_common(args.top):
+            print(f"  {n:5d}  {pattern}")
+
+
+if __name__ == "__main__":
+    main()
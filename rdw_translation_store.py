@@ -0,0 +1,204 @@
+"""
+Vertaalcache als SQLite-database in WAL-modus (vervangt het herschrijven van translation_cache.json).
+
+- opzoeken per sleutel via de primary key (O(1)-achtig, B-tree); niets wordt bij import of openen geladen
+- schrijven in één transactie per batch (BEGIN IMMEDIATE: de schrijflock wordt direct genomen, andere
+  schrijvers wachten tot `timeout` i.p.v. elkaars werk te overschrijven); lezers blokkeren niet (WAL)
+- meerdere processen tegelijk (pipeline, process-pool workers, losse scripts) is veilig: elk proces
+  opent zijn eigen verbinding (ook na fork)
+- compactie (WAL checkpoint + VACUUM) hooguit eens per COMPACT_INTERVAL_DAYS, bij close()
+- eenmalige import van het bestaande translation_cache.json; export terug naar JSON kan altijd
+
+Sleutels: "tpl:<omschrijvingspatroon>" -> sjabloon (rdw_translate.template_key); oude entries
+"<omschrijving>|<uurtarief>" uit translation_cache.json blijven staan en worden eenmalig omgezet.
+
+Gebruik (vanuit projectroot):
+  python rdw_translation_store.py stats
+  python rdw_translation_store.py import translation_cache.json
+  python rdw_translation_store.py export /tmp/translation_cache.json
+  python rdw_translation_store.py compact
+  python rdw_translation_store.py migrate     # oude entries -> sjablonen (rdw_translate.migrate_cache)
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DEFAULT_PATH = os.environ.get("RDW_TRANSLATION_DB", os.path.join(".cache", "translations.sqlite3"))
+COMPACT_INTERVAL_DAYS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class TranslationStore:
+    """Dict-achtige vertaalcache (get, in, [], update, len) op SQLite; verbinding per proces, lazy."""
+
+    def __init__(self, path=DEFAULT_PATH, timeout=30.0):
+        self.path, self.timeout = path, timeout
+        self._conn, self._pid = None, None
+        self._hits = {}  # gelezen waarden van dit proces (vertalingen wijzigen niet binnen een run)
+
+    def __getstate__(self):
+        return {"path": self.path, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _db(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid, self._hits = conn, os.getpid(), {}
+        return self._conn
+
+    @contextmanager
+    def _write(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    # --- dict-interface ---
+
+    def get(self, key, default=None):
+        if key in self._hits:
+            return self._hits[key]
+        row = self._db().execute("SELECT value FROM translations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        self._hits[key] = row[0]
+        return row[0]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, items):
+        """Schrijf {sleutel: vertaling} in één transactie."""
+        items = dict(items)
+        if not items:
+            return
+        now = time.time()
+        with self._write() as db:
+            db.executemany("INSERT OR REPLACE INTO translations (key, value, updated_at) VALUES (?, ?, ?)",
+                           [(k, v, now) for k, v in items.items()])
+        self._hits.update(items)
+
+    def __len__(self):
+        return self._db().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def items(self):
+        return self._db().execute("SELECT key, value FROM translations ORDER BY key").fetchall()
+
+    # --- beheer ---
+
+    def meta(self, key, default=None):
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._write() as db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def import_json(self, path):
+        """Neem sleutels uit een translation_cache.json over die nog niet in de store staan; retourneert het aantal."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        now = time.time()
+        with self._write() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO translations (key, value, updated_at) VALUES (?, ?, ?)",
+                           [(k, v, now) for k, v in data.items() if isinstance(v, str)])
+            added = db.total_changes - before
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_json', ?)", (os.path.abspath(path),))
+        return added
+
+    def import_json_once(self, path):
+        """Eenmalige migratie: importeer path alleen als er nog nooit een JSON is geïmporteerd."""
+        if not os.path.exists(path) or self.meta("imported_json") is not None:
+            return 0
+        return self.import_json(path)
+
+    def export_json(self, path):
+        """Schrijf de hele store als JSON (zelfde formaat als translation_cache.json)."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(dict(self.items()), f, ensure_ascii=False, indent=2)
+
+    def compact(self):
+        """WAL terugschrijven en afkappen, daarna VACUUM."""
+        db = self._db()
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        db.execute("VACUUM")
+        self.set_meta("last_compaction", time.time())
+
+    def maybe_compact(self, interval_days=COMPACT_INTERVAL_DAYS):
+        """Compacteer als de vorige compactie langer dan interval_days geleden is (of nooit)."""
+        last = float(self.meta("last_compaction", 0))
+        if time.time() - last >= interval_days * 86400:
+            self.compact()
+            return True
+        return False
+
+    def close(self, compact=True):
+        if self._conn is not None and self._pid == os.getpid():
+            if compact:
+                self.maybe_compact()
+            self._conn.close()
+        self._conn, self._pid, self._hits = None, None, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite translation cache")
+    parser.add_argument("--db", default=DEFAULT_PATH, help=f"Database path (default {DEFAULT_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Number of entries and file sizes")
+    p = sub.add_parser("import", help="Import a translation_cache.json (existing keys are kept)")
+    p.add_argument("json_path")
+    p = sub.add_parser("export", help="Export all entries to a JSON file")
+    p.add_argument("json_path")
+    sub.add_parser("compact", help="Checkpoint the WAL and VACUUM")
+    sub.add_parser("migrate", help="Convert legacy '<text>|<rate>' entries to rate-independent templates")
+    args = parser.parse_args()
+
+    store = TranslationStore(args.db)
+    if args.command == "import":
+        print(f"Imported {store.import_json(args.json_path)} new entries into {args.db}")
+    elif args.command == "export":
+        store.export_json(args.json_path)
+        print(f"Exported {len(store)} entries to {args.json_path}")
+    elif args.command == "compact":
+        store.compact()
+        print(f"Compacted {args.db}")
+    elif args.command == "migrate":
+        from rdw_translate import migrate_cache
+        stats = migrate_cache(store)
+        store.set_meta("templates_migrated", stats["converted"])
+        print(f"Templates: {stats['converted']} converted, {stats['ambiguous']} ambiguous, "
+              f"{stats['conflicting']} conflicting")
+    sizes = {suffix: os.path.getsize(args.db + suffix) for suffix in ("", "-wal") if os.path.exists(args.db + suffix)}
+    print(f"{len(store)} entries; " + ", ".join(f"{args.db}{s or ''}: {n / 1024:.0f} KB" for s, n in sizes.items()))
+    store.close(compact=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Firestore-upload van documenten in batches i.p.v. één synchrone set() per document.
+
+- mode "batch": WriteBatches van maximaal 500 operaties (Firestore-limiet), `concurrency` batches
+  tegelijk in de lucht (thread pool); een batch die faalt op contention of een tijdelijke fout (ABORTED,
+  UNAVAILABLE, RESOURCE_EXHAUSTED, DEADLINE_EXCEEDED, INTERNAL) wordt met exponentiële backoff + jitter
+  opnieuw gecommit (een batch is atomair, dus opnieuw schrijven is veilig)
+- mode "bulk": de BulkWriter van de Admin SDK (eigen batching, parallel, ramp-up tot max_ops_per_second);
+  mislukte writes worden tot `retries` keer herhaald
+- mode "single": het oude gedrag (één set() per document), alleen als referentie voor benchmarks
+
+Na afloop print upload_documents het aantal documenten per seconde. delete_documents verwijdert in
+dezelfde batches; list_document_ids haalt alleen de document-ID's op (projectie op __name__).
+
+Emulator: zet FIRESTORE_EMULATOR_HOST (bijv. localhost:8080); firestore_client() gebruikt dan geen
+service-account. Benchmark tegen de emulator:
+  firebase emulators:start --only firestore
+  python rdw_upload.py --emulator localhost:8080 --zones data/processed/zones.json --repeat 10 --mode batch
+Zelfde benchmark tegen een lokale backend (rdw_sink.py) ter vergelijking:
+  python rdw_upload.py --sink sqlite:/tmp/bench.sqlite3 --repeat 10
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_SIZE = 500  # Firestore: maximaal 500 operaties per batch/commit
+UPLOAD_BATCH_SIZE = min(MAX_BATCH_SIZE, int(os.environ.get("RDW_UPLOAD_BATCH_SIZE", str(MAX_BATCH_SIZE))))
+UPLOAD_CONCURRENCY = int(os.environ.get("RDW_UPLOAD_CONCURRENCY", "8"))
+UPLOAD_RETRIES = int(os.environ.get("RDW_UPLOAD_RETRIES", "5"))
+UPLOAD_MODES = ("batch", "bulk", "single")
+UPLOAD_MODE = os.environ.get("RDW_UPLOAD_MODE", "batch")
+EMULATOR_PROJECT = "demo-rdw"
+
+try:
+    from google.api_core import exceptions as gexc
+    RETRYABLE = (gexc.Aborted, gexc.ServiceUnavailable, gexc.ResourceExhausted, gexc.DeadlineExceeded,
+                 gexc.InternalServerError)
+except ImportError:
+    RETRYABLE = ()
+
+# gRPC-statuscodes voor dezelfde tijdelijke fouten (BulkWriter geeft codes i.p.v. exceptions)
+RETRYABLE_CODES = {4, 8, 10, 13, 14}
+_STATS_LOCK = threading.Lock()
+
+
+def firestore_client(cred_path="service-account.json"):
+    """Firestore-client; met FIRESTORE_EMULATOR_HOST tegen de emulator (zonder credentials)."""
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore as gfirestore
+        project = os.environ.get("GCLOUD_PROJECT", EMULATOR_PROJECT)
+        return gfirestore.Client(project=project, credentials=AnonymousCredentials())
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(credentials.Certificate(cred_path))
+    return firestore.client()
+
+
+def _backoff(attempt):
+    return min(10.0, 0.2 * 2 ** attempt) * (0.5 + random.random())
+
+
+def _commit_batch(db, collection, chunk, retries, stats, merge=False):
+    """Schrijf één chunk [(doc_id, data)] als WriteBatch (data None = verwijderen); herhaal bij tijdelijke fouten."""
+    coll = db.collection(collection)
+    for attempt in range(retries + 1):
+        batch = db.batch()
+        for doc_id, data in chunk:
+            if data is None:
+                batch.delete(coll.document(doc_id))
+            else:
+                batch.set(coll.document(doc_id), data, merge=merge)
+        try:
+            batch.commit()
+            return
+        except RETRYABLE as e:
+            if attempt == retries:
+                raise
+            with _STATS_LOCK:
+                stats["retries"] += 1
+            print(f"  Upload: batch of {len(chunk)} failed ({type(e).__name__}), retry {attempt + 1}/{retries}")
+            time.sleep(_backoff(attempt))
+
+
+def _upload_batches(db, collection, docs, batch_size, concurrency, retries, stats, merge=False):
+    chunks = [docs[i:i + batch_size] for i in range(0, len(docs), batch_size)]
+    stats["batches"] = len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for future in [pool.submit(_commit_batch, db, collection, c, retries, stats, merge) for c in chunks]:
+            future.result()  # eerste definitieve fout wordt hier doorgegeven
+
+
+def _upload_bulk(db, collection, docs, retries, stats, merge=False):
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+    failed = []
+
+    def on_error(failure, _writer):
+        if failure.code in RETRYABLE_CODES and failure.attempts < retries:
+            stats["retries"] += 1
+            return True
+        failed.append(failure)
+        return False
+
+    writer = db.bulk_writer(BulkWriterOptions(initial_ops_per_second=MAX_BATCH_SIZE, max_ops_per_second=10000))
+    writer.on_write_error(on_error)
+    coll = db.collection(collection)
+    for doc_id, data in docs:
+        writer.set(coll.document(doc_id), data, merge=merge)
+    writer.close()
+    if failed:
+        raise RuntimeError(f"BulkWriter: {len(failed)} writes to '{collection}' failed "
+                           f"(first: code {failed[0].code}, {failed[0].message})")
+
+
+def upload_documents(db, collection, docs, mode="batch", batch_size=UPLOAD_BATCH_SIZE,
+                     concurrency=UPLOAD_CONCURRENCY, retries=UPLOAD_RETRIES, merge=False):
+    """
+    Schrijf docs [(doc_id, data)] naar collection (set, overschrijft; merge=True werkt alleen de gegeven
+    velden bij). Retourneert de statistieken als dict (documents, batches, retries, seconds,
+    docs_per_second) en print een samenvatting.
+    """
+    docs = list(docs)
+    if mode not in UPLOAD_MODES:
+        raise ValueError(f"unknown upload mode {mode!r} (expected one of {', '.join(UPLOAD_MODES)})")
+    stats = {"documents": len(docs), "batches": 0, "retries": 0}
+    t0 = time.perf_counter()
+    if mode == "batch":
+        _upload_batches(db, collection, docs, min(MAX_BATCH_SIZE, max(1, batch_size)), concurrency, retries, stats,
+                        merge)
+    elif mode == "bulk":
+        _upload_bulk(db, collection, docs, retries, stats, merge)
+    else:
+        coll = db.collection(collection)
+        for doc_id, data in docs:
+            coll.document(doc_id).set(data, merge=merge)
+    stats["seconds"] = time.perf_counter() - t0
+    stats["docs_per_second"] = len(docs) / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    detail = f"{stats['batches']} batches x {concurrency} parallel, " if mode == "batch" else ""
+    print(f"Upload: {len(docs)} documents to '{collection}' in {stats['seconds']:.2f}s "
+          f"({stats['docs_per_second']:.0f} docs/s; mode {mode}, {detail}{stats['retries']} retries)")
+    return stats
+
+
+def delete_documents(db, collection, doc_ids, batch_size=UPLOAD_BATCH_SIZE, concurrency=UPLOAD_CONCURRENCY,
+                     retries=UPLOAD_RETRIES):
+    """Verwijder doc_ids uit collection in batches (parallel, met retry); retourneert de statistieken."""
+    ops = [(doc_id, None) for doc_id in doc_ids]
+    stats = {"documents": len(ops), "batches": 0, "retries": 0}
+    t0 = time.perf_counter()
+    if ops:
+        _upload_batches(db, collection, ops, min(MAX_BATCH_SIZE, max(1, batch_size)), concurrency, retries, stats)
+    stats["seconds"] = time.perf_counter() - t0
+    print(f"Delete: {len(ops)} documents from '{collection}' in {stats['seconds']:.2f}s "
+          f"({stats['batches']} batches, {stats['retries']} retries)")
+    return stats
+
+
+def list_document_ids(db, collection):
+    """Alle document-ID's van collection, zonder velden over de lijn (projectie op __name__)."""
+    from google.cloud.firestore_v1.field_path import FieldPath
+    return {snap.id for snap in db.collection(collection).select([FieldPath.document_id()]).stream()}
+
+
+def main():
+    from rdw_sink import open_sink, parse_sink  # rdw_sink gebruikt deze module zelf
+    parser = argparse.ArgumentParser(description="Benchmark the Firestore upload (use the emulator for offline runs)")
+    parser.add_argument("--zones", default=os.path.join("data", "processed", "zones.json"),
+                        help="Zones JSON (output of fetch_rdw_data.py --sink local)")
+    parser.add_argument("--collection", default="zones_bench")
+    parser.add_argument("--repeat", type=int, default=1, help="Upload every zone N times (ids get a suffix)")
+    parser.add_argument("--mode", choices=UPLOAD_MODES, default=UPLOAD_MODE)
+    parser.add_argument("--batch-size", type=int, default=UPLOAD_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=UPLOAD_CONCURRENCY)
+    parser.add_argument("--emulator", metavar="HOST:PORT", help="Set FIRESTORE_EMULATOR_HOST (e.g. localhost:8080)")
+    parser.add_argument("--sink", type=parse_sink, default="firestore",
+                        help="Benchmark a local backend instead: local[:FILE], sqlite[:PATH] or jsonl[:DIR] (rdw_sink.py)")
+    args = parser.parse_args()
+    with open(args.zones, "r", encoding="utf-8") as f:
+        zones = json.load(f)
+    if isinstance(zones, dict):  # --sink local schrijft {doc_id: zone}
+        zones = list(zones.values())
+    docs = [(f"{z.get('mgr_id')}_{z.get('id')}_{r}", z) for r in range(args.repeat) for z in zones]
+    if args.sink != "firestore":
+        sink = open_sink(args.sink)
+        sink.upsert_many(args.collection, docs)
+        sink.close()
+        return
+    if args.emulator:
+        os.environ["FIRESTORE_EMULATOR_HOST"] = args.emulator
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        print("WARNING: FIRESTORE_EMULATOR_HOST not set, writing to the real project.")
+    upload_documents(firestore_client(), args.collection, docs, args.mode, args.batch_size, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
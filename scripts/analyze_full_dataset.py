@@ -1,10 +1,14 @@
-import urllib.request, json, urllib.parse, os
+import json, os, sys
 from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
-from dotenv import load_dotenv
-import google.generativeai as genai
-import time
+try:
+    import numpy as np
+except ImportError:  # optioneel: pure-Python fallback (zelfde rapport)
+    np = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_http import FetchEngine
+from rdw_schema import parse_datasets
+from rdw_join import build_join, join_pairs, latest_per_key
 
 # --- Config ---
 MAPPING_URL = "https://opendata.rdw.nl/resource/qtex-qwd8.json"
@@ -23,450 +27,157 @@ ALIASES = {
     "363_T12B": "12100",
 }
 
-# --- LLM Setup ---
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
-if API_KEY:
-    genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel('gemini-2.0-flash')
-else:
-    print("WARNING: No GEMINI_API_KEY found in .env. LLM translation will be skipped.")
-    model = None
-
-CACHE_FILE = "translation_cache.json"
-TRANSLATION_CACHE = {}
-
-def load_cache():
-    global TRANSLATION_CACHE
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                TRANSLATION_CACHE = json.load(f)
-        except Exception as e:
-            print(f"Error loading cache: {e}")
-
-def save_cache():
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(TRANSLATION_CACHE, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error saving cache: {e}")
-
-def translate_desc_llm(text, current_rate):
-    """
-    Translates Dutch parking tariff descriptions to specific English format using Gemini.
-    """
-    if not text: return None
-    if not model: return text # Fallback if no key
-
-    # Check Cache
-    cache_key = f"{text}|{current_rate}"
-    if cache_key in TRANSLATION_CACHE:
-        return TRANSLATION_CACHE[cache_key]
-
-    # Prompt
-    prompt = f"""
-    You are a helpful assistant for a parking app.
-    Translate the following Dutch parking tariff description into a specific English format.
-
-    Context:
-    - The 'Current Hourly Rate' for this block is: € {current_rate:.2f}
-    - The input text describes specific rules like "Start tariffs" (Stop & Shop) or "Step sizes".
-
-    Rules:
-    1. If the text mentions "stappen van X min" (steps of X min), output: "€ {current_rate:.2f}/h > payment per X minutes"
-    2. If the text mentions "Stop en Shop" or "eerste X min Y...", output: "€ [Price] for the first [X] minutes. € {current_rate:.2f} per hour after [X] minutes".
-       (Note: The 'after' price should be the Current Hourly Rate provided above).
-    3. If the text is generic or just repeats the rate, output it simply as "€ {current_rate:.2f} per hour".
-    4. Keep it concise. No markdown, no explanations. Just the final string.
-
-    Input Dutch: "{text}"
-    Output English:
-    """
+# Dataset (rdw_schema.SCHEMAS) -> SODA-resource
+DATASET_URLS = {
+    "areas": AREAS_URL, "mapping": MAPPING_URL, "timeframes": TIJDVAK_URL,
+    "fareparts": TARIEFDEEL_URL, "regulations": DESC_URL, "calculations": CALC_URL,
+}
+
+HAVE_NUMPY = np is not None
 
-    try:
-        response = model.generate_content(prompt)
-        result = response.text.strip()
-        # Clean up quotes if model added them
-        result = result.replace('"', '').replace("'", "")
-
-        # Save to cache
-        TRANSLATION_CACHE[cache_key] = result
-        save_cache()
-        # time.sleep(4) - Removed for Paid Tier
-        return result
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        # FALLBACK: Regex Logic
-        import re
-        if "stappen van" in text:
-            match = re.search(r"stappen van (\d+) min", text)
-            if match:
-                mins = match.group(1)
-                return f"\u20ac {current_rate:.2f}/h > payment per {mins} minutes"
-        if "Stop en Shop" in text:
-             match = re.search(r"eerste (\d+)min ([\d,]+)", text)
-             if match:
-                 mins = match.group(1)
-                 price = match.group(2).replace(',', '.')
-                 return f"\u20ac {price} for the first {mins} minutes. \u20ac {current_rate:.2f} per hour after {mins} minutes"
-        return text # Ultimate fallback
+OPTION_COLUMNS = ("zone", "mgr", "area", "regulation", "day", "start", "end", "rate", "step", "amount", "desc_id",
+                  "max_duration")
 
 # --- Fetch Logic ---
 
-def fetch_json(url, params=None):
-    if params:
-        url += "?" + urllib.parse.urlencode(params)
-    print(f"  Requesting: {url}")
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read().decode('utf-8'))
+ENGINE = FetchEngine()
 
-def run_update():
-    load_cache() # Init cache
+def soda_rows(url, params=None):
+    """Alle rijen van een SODA-query, per pagina gestreamd (keyset op :id, geen afkapping op $limit)."""
+    return ENGINE.iter_rows(url, params)
 
-    cred = credentials.Certificate("service-account.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
 
-    print("Fetching RDW data...")
+# --- Optietabel (rdw_join.join_pairs): alle tariefopties van alle zones als één platte tabel ---
 
-    # 1. Fetch Zones (Specs)
-    zones_raw = []
-    for mgr in TARGET_CITIES:
-        zones_raw.extend(fetch_json(AREAS_URL, {"areamanagerid": mgr, "$limit": 5000}))
-
-    # 2. Mappings
-    mapping_raw = []
-    for mgr in TARGET_CITIES:
-        mapping_raw.extend(fetch_json(MAPPING_URL, {"areamanagerid": mgr, "$limit": 5000}))
-    mapping_raw.sort(key=lambda x: x.get('startdatearearegulation', '0'), reverse=True)
-    area_to_reg = {}
-    proc_map = set()
-    for item in mapping_raw:
-        aid, rid = item.get('areaid'), item.get('regulationid')
-        if aid and rid and (aid, rid) not in proc_map:
-            if aid not in area_to_reg: area_to_reg[aid] = []
-            area_to_reg[aid].append(rid)
-            proc_map.add((aid, rid))
-
-    # 3. Time Slots
-    slots_raw = []
-    for mgr in TARGET_CITIES:
-        slots_raw.extend(fetch_json(TIJDVAK_URL, {"areamanagerid": mgr, "$limit": 10000}))
-    slots_raw.sort(key=lambda x: x.get('startdatetimeframe', '0'), reverse=True)
-    tijdvak_map = {}
-    proc_slots = set()
-    for s in slots_raw:
-        rid, day, start = s.get('regulationid'), s.get('daytimeframe'), s.get('starttimetimeframe')
-        # Store ALL slots for a regulation for max_duration scan
-        if rid:
-             if rid not in tijdvak_map: tijdvak_map[rid] = []
-             tijdvak_map[rid].append(s)
-
-    # 4. Tariffs & Descriptions
-    tarief_raw = []
-    for mgr in TARGET_CITIES:
-        tarief_raw.extend(fetch_json(TARIEFDEEL_URL, {"areamanagerid": mgr, "$limit": 10000}))
-
-    reg_info_raw = []
-    for mgr in TARGET_CITIES:
-        reg_info_raw.extend(fetch_json(DESC_URL, {"areamanagerid": mgr, "$limit": 5000}))
-
-    calc_desc_raw = []
-    for mgr in TARGET_CITIES:
-        calc_desc_raw.extend(fetch_json(CALC_URL, {"areamanagerid": mgr, "$limit": 5000}))
-
-    reg_map = {(r['areamanagerid'], r['regulationid']): (r.get('regulationdesc'), r.get('regulationtype', 'B')) for r in reg_info_raw if 'areamanagerid' in r and 'regulationid' in r}
-    calc_map = {(c['areamanagerid'], c['farecalculationcode']): c.get('farecalculationdesc') for c in calc_desc_raw if 'areamanagerid' in c and 'farecalculationcode' in c}
-
-    tariff_parts_map = {}
-    tarief_raw.sort(key=lambda x: x.get('startdatefarepart', '0'), reverse=True)
-    today = datetime.now().strftime("%Y%m%d")
-    proc_tar = set()
-    for i in tarief_raw:
-        m, c, d = i.get('areamanagerid'), i.get('farecalculationcode'), i.get('startdatefarepart', '0')
-        if c and (m, c) not in proc_tar and d <= today:
-            amt, step = float(i.get('amountfarepart', 0)), float(i.get('stepsizefarepart', 1))
-            rate = (amt/step)*60 if step > 0 else 0
-            tariff_parts_map[(m, c)] = (rate, step, amt)
-            proc_tar.add((m, c))
-
-    # Merge all unique Area IDs
-    all_area_ids = set()
-    area_specs = {} # Map areaid -> spec dict
-
-    # Process Specs
-    for item in zones_raw:
-        aid = item.get('areaid')
-        if aid:
-            all_area_ids.add((item.get('areamanagerid'), aid))
-            area_specs[(item.get('areamanagerid'), aid)] = item
-
-    # Process Mappings
-    for item in mapping_raw:
-        aid = item.get('areaid')
-        mid = item.get('areamanagerid')
-        if aid and mid and (mid, aid) not in all_area_ids:
-            all_area_ids.add((mid, aid))
-            area_specs[(mid, aid)] = {
-                'areamanagerid': mid, 'areaid': aid, 'areadesc': None, 'areageometryaswgs84': None
-            }
-
-    print(f"Total unique zones found: {len(all_area_ids)}")
-
-    processed_zones = []
-    count = 0
-    for (mgr_id, zone_id) in all_area_ids:
-
-        item = area_specs.get((mgr_id, zone_id))
-        city = TARGET_CITIES.get(mgr_id, "Unknown")
-        name = item.get('areadesc') or f"{city} Zone {zone_id}"
-
-        # Geolocation logic
-        city_centers = {"363": (52.3676, 4.9041), "599": (51.9225, 4.47917), "518": (52.0705, 4.3007), "344": (52.0907, 5.1214)}
-        lat, lon = city_centers.get(mgr_id, (52.0907, 5.1214))
-        geo = item.get('areageometryaswgs84')
-        if geo and 'coordinates' in geo:
-            try:
-                c = geo['coordinates']
-                while isinstance(c[0], list): c = c[0]
-                lon, lat = c[0], c[1]
-            except: pass
-        if abs(lat - city_centers.get(mgr_id, (0,0))[0]) < 0.1:
-            h = sum(ord(c) for c in zone_id); lat += ((h%100)-50)*0.0004; lon += (((h*13)%100)-50)*0.0006
-
-        display_id = ALIASES.get(f"{mgr_id}_{zone_id}", zone_id)
-
-        if zone_id == "T12B" or zone_id == "T12B_U11":
-             print(f"Processing {zone_id} -> Display: {display_id}")
-
-        # Rates
-        rids = area_to_reg.get(zone_id, [zone_id])
-        all_opts = []
-
-        # Max Duration & Holidays Init
-        max_dur_mins = 24 * 60
-        special_rules = False
-
-        for rid in rids:
-            r_desc, rtype = reg_map.get((mgr_id, rid), (None, 'B'))
-
-            # Use all slots for metadata scan
-            # But filter for valid rate slots
-            valid_slots = []
-
-            # Helper to dedupe slots processed
-            seen_slots = set()
-
-            raw_slots = tijdvak_map.get(rid, [])
-            for s in raw_slots:
-                # Metadata Check
-                md = int(s.get('maxdurationright', 0))
-                if md > 0: max_dur_mins = md
-
-                day_tf = s.get('daytimeframe', '')
-                if day_tf not in ["MAANDAG", "DINSDAG", "WOENSDAG", "DONDERDAG", "VRIJDAG", "ZATERDAG", "ZONDAG", "DAGELIJKS"]:
-                    special_rules = True
-
-                # Rate Processing Logic
-                sig = (s.get('daytimeframe'), s.get('starttimetimeframe'))
-                if sig in seen_slots: continue
-                seen_slots.add(sig)
-
-                cc = s.get('farecalculationcode')
-                t_info = tariff_parts_map.get((mgr_id, cc))
-                if t_info:
-                    desc_text = calc_map.get((mgr_id, cc), cc) or ""
-
-                    if 'kaart' in desc_text.lower(): continue
-                    if t_info[1] > 60: continue
-
-                    all_opts.append({
-                        "day": s.get('daytimeframe', 'Daily'),
-                        "start": int(s.get('starttimetimeframe', '0').zfill(4)),
-                        "end": int(s.get('endtimetimeframe', '2400').zfill(4)),
-                        "rate": t_info[0], "step": t_info[1], "amt": t_info[2],
-                        "desc": desc_text, "type": rtype
-                    })
-
-        # Process per day
-        final_rates = []
-        day_names = ["MAANDAG", "DINSDAG", "WOENSDAG", "DONDERDAG", "VRIJDAG", "ZATERDAG", "ZONDAG"]
-
-        # Expand 'Daily'
-        by_day = {}
-        for o in all_opts:
-            d_raw = o['day'].upper()
-            days_to_apply = day_names if d_raw in ['DAGELIJKS', 'DAILY', 'ELKE DAG'] else [d_raw]
-            for d in days_to_apply:
-                if d not in by_day: by_day[d] = []
-                c = o.copy()
-                c['day'] = d
-                by_day[d].append(c)
-
-        day_order = {d: i for i, d in enumerate(day_names)}
-        sorted_days = sorted(by_day.keys(), key=lambda d: day_order.get(d, 99))
-
-        for day in sorted_days:
-            opts = by_day[day]
-            if not opts: continue
-
-            # Sweep Line Points
-            points = set([0, 2400])
-            for o in opts:
-                points.add(o['start'])
-                points.add(o['end'])
-            sorted_points = sorted(list(points))
-
-            merged_slots = []
-            for i in range(len(sorted_points) - 1):
-                t_start = sorted_points[i]
-                t_end = sorted_points[i+1]
-
-                active = [r for r in opts if r['start'] <= t_start and r['end'] >= t_end]
-
-                if not active:
-                    best = {"rate": 0, "desc": "Vrij parkeren", "amt": 0, "step": 0}
-                else:
-                    active.sort(key=lambda x: (x['rate'], len(x['desc'])), reverse=True)
-                    best = active[0]
-
-                if merged_slots:
-                    prev = merged_slots[-1]
-                    price_match = abs(prev['rate'] - best['rate']) < 0.01
-                    if price_match:
-                        prev['end'] = t_end
-                        continue
-
-                merged_slots.append({
-                    "start": t_start, "end": t_end,
-                    "rate": best['rate'], "desc": best['desc'], "step": best['step'], "amt": best['amt']
-                })
-
-            # Post-Process: Merge adjacent PAID slots with LLM Translation
-            final_merged = []
-            if merged_slots:
-                curr = merged_slots[0]
-                curr['source_slots'] = [curr.copy()]
-
-                for i in range(1, len(merged_slots)):
-                    next_s = merged_slots[i]
-                    is_curr_paid = curr['rate'] > 0
-                    is_next_paid = next_s['rate'] > 0
-
-                    if is_curr_paid and is_next_paid:
-                        curr['end'] = next_s['end']
-                        curr['rate'] = max(curr['rate'], next_s['rate'])
-                        curr['source_slots'].append(next_s)
-                    else:
-                        final_merged.append(curr)
-                        curr = next_s
-                        curr['source_slots'] = [curr.copy()]
-                final_merged.append(curr)
-
-                # Generate Text & Labels
-                for m in final_merged:
-                    m['formatted_lines'] = []
-                    seen_texts = set()
-
-                    # Calculate Display Price (e.g. per 15 min)
-                    display_price_label = f"\u20ac {m['rate']:.2f} / u" # Default
-
-                    steps = [s['step'] for s in m['source_slots'] if s['rate'] > 0]
-                    if steps:
-                        avg_step = max(set(steps), key=steps.count)
-                        if avg_step >= 10:
-                            step_price = (m['rate'] / 60) * avg_step
-                            display_price_label = f"\u20ac {step_price:.2f} / {int(avg_step)} min"
-
-                    m['display_label'] = display_price_label
-
-                    for s in m['source_slots']:
-                         # CALL LLM HERE
-                         if s['desc'] and ("stappen" in s['desc'] or "Stop" in s['desc'] or len(s['desc']) > 15):
-                             txt = translate_desc_llm(s['desc'], m['rate'])
-                         else:
-                             txt = None
-
-                         if not txt:
-                             if s['rate'] > 0:
-                                 if s['step'] >= 480:
-                                     txt = f"\u20ac {s['amt']:.2f} / dag"
-                                 else:
-                                     txt = f"\u20ac {s['rate']:.2f} per uur"
-                                     if s['step'] > 0 and s['step'] != 60:
-                                         txt += f" (stappen van {int(s['step'])} min)"
-
-                         if txt and txt not in seen_texts:
-                             m['formatted_lines'].append(txt)
-                             seen_texts.add(txt)
-
-            # Format Output
-            for m in final_merged:
-                if m['rate'] == 0:
-                     label = "Free parking"
-                     detail = "Vrij parkeren"
-                else:
-                     label = m.get('display_label', f"\u20ac {m['rate']:.2f} / h")
-                     detail = "|".join(m.get('formatted_lines', []))
-
-                t_str = f"{day.capitalize()} {str(m['start']).zfill(4)[:2]}:{str(m['start']).zfill(4)[2:]} - {str(m['end']).zfill(4)[:2]}:{str(m['end']).zfill(4)[2:]}"
-
-                final_rates.append({
-                    "time": t_str,
-                    "price": label.replace('.', ','),
-                    "detail": detail
-                })
-
-        best_price = 0.0
-        for m in final_rates:
-            # Simple heuristic for map pin price
-             pass
-
-        if final_rates:
-             # Find max price for pin
-             # Since 'price' is a string now, we need to rely on what we calculated earlier.
-             # Actually, let's just re-iterate opts for max rate
-             max_r = 0
-             for o in all_opts:
-                 if o['rate'] > max_r: max_r = o['rate']
-             best_price = max_r
-
-        processed_zones.append({
-            "id": display_id, "name": name, "city": city, "mgr_id": mgr_id,
-            "lat": lat, "lng": lon, "price": best_price,
-            "rates": final_rates,
-            "max_duration_mins": max_dur_mins,
-            "has_special_rules": special_rules
-        })
+def latest_slots(slots):
+    """Per (regeling, dag, starttijd) het nieuwste TimeFrame (group-by argmax, zie rdw_join)."""
+    keys = [(s.regulation_id, s.day_name, s.start) if s.regulation_id else None for s in slots]
+    return [slots[i] for i in latest_per_key(keys, [s.start_date for s in slots])]
 
-    print(f"Analyzing {len(processed_zones)} zones...")
 
-    stats = {} # mgr_id -> { total: 0, zero: 0, zero_details: { usage_id: count } }
+def _take(values, idx, dtype=None):
+    """values[idx] voor een lijst indices (NumPy fancy indexing of list comprehension)."""
+    if HAVE_NUMPY:
+        return np.asarray(values, dtype=dtype)[np.asarray(idx, dtype=np.intp)]
+    return [values[i] for i in idx]
 
-    for z in processed_zones:
-        mid = z['mgr_id']
-        price = z['price']
 
-        # We need usageid, which was lost in the original script loop.
-        # But wait, we need to capture it from the mapping step first.
-        # See modification below.
+def option_table(lk, zone_keys):
+    """
+    Platte tabel met de tariefopties van zone_keys ([(mgr, areaid)]), volgens dezelfde regels als het
+    weekrooster: regelingen via area_to_reg (anders regelingid = areaid), per regeling het nieuwste
+    tijdvak per (dag, starttijd), alleen tijdvakken met een tariefdeel van de beheerder van de zone.
+    lk: build_join-uitvoer plus calc_map en latest_slots. Retourneert (kolommen, desc_vocab): kolommen volgens
+    OPTION_COLUMNS (NumPy-arrays, of lijsten zonder NumPy); "zone" indexeert zone_keys, desc_id desc_vocab.
+    """
+    area_to_reg, slots = lk["area_to_reg"], lk["latest_slots"]
+    tariff_parts_map, calc_map = lk["tariff_parts_map"], lk["calc_map"]
+    slot_rids = [(s.regulation_id,) for s in slots]
+
+    # zone x regeling -> tijdvakken
+    zone_rids, zone_of = [], []
+    for zi, (mgr_id, zone_id) in enumerate(zone_keys):
+        for rid in area_to_reg.get(zone_id, [zone_id]):
+            zone_rids.append((rid,))
+            zone_of.append(zi)
+    zr_idx, slot_idx = join_pairs(zone_rids, slot_rids)
+
+    # (beheerder zone, tariefcode tijdvak) -> tariefdeel; paren zonder tariefdeel vallen af
+    zone_idx = _take(zone_of, zr_idx)
+    t_keys = list(tariff_parts_map)
+    zone_mgr, slot_code = [k[0] for k in zone_keys], [sl.fare_code for sl in slots]
+    zone_list = zone_idx.tolist() if HAVE_NUMPY else zone_idx
+    pair_keys = [(zone_mgr[z], slot_code[q]) for z, q in zip(zone_list, slot_idx)]
+    pair_idx, t_idx = join_pairs(pair_keys, t_keys)
+    zone_idx, zr_idx, slot_idx = _take(zone_idx, pair_idx), _take(zr_idx, pair_idx), _take(slot_idx, pair_idx)
+
+    vocab, vocab_ids, t_desc = [], {}, []
+    for mgr_id, code in t_keys:
+        desc = calc_map.get((mgr_id, code), code) or ""
+        t_desc.append(vocab_ids.setdefault(desc, len(vocab_ids)))
+        if len(vocab) < len(vocab_ids):
+            vocab.append(desc)
+    t_info = list(tariff_parts_map.values())
+
+    cols = {
+        "zone": zone_idx,
+        "mgr": _take(zone_mgr, zone_idx, dtype=object),
+        "area": _take([k[1] for k in zone_keys], zone_idx, dtype=object),
+        "regulation": _take([r[0] for r in zone_rids], zr_idx, dtype=object),
+        "day": _take([int(s.day) for s in slots], slot_idx),
+        "start": _take([s.start for s in slots], slot_idx),
+        "end": _take([s.end for s in slots], slot_idx),
+        "rate": _take([t[0] for t in t_info], t_idx, dtype=float),
+        "step": _take([t[1] for t in t_info], t_idx, dtype=float),
+        "amount": _take([t[2] for t in t_info], t_idx, dtype=float),
+        "desc_id": _take(t_desc, t_idx),
+        "max_duration": _take([s.max_duration for s in slots], slot_idx),
+    }
+    return cols, vocab
+
+
+def max_rate_per_zone(cols, vocab, n_zones, desc_filter=None, max_step=None):
+    """
+    Hoogste tarief per zone (index in zone_keys; 0.0 zonder opties). desc_filter(desc) -> bool en
+    max_step beperken welke opties meetellen.
+    """
+    desc_ok = [desc_filter is None or bool(desc_filter(d)) for d in vocab]
+    if HAVE_NUMPY:
+        out = np.zeros(n_zones)
+        if len(cols["zone"]):
+            mask = np.array(desc_ok, dtype=bool)[cols["desc_id"]]
+            if max_step is not None:
+                mask &= cols["step"] <= max_step
+            np.maximum.at(out, cols["zone"][mask], cols["rate"][mask])
+        return out.tolist()
+    out = [0.0] * n_zones
+    for z, d, st, r in zip(cols["zone"], cols["desc_id"], cols["step"], cols["rate"]):
+        if desc_ok[d] and (max_step is None or st <= max_step) and r > out[z]:
+            out[z] = r
+    return out
 
-        pass
 
-    # Re-writing the main loop to include UsageID capture
-    # This block replaces the end of run_update
+def run_update():
+    print("Fetching RDW data...")
+    raw = {name: [] for name in DATASET_URLS}
+    for name, url in DATASET_URLS.items():
+        for mgr in TARGET_CITIES:
+            raw[name].extend(soda_rows(url, {"areamanagerid": mgr}))
+
+    # Join gebied -> regeling -> tijdvak -> tariefdeel (rdw_join.py, gedeeld met fetch_rdw_data.py)
+    typed = parse_datasets(raw)
+    today = datetime.now().strftime("%Y%m%d")
+    joined = build_join(typed, today)
+    mapping_raw = joined["mapping_sorted"]
+    calc_map = {(c.manager, c.fare_code): c.desc for c in typed["calculations"] if c.manager is not None and c.fare_code is not None}
+
+    # Merge all unique Area IDs (gebieden + gebieden die alleen in de mapping staan)
+    all_area_ids = {(item.manager, item.area_id) for item in typed["areas"] if item.area_id}
+    all_area_ids |= {(item.manager, item.area_id) for item in mapping_raw if item.area_id and item.manager}
+    zone_keys = sorted(all_area_ids, key=lambda k: (k[0] or "", k[1]))
+
+    print(f"Total unique zones found: {len(zone_keys)}")
+
+    # Pin-prijs = hoogste uurtarief over de opties van de zone (zonder dag-/weekkaarten en stappen > 60 min)
+    lk = {**joined, "calc_map": calc_map, "latest_slots": latest_slots(typed["timeframes"])}
+    cols, desc_vocab = option_table(lk, zone_keys)
+    prices = max_rate_per_zone(cols, desc_vocab, len(zone_keys),
+                               desc_filter=lambda d: 'kaart' not in d.lower(), max_step=60)
+    processed_zones = [
+        {"id": ALIASES.get(f"{mgr_id}_{zone_id}", zone_id), "mgr_id": mgr_id, "price": price}
+        for (mgr_id, zone_id), price in zip(zone_keys, prices)
+    ]
+
+    print(f"Analyzing {len(processed_zones)} zones...")
 
     cities = {k:v for k,v in TARGET_CITIES.items()}
     report = {city: {"total": 0, "zero": 0, "usage_map": {}} for city in cities.values()}
 
-    # We need to re-map usageid from all_opts or area_specs?
-    # Actually, usageid comes from mapping_raw.
-    # Let's build a map: (mgr, zone) -> usageid
+    # (mgr, zone) -> usageid uit de mapping
     usage_map = {}
     for item in mapping_raw:
-        if 'usageid' in item:
-            usage_map[(item.get('areamanagerid'), item.get('areaid'))] = item.get('usageid')
+        if item.usage_id is not None:
+            usage_map[(item.manager, item.area_id)] = item.usage_id
 
     for z in processed_zones:
         mgr = z['mgr_id']
@@ -0,0 +1,133 @@
+"""
+Benchmark: dagtarieven samenvoegen (fetch_rdw_data.merge_day_rates) met de eenvoudige scan, de
+heap-sweep en de automatische keuze (sweep vanaf RATE_MERGE_SWEEP_MIN opties), op alle dag-optielijsten
+die de transform voor een snapshot maakt. Controleert eerst dat scan en sweep exact dezelfde uitvoer geven.
+Een tabel per aantal opties per dag laat zien waar de sweep de scan inhaalt (basis voor de drempel).
+
+Gebruik (vanuit projectroot):
+  python scripts/bench_rate_merge.py                        # data/raw, alle beheerders in de snapshot
+  python scripts/bench_rate_merge.py --snapshot data/raw --managers 3,14 --repeat 5
+Snapshotdagen hebben weinig opties; --dense N plakt N echte daglijsten aan elkaar om het gedrag bij
+veel overlappende tijdvakken (landelijke dekking) te tonen.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+import fetch_rdw_data as fdr
+from rdw_columnar import snapshot_records
+
+
+def forced(threshold):
+    """merge_day_rates met een vaste keuze: threshold 0 = altijd heap-sweep, None = altijd scan."""
+    def run(opts):
+        saved = fdr.RATE_MERGE_SWEEP_MIN
+        fdr.RATE_MERGE_SWEEP_MIN = len(opts) + 1 if threshold is None else threshold
+        try:
+            return fdr.merge_day_rates(opts)
+        finally:
+            fdr.RATE_MERGE_SWEEP_MIN = saved
+    return run
+
+
+scan, sweep = forced(None), forced(0)
+
+
+def slot_tuples(slots):
+    return [(s.start, s.end, s.rate, s.desc, s.step, s.amt) for s in slots]
+
+
+def collect_day_options(snapshot_dir):
+    """Draai de transform op de snapshot en bewaar elke optielijst die aan merge_day_rates wordt gegeven."""
+    captured = []
+    merge_fn = fdr.merge_day_rates
+
+    def recording_merge(opts, merge=True):
+        if merge:  # de ongemergde sweep voor price_grid niet dubbel tellen
+            captured.append(opts)
+        return merge_fn(opts, merge)
+
+    fdr.merge_day_rates = recording_merge
+    try:
+        typed = fdr.load_snapshot(snapshot_dir, time.strftime("%Y%m%d"))
+        lk = fdr.build_lookups_typed(typed, time.strftime("%Y%m%d"))
+        for mgr_id, zone_id in lk["all_area_ids"]:
+            fdr.build_zone(mgr_id, zone_id, lk)
+    finally:
+        fdr.merge_day_rates = merge_fn
+    return captured
+
+
+def bench(fn, day_opts, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for opts in day_opts:
+            fn(opts)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-day rate merging (scan vs heap sweep vs automatic)")
+    parser.add_argument("--snapshot", default=os.path.join(PROJECT_ROOT, "data", "raw"),
+                        help="Directory with SODA JSON or columnar snapshots (default data/raw)")
+    parser.add_argument("--managers", help="Comma-separated areamanagerids (default: all in the snapshot)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per implementation (best is reported)")
+    parser.add_argument("--dense", type=int, default=50,
+                        help="Also time synthetic dense days made of N concatenated real day lists (0 = skip)")
+    args = parser.parse_args()
+
+    if args.managers:
+        managers = [m.strip() for m in args.managers.split(",") if m.strip()]
+    else:
+        timeframes = snapshot_records(args.snapshot, "tijdvak", "timeframes") or []
+        managers = sorted({tf.manager for tf in timeframes} - {None})
+    fdr.TARGET_CITIES = {m: fdr.TARGET_CITIES.get(m, "Unknown") for m in managers}
+    fdr.USE_DATE_FILTER = False  # alle tijdvakken meenemen: zwaarste geval
+    fdr.model = None
+
+    day_opts = [opts for opts in collect_day_options(args.snapshot) if opts]
+    sizes = Counter(len(opts) for opts in day_opts)
+    print(f"Day option lists: {len(day_opts)} (options per day: max {max(sizes, default=0)}, "
+          f"total {sum(len(o) for o in day_opts)})")
+
+    workloads = [("snapshot days", day_opts)]
+    if args.dense > 1:
+        dense = [sum(day_opts[i:i + args.dense], []) for i in range(0, len(day_opts), args.dense)]
+        workloads.append((f"dense x{args.dense}", dense))
+
+    for label, lists in workloads:
+        mismatches = sum(1 for opts in lists if slot_tuples(sweep(opts)) != slot_tuples(scan(opts)))
+        if mismatches:
+            print(f"[FAIL] {label}: {mismatches} day lists differ between scan and sweep")
+            sys.exit(1)
+    print("[OK] Heap sweep output identical to the scan")
+
+    print(f"Automatic choice: heap sweep from {fdr.RATE_MERGE_SWEEP_MIN} options per day (RDW_RATE_MERGE_SWEEP_MIN)")
+    print(f"{'WORKLOAD':<16} {'LISTS':>6} {'SCAN s':>8} {'SWEEP s':>9} {'AUTO s':>8} {'SWEEP/SCAN':>11}")
+    for label, lists in workloads:
+        t_scan, t_sweep = bench(scan, lists, args.repeat), bench(sweep, lists, args.repeat)
+        t_auto = bench(fdr.merge_day_rates, lists, args.repeat)
+        speedup = f"{t_scan / t_sweep:.1f}x" if t_sweep else "n/a"
+        print(f"{label:<16} {len(lists):>6} {t_scan:>8.3f} {t_sweep:>9.3f} {t_auto:>8.3f} {speedup:>11}")
+
+    # Per aantal opties: eerste n opties van aaneengesloten echte daglijsten (zelfde totaal aantal opties).
+    pool = sum(day_opts, [])
+    print(f"\n{'OPTIONS/DAY':>11} {'SCAN us':>9} {'SWEEP us':>9} {'SWEEP/SCAN':>11}")
+    for n in (1, 2, 4, 8, 16, 32, 64, 128):
+        if n > len(pool):
+            break
+        lists = [pool[i:i + n] for i in range(0, len(pool) - n + 1, n)][:2000]
+        t_scan, t_sweep = bench(scan, lists, args.repeat), bench(sweep, lists, args.repeat)
+        print(f"{n:>11} {t_scan / len(lists) * 1e6:>9.1f} {t_sweep / len(lists) * 1e6:>9.1f} "
+              f"{t_scan / t_sweep:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,38 +8,26 @@ PROJECT_ROOT = os.path.dirname(BASE_DIR)
 RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 OUTPUT_FILE = os.path.join(PROCESSED_DIR, "mock_parking.json")
-
-def load_json(filename):
-    path = os.path.join(RAW_DIR, filename)
-    if not os.path.exists(path):
+COLUMNAR_DIR = os.path.join(PROJECT_ROOT, "data", "columnar")
+
+sys.path.insert(0, PROJECT_ROOT)
+from rdw_columnar import snapshot_records
+from rdw_schema import amount_to_float, format_hhmm
+
+def load_records(filename, name):
+    # Kolomsnapshot (python rdw_columnar.py data/raw data/columnar) levert records zonder JSON-parse; anders data/raw.
+    stem = filename[: -len(".json")]
+    records = snapshot_records(COLUMNAR_DIR, stem, name)
+    if records is None:
+        records = snapshot_records(RAW_DIR, stem, name)
+    if records is None:
         print(f"[ERROR] Missing file: {filename}")
         sys.exit(1)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def safe_int(v, default=0):
-    try:
-        return int(float(v))
-    except:
-        return default
-
-def safe_float(v, default=0.0):
-    try:
-        return float(v)
-    except:
-        return default
-
-def parse_time_any(row, keys):
-    for k in keys:
-        if k in row and row[k]:
-            t = str(row[k]).zfill(4)
-            return f"{t[:2]}:{t[2:]}"
-    return None
+    return records
 
 def build():
-    tijdvakken = load_json("tijdvak.json")
-    tariefdelen = load_json("tariefdeel.json")
-    tariefberekeningen = load_json("tariefberekening.json")
+    tijdvakken = load_records("tijdvak.json", "timeframes")
+    tariefdelen = load_records("tariefdeel.json", "fareparts")
 
     zones = [
         {
@@ -72,20 +60,16 @@ def build():
         is_day_pass = False
 
         for tv in tijdvakken[:200]:  # bewust beperken
-            start = parse_time_any(tv, ["starttime", "start_time", "starttijd"])
-            end = parse_time_any(tv, ["endtime", "end_time", "eindtijd"])
-
-            if not start or not end:
-                continue
+            start = format_hhmm(tv.start)
+            end = format_hhmm(tv.end)
 
-            fcc = tv.get("farecalculationcode")
             prijs = 0.0
             step = 60
 
             for td in tariefdelen:
-                if td.get("farecalculationcode") == fcc:
-                    prijs = safe_float(td.get("amountfarepart"))
-                    step = safe_int(td.get("stepsizefarepart"), 60)
+                if td.fare_code == tv.fare_code:
+                    prijs = amount_to_float(td.amount)
+                    step = td.step
                     break
 
             blocks.append({
@@ -1,6 +1,10 @@
-import urllib.request, json, urllib.parse, os
+import json, urllib.parse, os, sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rdw_http  # gedeelde HTTP-cache (ETag/Last-Modified)
+from rdw_temporal import valid_on  # zelfde geldigheidsregel als de pipeline
+
 # --- Config ---
 MAPPING_URL = "https://opendata.rdw.nl/resource/qtex-qwd8.json"
 TIJDVAK_URL = "https://opendata.rdw.nl/resource/ixf8-gtwq.json"
@@ -16,8 +20,7 @@ def fetch_json(url, params=None):
     if params:
         url += "?" + urllib.parse.urlencode(params)
     print(f"Requesting: {url}")
-    with urllib.request.urlopen(url) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return rdw_http.fetch_json(url)
 
 def run_debug():
     print(f"DEBUGGING ZONE: {TARGET_MGR} - {TARGET_ZONE}")
@@ -38,14 +41,13 @@ def run_debug():
 
     rids = []
     for m in mappings:
-        start = m.get('startdatearearegulation', '0')
-        end = m.get('enddatearearegulation', '99999999')
-        if not end: end = '99999999'
+        start = m.get('startdatearearegulation')
+        end = m.get('enddatearearegulation')
 
         print(f"  Mapping Object: {m}")
         print(f"  Mapping: RegID={m.get('regulationid')} Start={start} End={end}")
 
-        if start <= today <= end:
+        if valid_on(start, end, today):
             rids.append(m.get('regulationid'))
         else:
             print("    -> SKIPPED (Date mismatch)")
@@ -84,16 +86,15 @@ def run_debug():
 
             found_part = False
             for p in parts:
-                p_start = p.get('startdatefarepart', '0')
-                p_end = p.get('enddatefarepart', '99999999')
-                if not p_end: p_end = '99999999'
+                p_start = p.get('startdatefarepart')
+                p_end = p.get('enddatefarepart')
 
                 amt = float(p.get('amountfarepart', 0))
                 step = float(p.get('stepsizefarepart', 1))
                 rate = (amt/step)*60 if step > 0 else 0
 
                 status = "INACTIVE"
-                if p_start <= today <= p_end:
+                if valid_on(p_start, p_end, today):
                     status = "ACTIVE  "
                     found_part = True
 
@@ -1,31 +1,39 @@
 #!/usr/bin/env python3
 """
 Enrich parking zones with street addresses using Nominatim reverse geocoding.
-This script reads zones from Firestore, fetches addresses for each zone,
-and updates the zones with street + house number data.
+This script reads zones from the sink (Firestore by default, or a local SQLite/JSONL
+store, see rdw_sink.py), fetches addresses for each zone, and updates the zones with
+street + house number data.
 
 Usage: python scripts/enrich_zones_with_addresses.py
+       python scripts/enrich_zones_with_addresses.py --sink sqlite --limit 10   # offline store
 """
 
+import argparse
 import os
+import sys
 import glob
 import requests
 import time
-import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from rdw_sink import DEFAULT_SINK, open_sink, parse_sink
 
 # Rate limit: 1 request per second for Nominatim
 NOMINATIM_DELAY = 1.1  # seconds between requests
+# Updates are written in small batches (merge), so an interrupted run keeps its progress
+WRITE_EVERY = 25
+# Only these fields are read from the sink (field mask)
+ZONE_FIELDS = ["id", "lat", "lng", "street", "city"]
 
 
 def find_service_account_key():
     """Find Firebase service account key: serviceAccountKey.json or *adminsdk*.json in project root."""
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    path1 = os.path.join(root, "serviceAccountKey.json")
+    path1 = os.path.join(PROJECT_ROOT, "serviceAccountKey.json")
     if os.path.isfile(path1):
         return path1
-    for path in glob.glob(os.path.join(root, "*adminsdk*.json")):
+    for path in glob.glob(os.path.join(PROJECT_ROOT, "*adminsdk*.json")):
         if os.path.isfile(path):
             return path
     return None
@@ -94,45 +102,31 @@ def reverse_geocode(lat, lon):
         return None
 
 
-def init_firebase():
-    """Initialize Firebase Admin SDK."""
-    try:
-        return firestore.client()
-    except Exception:
-        pass
-
+def open_zone_sink(spec):
+    """Open the sink; for Firestore (without emulator) a service account key is required."""
+    if spec != "firestore" or os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        return open_sink(spec)
     key_path = find_service_account_key()
     if not key_path:
         print("No service account key found. Place serviceAccountKey.json or")
-        print("q8-parking-pwa-firebase-adminsdk-*.json in the project root.")
-        return None
-
-    try:
-        cred = credentials.Certificate(key_path)
-        firebase_admin.initialize_app(cred)
-        print(f"Using key: {os.path.basename(key_path)}\n")
-        return firestore.client()
-    except Exception as e:
-        print(f"Firebase init error: {e}")
+        print("q8-parking-pwa-firebase-adminsdk-*.json in the project root,")
+        print("or run against a local store with --sink local[:FILE] / sqlite[:PATH] / jsonl[:DIR].")
         return None
+    print(f"Using key: {os.path.basename(key_path)}\n")
+    return open_sink(spec, cred_path=key_path)
 
 
-def enrich_zones():
+def enrich_zones(sink, collection="zones", limit=0):
     """Main function to enrich all zones with address data."""
     print("=" * 60)
     print("Zone Address Enrichment Script")
     print("=" * 60)
 
-    # Initialize Firestore
-    db = init_firebase()
-    if not db:
-        print("\nCannot connect to Firestore. Running in test mode with local JSON...")
-        return enrich_local_json()
-
-    # Fetch all zones
-    print("\nFetching zones from Firestore...")
-    zones_ref = db.collection("zones")
-    zones = list(zones_ref.stream())
+    # Fetch all zones (only the fields we need)
+    print(f"\nFetching zones from {sink}...")
+    zones = list(sink.stream(collection, ZONE_FIELDS))
+    if limit:
+        zones = zones[:limit]
     total = len(zones)
     print(f"Found {total} zones\n")
 
@@ -140,10 +134,10 @@ def enrich_zones():
     updated = 0
     skipped = 0
     errors = 0
+    pending = []
 
-    for i, zone_doc in enumerate(zones):
-        zone = zone_doc.to_dict()
-        zone_id = zone.get("id", zone_doc.id)
+    for i, (doc_id, zone) in enumerate(zones):
+        zone_id = zone.get("id", doc_id)
 
         # Check if already has address
         if zone.get("street") and zone.get("city"):
@@ -168,7 +162,6 @@ def enrich_zones():
         address = reverse_geocode(lat, lng)
 
         if address and address.get("street"):
-            # Update Firestore
             update_data = {
                 "street": address["street"],
                 "houseNumber": address["houseNumber"],
@@ -179,7 +172,10 @@ def enrich_zones():
             if address["city"] and not zone.get("city"):
                 update_data["city"] = address["city"]
 
-            zones_ref.document(zone_doc.id).update(update_data)
+            pending.append((doc_id, update_data))
+            if len(pending) >= WRITE_EVERY:
+                sink.upsert_many(collection, pending, merge=True)
+                pending = []
 
             addr_str = f"{address['street']} {address['houseNumber']}".strip()
             print(f"         -> {addr_str}, {address['city']}")
@@ -188,6 +184,9 @@ def enrich_zones():
             print(f"         -> No address found")
             errors += 1
 
+    if pending:
+        sink.upsert_many(collection, pending, merge=True)
+
     # Print summary
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -199,61 +198,19 @@ def enrich_zones():
     print("=" * 60)
 
 
-def enrich_local_json():
-    """Fallback: Enrich local JSON file for testing."""
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    input_file = os.path.join(root, "data", "parking_zones.json")
-    output_file = os.path.join(root, "data", "parking_zones_enriched.json")
-
-    print(f"\nReading {input_file}...")
-
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            zones = json.load(f)
-    except FileNotFoundError:
-        print(f"File not found: {input_file}")
-        return
-
-    total = len(zones)
-    print(f"Found {total} zones\n")
-
-    # Only process first 10 as demo (to avoid rate limits)
-    demo_limit = 10
-    print(f"Demo mode: processing first {demo_limit} zones\n")
-
-    for i, zone in enumerate(zones[:demo_limit]):
-        zone_id = zone.get("id", "unknown")
-        lat = zone.get("lat")
-        lng = zone.get("lng")
-
-        if not lat or not lng:
-            print(f"[{i+1}/{demo_limit}] {zone_id} - No coordinates, skipping")
-            continue
-
-        print(f"[{i+1}/{demo_limit}] {zone_id} - Geocoding ({lat}, {lng})...")
-
-        time.sleep(NOMINATIM_DELAY)
-
-        address = reverse_geocode(lat, lng)
-
-        if address and address.get("street"):
-            zone["street"] = address["street"]
-            zone["houseNumber"] = address["houseNumber"]
-            if not zone.get("city"):
-                zone["city"] = address["city"]
-            zone["postcode"] = address["postcode"]
-
-            addr_str = f"{address['street']} {address['houseNumber']}".strip()
-            print(f"         -> {addr_str}, {address['city']}")
-        else:
-            print(f"         -> No address found")
-
-    # Save enriched data
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(zones, f, indent=2, ensure_ascii=False)
-
-    print(f"\nSaved enriched zones to {output_file}")
+def main():
+    parser = argparse.ArgumentParser(description="Enrich parking zones with street addresses (Nominatim)")
+    parser.add_argument("--sink", type=parse_sink, default=DEFAULT_SINK,
+                        help=f"Zone store: firestore, local[:FILE], sqlite[:PATH] or jsonl[:DIR] (rdw_sink.py; default {DEFAULT_SINK})")
+    parser.add_argument("--collection", default="zones")
+    parser.add_argument("--limit", type=int, default=0, help="Process at most N zones (0 = all)")
+    args = parser.parse_args()
+    sink = open_zone_sink(args.sink)
+    if sink is None:
+        sys.exit(2)
+    enrich_zones(sink, args.collection, args.limit)
+    sink.close()
 
 
 if __name__ == "__main__":
-    enrich_zones()
+    main()
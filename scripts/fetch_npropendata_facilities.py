@@ -7,6 +7,7 @@ Zie: docs/PLAN_GARAGES_P_R_NPROPENDATA.md
 Gebruik (vanuit projectroot):
   python scripts/fetch_npropendata_facilities.py
   python scripts/fetch_npropendata_facilities.py --dry-run   # geen Firestore, alleen print
+  python scripts/fetch_npropendata_facilities.py --sink sqlite   # offline: lokale store (rdw_sink.py)
 """
 import argparse
 import json
@@ -18,12 +19,9 @@ import urllib.error
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-except ImportError:
-    print("firebase_admin required: pip install firebase-admin")
-    sys.exit(2)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from rdw_sink import DEFAULT_SINK, open_sink, parse_sink
 
 # --- Config ---
 FACILITY_LIST_URL = "https://npropendata.rdw.nl/parkingdata/v2/"
@@ -229,32 +227,29 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Do not write to Firestore, only print count and sample")
     parser.add_argument("--limit", type=int, default=0, help="Max number of facilities to fetch (0 = all)")
     parser.add_argument("--incremental", action="store_true", help="Skip static fetch when staticDataLastUpdated unchanged (faster weekly run)")
+    parser.add_argument("--sink", type=parse_sink, default=DEFAULT_SINK,
+                        help=f"Where to write: firestore, local[:FILE], sqlite[:PATH] or jsonl[:DIR] (rdw_sink.py; default {DEFAULT_SINK})")
     args = parser.parse_args()
 
-    # Firebase (vanuit projectroot: service-account.json)
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    cred_path = os.path.join(root, "service-account.json")
-    if not os.path.isfile(cred_path):
-        cred_path = os.path.join(root, "q8-parking-pwa-firebase-adminsdk-fbsvc-9e50406bcb.json")
-    if not args.dry_run and not os.path.isfile(cred_path):
-        print(f"Firebase credentials not found: {cred_path}", file=sys.stderr)
-        sys.exit(2)
+    sink = None
     if not args.dry_run:
-        try:
-            cred = credentials.Certificate(cred_path)
-            firebase_admin.get_app()
-        except ValueError:
-            firebase_admin.initialize_app(cred)
-        db = firestore.client()
+        # Firebase (vanuit projectroot: service-account.json); alleen nodig voor --sink firestore zonder emulator
+        cred_path = os.path.join(PROJECT_ROOT, "service-account.json")
+        if not os.path.isfile(cred_path):
+            cred_path = os.path.join(PROJECT_ROOT, "q8-parking-pwa-firebase-adminsdk-fbsvc-9e50406bcb.json")
+        if (args.sink == "firestore" and not os.environ.get("FIRESTORE_EMULATOR_HOST")
+                and not os.path.isfile(cred_path)):
+            print(f"Firebase credentials not found: {cred_path}", file=sys.stderr)
+            sys.exit(2)
+        sink = open_sink(args.sink, cred_path=cred_path)
 
     # Bij --incremental: laad bestaande docs (id -> doc) om staticDataLastUpdated te vergelijken
     existing_by_id = {}
-    if args.incremental and not args.dry_run and db:
+    if args.incremental and sink is not None:
         try:
-            for doc in db.collection("facilities").stream():
-                d = doc.to_dict()
+            for _, d in sink.stream("facilities"):
                 existing_by_id[d.get("id")] = d
-            print(f"Incremental: loaded {len(existing_by_id)} existing facilities from Firestore.")
+            print(f"Incremental: loaded {len(existing_by_id)} existing facilities from {sink}.")
         except Exception as e:
             print(f"Incremental: could not load existing docs: {e}. Doing full fetch.", file=sys.stderr)
             existing_by_id = {}
@@ -311,12 +306,10 @@ def main():
             print(f"  {d.get('type')}: {d.get('name')} @ {d.get('city')} ({d.get('lat')}, {d.get('lng')})")
         return
 
-    coll = db.collection("facilities")
-    for doc in results:
-        doc_id = doc["id"]
-        # Firestore document ID moet string zijn; UUID mag
-        coll.document(doc_id).set(doc)
-    print(f"Written {len(results)} documents to Firestore collection 'facilities'.")
+    # Firestore document ID moet string zijn; UUID mag. Schrijven in batches (rdw_upload.py).
+    sink.upsert_many("facilities", [(doc["id"], doc) for doc in results])
+    sink.close()
+    print(f"Written {len(results)} documents to collection 'facilities' ({sink}).")
 
 
 if __name__ == "__main__":
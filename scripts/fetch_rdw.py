@@ -1,97 +1,74 @@
-import os
+"""
+Snapshot van de RDW-datasets voor fetch_rdw_data.py --from-snapshot (standaard naar data/raw).
+
+Dezelfde queries als de live run: elke dataset uit DATASET_SPECS (URL, $select, bestandsnaam) per
+beheerder, volledig gepagineerd via rdw_http (keyset op :id, keep-alive, HTTP-cache met revalidatie).
+Geen globale $limit meer: die leverde willekeurige rijen van andere beheerders en kapte stil af.
+Standaard zonder geldigheidsfilter, zodat de replay elke referentiedatum en --as-of kan bedienen;
+--valid-only haalt alleen de rijen die vandaag geldig zijn (kleiner, maar alleen voor vandaag bruikbaar).
+
+Gebruik:
+  python scripts/fetch_rdw.py                       # TARGET_CITIES -> data/raw
+  python scripts/fetch_rdw.py --managers 14,193 --out /tmp/snap
+"""
+import argparse
 import json
-import urllib.request
-import urllib.error
+import os
 import sys
+import urllib.error
+from datetime import datetime
 
 # Robuuste padbepaling
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 DATA_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 
-# RDW Dataset Config (SODA Resource API)
-# URL pattern: https://opendata.rdw.nl/resource/<id>.json
-DATASETS = {
-    "gebied.json": {
-        "id": "adw6-9hsg",
-        "fields": "areamanagerid,areaid"
-    },
-    # GEEN $select -> voorkomt HTTP 400 door onzekere kolomnamen
-    "regeling.json": {
-        "id": "yefi-qfiq",
-        "fields": None
-    },
-    # GEEN $select -> voorkomt HTTP 400
-    "tijdvak.json": {
-        "id": "ixf8-gtwq",
-        "fields": None
-    },
-    "tariefdeel.json": {
-        "id": "534e-5vdg",
-        "fields": "areamanagerid,farecalculationcode,amountfarepart,stepsizefarepart,startdurationfarepart"
-    },
-    "tariefberekening.json": {
-        "id": "nfzq-8g7y",
-        # Alles ophalen: nodig voor tekstuele DayPass-detectie
-        "fields": None
-    }
-}
-
-LIMIT = 10000  # Ruim voldoende voor demo-intersecties
-
-def fetch_data():
-    print(f"Checking data directory: {DATA_DIR}")
-    if not os.path.exists(DATA_DIR):
-        try:
-            os.makedirs(DATA_DIR)
-            print("Created data/raw directory.")
-        except OSError as e:
-            print(f"[ERROR] Cannot create directory {DATA_DIR}: {e}")
-            sys.exit(1)
-
-    for filename, config in DATASETS.items():
-        filepath = os.path.join(DATA_DIR, filename)
-
-        # Cache check
-        if os.path.exists(filepath):
-            print(f"[CACHE] {filename} already exists. Skipping download.")
-            continue
-
-        # Build query params
-        query_params = [f"$limit={LIMIT}"]
-        if config["fields"]:
-            query_params.append(f"$select={config['fields']}")
-
-        url = f"https://opendata.rdw.nl/resource/{config['id']}.json?" + "&".join(query_params)
-
-        print(f"[DOWNLOADING] {filename}")
-        print(f"   URL: {url}")
-
-        try:
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=30) as response:
-                content = response.read().decode("utf-8")
-
-                try:
-                    data = json.loads(content)
-                except json.JSONDecodeError:
-                    print(f"   -> FAILED: Invalid JSON received for {filename}")
-                    continue
-
-                if not isinstance(data, list):
-                    print(f"   -> WARNING: Expected JSON array, got {type(data)}")
-
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(data, f)
-
-                print(f"   -> Success! Saved {len(data)} records to {filename}")
+sys.path.insert(0, PROJECT_ROOT)
+from rdw_http import FetchEngine  # keep-alive pool, paginering en HTTP-cache
+from fetch_rdw_data import DATASET_SPECS, FETCH_CONCURRENCY, TARGET_CITIES, dataset_params
+
+
+def fetch_snapshot(managers, out_dir=DATA_DIR, valid_only=False):
+    """Alle datasets x managers ophalen en per dataset één SODA-JSON-bestand schrijven (spec["snapshot"])."""
+    today = datetime.now().strftime("%Y%m%d")
+    tasks = [(name, spec["url"], {"areamanagerid": mgr, **dataset_params(name, today, today, valid_only)})
+             for name, spec in DATASET_SPECS.items() for mgr in managers]
+    engine = FetchEngine(concurrency=FETCH_CONCURRENCY)
+    try:
+        results = engine.fetch_all(tasks)
+    finally:
+        engine.close()
+    engine.print_summary()
+
+    rows_by_name = {name: [] for name in DATASET_SPECS}
+    for (name, _, _), rows in zip(tasks, results):
+        rows_by_name[name].extend(rows)
+    # Pas schrijven als alles binnen is: een half bijgewerkte snapshot mengt oude en nieuwe rijen.
+    os.makedirs(out_dir, exist_ok=True)
+    for name, rows in rows_by_name.items():
+        filename = DATASET_SPECS[name]["snapshot"]
+        with open(os.path.join(out_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        print(f"[OK] {filename}: {len(rows)} rows for {len(managers)} managers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the RDW datasets the pipeline reads as a replayable snapshot")
+    parser.add_argument("--managers", help="Comma-separated areamanagerids (default: TARGET_CITIES of fetch_rdw_data.py)")
+    parser.add_argument("--out", default=DATA_DIR, help=f"Snapshot directory (default {DATA_DIR})")
+    parser.add_argument("--valid-only", action="store_true",
+                        help="Only rows valid today (smaller; the replay then only works for today's date)")
+    args = parser.parse_args()
+    managers = [m.strip() for m in args.managers.split(",") if m.strip()] if args.managers else list(TARGET_CITIES)
+    try:
+        fetch_snapshot(managers, args.out, args.valid_only)
+    except urllib.error.HTTPError as e:
+        print(f"[ERROR] HTTP {e.code} {e.reason}: {e.filename}")
+        sys.exit(1)
+    except (urllib.error.URLError, OSError) as e:
+        print(f"[ERROR] Download failed: {e}")
+        sys.exit(1)
 
-        except urllib.error.HTTPError as e:
-            print(f"   -> FAILED to download {filename}: HTTP {e.code} {e.reason}")
-        except urllib.error.URLError as e:
-            print(f"   -> FAILED to download {filename}: {e.reason}")
-        except Exception as e:
-            print(f"   -> UNEXPECTED ERROR for {filename}: {e}")
 
 if __name__ == "__main__":
-    fetch_data()
+    main()
@@ -1,20 +1,23 @@
-import urllib.request
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 def search_dataset(dataset_id, name, query_func):
 
     url = f"https://opendata.rdw.nl/resource/{dataset_id}.json?$limit=50000"
     print(f"--- Searching {name} ({dataset_id}) ---")
     try:
-        with urllib.request.urlopen(url) as response:
-            data = json.loads(response.read().decode("utf-8"))
-            matches = [d for d in data if query_func(d)]
-            if matches:
-                print(f"Found {len(matches)} matches.")
-                print("First match sample:")
-                print(json.dumps(matches[0], indent=2))
-            else:
-                print("No matches found.")
+        data = fetch_json(url)
+        matches = [d for d in data if query_func(d)]
+        if matches:
+            print(f"Found {len(matches)} matches.")
+            print("First match sample:")
+            print(json.dumps(matches[0], indent=2))
+        else:
+            print("No matches found.")
     except Exception as e:
         print(f"Error: {e}")
     print("\n")
@@ -1,5 +1,6 @@
-import urllib.request, json
+import json
 import time
+from rdw_http import fetch_json  # gedeelde HTTP-cache (ETag/Last-Modified)
 
 MGR = "363"
 # TC2 is the code for 6.98/hr.
@@ -10,8 +11,7 @@ MAPPING_URL = "https://opendata.rdw.nl/resource/qtex-qwd8.json"
 
 def fetch(url, limit=1000):
     print(f"Fetching {url}")
-    with urllib.request.urlopen(f"{url}?areamanagerid={MGR}&$limit={limit}") as r:
-        return json.loads(r.read().decode())
+    return fetch_json(f"{url}?areamanagerid={MGR}&$limit={limit}")
 
 def run():
     print("Fetching Time Frames...")
@@ -0,0 +1,70 @@
+"""
+Kolomsnapshots (rdw_columnar.py): records uit de getypeerde kolommen moeten gelijk zijn aan parse_rows
+over dezelfde SODA-rijen, ook bij ontbrekende waarden, en de JSON-snapshot moet hetzelfde opleveren.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_columnar.py
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_columnar import ColumnarDataset, convert_rows, snapshot_records
+from rdw_schema import Day, parse_rows
+
+TIMEFRAMES = [
+    {"areamanagerid": "14", "regulationid": "R1", "daytimeframe": "MAANDAG", "starttimetimeframe": "930",
+     "endtimetimeframe": "1800", "farecalculationcode": "C1", "maxdurationright": "120",
+     "startdatetimeframe": "20200101000000"},
+    {"areamanagerid": "363", "regulationid": "R2", "daytimeframe": "Feestdag", "starttimetimeframe": "0",
+     "endtimetimeframe": "2400", "startdatetimeframe": "20210101000000", "enddatetimeframe": "20301231235959"},
+    {"areamanagerid": "14", "regulationid": "R3", "daytimeframe": "DAGELIJKS", "endtimetimeframe": "700",
+     "farecalculationcode": "C2", "maxdurationright": "0", "startdatetimeframe": "20200101000000"},
+]
+FAREPARTS = [
+    {"areamanagerid": "14", "farecalculationcode": "C1", "amountfarepart": "0.04166667",
+     "stepsizefarepart": "1", "startdurationfarepart": "0", "startdatefarepart": "20200101"},
+    {"areamanagerid": "14", "farecalculationcode": "C1", "amountfarepart": "-1.50000000",
+     "stepsizefarepart": "60", "startdurationfarepart": "120", "startdatefarepart": "20200101",
+     "enddatefarepart": "20291231"},
+    {"areamanagerid": "363", "farecalculationcode": "C9", "stepsizefarepart": "15"},
+]
+
+
+class ColumnarRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for stem, rows in (("tijdvak", TIMEFRAMES), ("tariefdeel", FAREPARTS)):
+            convert_rows(rows, os.path.join(self.tmp.name, "columnar", stem))
+            os.makedirs(os.path.join(self.tmp.name, "raw"), exist_ok=True)
+            with open(os.path.join(self.tmp.name, "raw", f"{stem}.json"), "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_match_parse_rows(self):
+        ds = ColumnarDataset(os.path.join(self.tmp.name, "columnar", "tijdvak"))
+        self.assertEqual(ds.meta["columns"]["starttimetimeframe"]["type"], "int")  # geen omweg via strings
+        records = ds.records("timeframes")
+        self.assertEqual(records, parse_rows("timeframes", TIMEFRAMES))
+        self.assertEqual((records[0].start, records[0].day), (570, Day.MAANDAG))
+        self.assertEqual((records[1].day, records[1].day_name, records[1].fare_code), (Day.SPECIAL, "FEESTDAG", None))
+        self.assertEqual(records[2].start, 0)  # ontbrekend: default "0"
+
+        fareparts = ColumnarDataset(os.path.join(self.tmp.name, "columnar", "tariefdeel")).records("fareparts")
+        self.assertEqual(fareparts, parse_rows("fareparts", FAREPARTS))
+        self.assertEqual([p.amount for p in fareparts], [4166667, -150000000, 0])
+
+    def test_managers_and_json_fallback(self):
+        for fmt in ("columnar", "raw"):
+            records = snapshot_records(os.path.join(self.tmp.name, fmt), "tijdvak", "timeframes", managers={"14"})
+            self.assertEqual(records, parse_rows("timeframes", [TIMEFRAMES[0], TIMEFRAMES[2]]))
+        self.assertIsNone(snapshot_records(self.tmp.name, "tijdvak", "timeframes"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+FetchEngine (rdw_http.py) tegen een lokale HTTP-server: revalidatie met TTL 0, retry bij 429 met
+Retry-After en bij een verbroken keep-alive verbinding.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_rdw_http.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_http import FetchEngine, HttpCache, retry_delay
+
+BODY = json.dumps([{"areamanagerid": "14"}]).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, zoals de RDW-server
+
+    def do_GET(self):
+        server = self.server
+        server.seen.append(dict(self.headers))
+        script = server.script.pop(0) if server.script else "ok"
+        if script == "drop":
+            self.close_connection = True  # geen antwoord: RemoteDisconnected bij de client
+            return
+        if script == "429":
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.script, self.server.seen = [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/resource/x.json"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = FetchEngine(concurrency=1, cache=HttpCache(self.tmp.name))
+
+    def tearDown(self):
+        self.engine.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_default_ttl_revalidates(self):
+        self.assertEqual(self.engine.get_json(self.url, dataset="x"), [{"areamanagerid": "14"}])
+        self.assertEqual(self.engine.get_json(self.url, dataset="x"), [{"areamanagerid": "14"}])
+        self.assertEqual(len(self.server.seen), 2)  # geen verse cache-hit zonder request
+        self.assertEqual(self.server.seen[1].get("If-None-Match"), '"v1"')
+        self.assertEqual(self.engine.stats.by_dataset["x"]["cache_304"], 1)
+
+    def test_retries_429(self):
+        self.server.script = ["429", "429"]
+        self.assertEqual(self.engine.get_json(self.url), [{"areamanagerid": "14"}])
+        self.assertEqual(len(self.server.seen), 3)
+
+    def test_retries_dropped_connection(self):
+        # Twee keer verbroken: de pool geeft het na één verse verbinding op, de engine probeert opnieuw.
+        self.server.script = ["drop", "drop"]
+        self.assertEqual(self.engine.get_json(self.url), [{"areamanagerid": "14"}])
+        self.assertEqual(len(self.server.seen), 3)
+
+
+class RetryDelayTest(unittest.TestCase):
+    def test_retry_after(self):
+        self.assertEqual(retry_delay({"Retry-After": "5"}, 1.0), 5.0)
+        self.assertEqual(retry_delay({"Retry-After": "3600"}, 1.0), 60)  # begrensd
+        self.assertEqual(retry_delay({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 1.0), 0.0)  # verleden
+        self.assertEqual(retry_delay({}, 2.0), 2.0)
+        self.assertEqual(retry_delay({"Retry-After": "soon"}, 2.0), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Reconciliatie in upload_zones (fetch_rdw_data.py) tegen een lokale SQLite-sink.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_reconcile.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetch_rdw_data as fdr
+from rdw_sink import SQLiteSink
+
+
+def zone(mgr_id, area_id, price=2.0):
+    return {"id": area_id, "name": f"Zone {area_id}", "mgr_id": mgr_id, "price": price}
+
+
+class ReconcileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sink = SQLiteSink(os.path.join(self.tmp.name, "zones.sqlite3"))
+        # beheerder 14 is klein genoeg dat de 50%-grens het verwijderen niet zou tegenhouden
+        self.zones = [zone("141", f"A{i}") for i in range(8)] + [zone("14", f"B{i}") for i in range(3)]
+        fdr.upload_zones(self.sink, self.zones)
+
+    def tearDown(self):
+        self.sink.close()
+        self.tmp.cleanup()
+
+    def ids(self):
+        return self.sink.list_ids("zones")
+
+    def test_managers_subset_keeps_other_managers(self):
+        # run met --managers 141: de zones van beheerder 14 horen niet bij deze run en blijven staan
+        fdr.upload_zones(self.sink, self.zones[:8], managers={"141"})
+        self.assertEqual(self.ids(), {fdr.zone_doc_id(z) for z in self.zones})
+
+    def test_managers_subset_removes_own_stale_zones(self):
+        fdr.upload_zones(self.sink, self.zones[:7], managers={"141"})
+        self.assertEqual(self.ids(), {fdr.zone_doc_id(z) for z in self.zones if z["id"] != "A7"})
+
+    def test_full_run_removes_orphans(self):
+        fdr.upload_zones(self.sink, self.zones[:8])
+        self.assertEqual(self.ids(), {fdr.zone_doc_id(z) for z in self.zones[:8]})
+
+    def test_mass_delete_guard(self):
+        fdr.upload_zones(self.sink, self.zones[:4])
+        self.assertEqual(len(self.ids()), 11)
+        fdr.upload_zones(self.sink, self.zones[:4], allow_mass_delete=True)
+        self.assertEqual(len(self.ids()), 4)
+
+    def test_dry_run_writes_nothing(self):
+        fdr.upload_zones(self.sink, self.zones[:8] + [zone("14", "NEW")], dry_run=True)
+        self.assertEqual(self.ids(), {fdr.zone_doc_id(z) for z in self.zones})
+
+
+if __name__ == "__main__":
+    unittest.main()
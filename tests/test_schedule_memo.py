@@ -0,0 +1,65 @@
+"""
+ScheduleMemo (fetch_rdw_data.py): het memo mag de uitvoer niet veranderen, ook niet als een gebied
+meerdere regelingen heeft en de volgorde uit area_to_reg het rooster bepaalt.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_schedule_memo.py
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetch_rdw_data as fdr
+
+TODAY = "20260101"
+
+
+def timeframe(rid, code, max_duration):
+    return {"areamanagerid": "14", "regulationid": rid, "daytimeframe": "MAANDAG", "starttimetimeframe": "900",
+            "endtimetimeframe": "1800", "farecalculationcode": code, "maxdurationright": str(max_duration),
+            "startdatetimeframe": "20200101000000"}
+
+
+def mapping(area_id, rid, start):
+    return {"areamanagerid": "14", "areaid": area_id, "regulationid": rid, "usageid": "BETAALDP",
+            "startdatearearegulation": start}
+
+
+# A en B hebben dezelfde regelingen in omgekeerde volgorde (nieuwste mapping eerst); gelijk uurtarief
+# met een even lange omschrijving, maar andere stapgrootte en max. parkeerduur.
+RAW = {
+    "areas": [{"areamanagerid": "14", "areaid": "A"}, {"areamanagerid": "14", "areaid": "B"}],
+    "mapping": [mapping("A", "R1", "20250101"), mapping("A", "R2", "20240101"),
+                mapping("B", "R1", "20240101"), mapping("B", "R2", "20250101")],
+    "timeframes": [timeframe("R1", "C1", 60), timeframe("R2", "C2", 120)],
+    "fareparts": [{"areamanagerid": "14", "farecalculationcode": code, "amountfarepart": amount,
+                   "stepsizefarepart": step, "startdurationfarepart": "0", "startdatefarepart": "20200101"}
+                  for code, amount, step in (("C1", "0.50000000", "15"), ("C2", "1.00000000", "30"))],
+    "regulations": [],
+    "calculations": [{"areamanagerid": "14", "farecalculationcode": "C1", "farecalculationdesc": "Tarief A"},
+                     {"areamanagerid": "14", "farecalculationcode": "C2", "farecalculationdesc": "Tarief B"}],
+}
+
+
+class ScheduleMemoTest(unittest.TestCase):
+    def setUp(self):
+        self.lk = fdr.build_lookups(RAW, TODAY)
+
+    def test_order_of_regulations_is_kept(self):
+        self.assertEqual(self.lk["area_to_reg"]["A"], ["R1", "R2"])
+        self.assertEqual(self.lk["area_to_reg"]["B"], ["R2", "R1"])
+        a, b = fdr.build_zone("14", "A", self.lk), fdr.build_zone("14", "B", self.lk)
+        self.assertEqual(a["max_duration_mins"], 120)  # laatste regeling met een max. duur wint
+        self.assertEqual(b["max_duration_mins"], 60)
+        self.assertNotEqual(a["rates"], b["rates"])  # gelijk tarief: de eerste optie levert de stappen
+
+    def test_memo_matches_unmemoized_build(self):
+        memo = fdr.ScheduleMemo()
+        for zone_id in ("A", "B", "A"):
+            self.assertEqual(fdr.build_zone("14", zone_id, self.lk, memo), fdr.build_zone("14", zone_id, self.lk))
+        self.assertEqual((memo.hits, memo.misses), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
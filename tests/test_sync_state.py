@@ -0,0 +1,99 @@
+"""
+Incrementele sync (rdw_sync.py, fetch_rdw_data.py --incremental): de lokale kopie en high-water marks
+worden pas na een geslaagde upload vastgelegd, niet bij een dry run.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_sync_state.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetch_rdw_data as fdr
+from rdw_sink import SQLiteSink
+from rdw_sync import SyncState
+
+UPDATED = "2026-01-01T00:00:00.000Z"
+
+ROWS = {
+    "areas": [{"areamanagerid": "14", "areaid": "A"}],
+    "mapping": [{"areamanagerid": "14", "areaid": "A", "regulationid": "R1", "usageid": "BETAALDP",
+                 "startdatearearegulation": "20200101"}],
+    "timeframes": [{"areamanagerid": "14", "regulationid": "R1", "daytimeframe": "MAANDAG",
+                    "starttimetimeframe": "900", "endtimetimeframe": "1800", "farecalculationcode": "C1",
+                    "maxdurationright": "0", "startdatetimeframe": "20200101000000"}],
+    "fareparts": [{"areamanagerid": "14", "farecalculationcode": "C1", "amountfarepart": "0.50000000",
+                   "stepsizefarepart": "15", "startdurationfarepart": "0", "startdatefarepart": "20200101"}],
+    "regulations": [],
+    "calculations": [],
+}
+URL_TO_NAME = {spec["url"]: name for name, spec in fdr.DATASET_SPECS.items()}
+
+
+class FakeEngine:
+    """FetchEngine-vervanger: levert ROWS (met :id en :updated_at) per beheerder, geen netwerk."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def fetch_all(self, tasks):
+        out = []
+        for _, url, params in tasks:
+            rows = ROWS[URL_TO_NAME[url]] if params["areamanagerid"] == "14" else []
+            out.append([{":id": f"row-{i}", ":updated_at": UPDATED, **r} for i, r in enumerate(rows)])
+        return out
+
+    def close(self):
+        pass
+
+    def print_summary(self):
+        pass
+
+
+class SyncStateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_dir = os.path.join(self.tmp.name, "sync")
+        self.sink_path = os.path.join(self.tmp.name, "zones.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_writes_nothing_before_commit(self):
+        state = SyncState(self.state_dir)
+        queries = [("timeframes", fdr.TIJDVAK_URL, "14", {})]
+        raw, changed = state.sync(FakeEngine(), queries)
+        state.save_meta("20260101")
+        self.assertEqual(len(changed["timeframes"]), 1)
+        self.assertEqual(os.listdir(self.state_dir), [])
+        state.commit()
+        reloaded = SyncState(self.state_dir)
+        self.assertEqual(reloaded.load("timeframes", "14")[0], UPDATED)
+        self.assertEqual(reloaded.last_reference_date, "20260101")
+
+    def run_incremental(self, dry_run):
+        with mock.patch.object(fdr, "FetchEngine", FakeEngine), \
+                mock.patch.object(fdr, "SyncState", lambda: SyncState(self.state_dir)), \
+                mock.patch.object(fdr, "TARGET_CITIES", {"14": "Test"}), \
+                mock.patch.object(fdr, "model", None), \
+                mock.patch.object(fdr, "USE_DATE_FILTER", False):
+            fdr.run_update(incremental=True, sink=f"sqlite:{self.sink_path}", workers=1, dry_run=dry_run)
+        return SyncState(self.state_dir).load("timeframes", "14")
+
+    def test_dry_run_keeps_the_delta(self):
+        self.assertEqual(self.run_incremental(dry_run=True), (None, {}))
+        hwm, rows = self.run_incremental(dry_run=False)
+        self.assertEqual((hwm, len(rows)), (UPDATED, 1))
+
+    def test_failed_upload_keeps_the_delta(self):
+        with mock.patch.object(SQLiteSink, "upsert_many", side_effect=RuntimeError("upload failed")):
+            with self.assertRaises(RuntimeError):
+                self.run_incremental(dry_run=False)
+        self.assertEqual(SyncState(self.state_dir).load("timeframes", "14"), (None, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Parallelle transform (fetch_rdw_data.build_zones) met spawn-workers: de worker importeert de module
+opnieuw, maar een cache-miss moet ook dan verzameld en door het (stub)model vertaald worden.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_transform_workers.py
+"""
+import functools
+import multiprocessing
+import os
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetch_rdw_data as fdr
+from rdw_translate import StubModel, template_key
+
+TODAY = "20260101"
+DESCS = {"14": "Bijzondere regeling", "15": "Evenementenregeling"}  # geen regel: naar het model
+
+RAW = {
+    "areas": [{"areamanagerid": mgr, "areaid": f"A{mgr}"} for mgr in DESCS],
+    "mapping": [{"areamanagerid": mgr, "areaid": f"A{mgr}", "regulationid": "R1", "usageid": "BETAALDP",
+                 "startdatearearegulation": "20200101"} for mgr in DESCS],
+    "timeframes": [{"areamanagerid": mgr, "regulationid": "R1", "daytimeframe": "MAANDAG",
+                    "starttimetimeframe": "900", "endtimetimeframe": "1800", "farecalculationcode": "C1",
+                    "startdatetimeframe": "20200101000000"} for mgr in DESCS],
+    "fareparts": [{"areamanagerid": mgr, "farecalculationcode": "C1", "amountfarepart": "0.50000000",
+                   "stepsizefarepart": "15", "startdurationfarepart": "0", "startdatefarepart": "20200101"}
+                  for mgr in DESCS],
+    "regulations": [],
+    "calculations": [{"areamanagerid": mgr, "farecalculationcode": "C1", "farecalculationdesc": desc}
+                     for mgr, desc in DESCS.items()],
+}
+
+
+class SpawnWorkersTest(unittest.TestCase):
+    def test_stub_model_translates_misses_from_spawn_workers(self):
+        lk = fdr.build_lookups(RAW, TODAY)
+        keys = sorted(lk["all_area_ids"])
+        model, cache = StubModel(), {}
+        spawn_pool = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+        with mock.patch.object(fdr, "ProcessPoolExecutor", spawn_pool), \
+                mock.patch.object(fdr, "model", model), \
+                mock.patch.object(fdr, "TRANSLATION_CACHE", cache), \
+                mock.patch.object(fdr, "TARGET_CITIES", {mgr: "Test" for mgr in DESCS}):
+            zones = fdr.build_zones(keys, lk, fdr.ScheduleMemo(), workers=2)
+        self.assertEqual(model.requests, 1)
+        self.assertEqual(set(cache), {template_key(desc) for desc in DESCS.values()})
+        for (mgr_id, _), zone in zip(keys, zones):
+            details = {r["detail"] for r in zone["rates"] if r["rate_numeric"]}
+            self.assertEqual(details, {f"€ 2.00 per hour ({DESCS[mgr_id]})"})
+
+
+if __name__ == "__main__":
+    unittest.main()
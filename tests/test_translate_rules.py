@@ -0,0 +1,61 @@
+"""
+Regelgebaseerde vertaling (rdw_translate_rules.py): sjablonen voor bekende omschrijvingen, ingevuld
+zoals de pipeline dat doet (describe_template + fill_template).
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_translate_rules.py
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_translate import describe_template, fill_template
+from rdw_translate_rules import rule_template
+
+
+def translate(text, rate=2.50):
+    """Omschrijving -> Engelse tekst via de regels; None als geen regel past."""
+    pattern, values = describe_template(text)
+    template = rule_template(pattern)
+    return None if template is None else fill_template(template, rate, values)
+
+
+class SteppedRulesTest(unittest.TestCase):
+    def test_amount_per_step_is_kept(self):
+        self.assertEqual(translate("Garagetarief (12,00 euro/1440 min)"), "€ 12.00 per 1440 minutes")
+        self.assertEqual(translate("0,50 euro per 60 minuten", rate=1.60), "€ 0.50 per 60 minutes")
+        self.assertEqual(translate("0,40 per 12 min of een gedeelte hiervan"), "€ 0.40 per 12 minutes")
+
+    def test_hourly_rate_in_steps(self):
+        self.assertEqual(translate("2,40 per uur, te betalen in stappen van 5 min, hoogtarief"),
+                         "€ 2.40/h > payment per 5 minutes")
+        self.assertEqual(translate("eerste half uur gratis, daarna 1,67 per uur in stapgroottes van 18 min"),
+                         "€ 0.00 for the first 30 minutes. € 2.50/h > payment per 18 minutes")
+
+    def test_pure_steps_use_rate(self):
+        self.assertEqual(translate("Betalen in stappen van 15 min"), "€ 2.50/h > payment per 15 minutes")
+
+
+class CatchAllRulesTest(unittest.TestCase):
+    def test_unused_tariffs_get_no_rule(self):
+        for text in ("NULL", "Verwijderen", "overbodig", "Niet in gebruik", "-", "n.v.t.", "Tarief null",
+                     "Tarief niet in gebruik", "Basistarief (niet in gebruik)", "Tarief - niet gebruiken"):
+            self.assertIsNone(translate(text), text)
+
+    def test_names_with_amount_get_no_rule(self):
+        self.assertIsNone(translate("Tarief deelauto's 0,00 p/u (stap 15)"))
+
+    def test_generic_names_use_rate(self):
+        for text in ("Tarief A", "Uurtarief", "Kortparkeren zone A", "Regulier tarief 1", "Tarief A - Binnenstad"):
+            self.assertEqual(translate(text), "€ 2.50 per hour", text)
+        self.assertEqual(translate("Tarief 0"), "Free parking")
+
+    def test_named_hourly_amount(self):
+        self.assertEqual(translate("Dagparkeren 1,90/u max 60 min", rate=1.90), "€ 1.90 per hour, max. 60 minutes")
+        self.assertEqual(translate("Dagparkeren 1,60 p/u max 3 uur", rate=1.60), "€ 1.60 per hour, max. 3 hours")
+        self.assertEqual(translate("Dagparkeren 0,80 per 30 min"), "€ 0.80 per 30 minutes")
+
+
+if __name__ == "__main__":
+    unittest.main()
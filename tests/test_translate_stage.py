@@ -0,0 +1,137 @@
+"""
+TranslationStage (rdw_translate.py) tegen StubModel: batching, onvolledige antwoorden, mislukte batches
+en de token bucket.
+
+Uitvoeren (vanuit projectroot):
+  python -m pytest tests/test_translate_stage.py
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rdw_translate import StubModel, TokenBucket, TranslationStage, parse_response, template_key
+
+
+def stage(model, cache=None, batch_size=10):
+    """Stage zonder merkbare rate limit (de bucket zelf wordt apart getest)."""
+    return TranslationStage(model, {} if cache is None else cache, batch_size=batch_size, concurrency=2,
+                            requests_per_minute=600000)
+
+
+class DroppingModel(StubModel):
+    """StubModel dat in prompts met meer dan één item de regels voor `drop` weglaat (onvolledig antwoord)."""
+
+    def __init__(self, drop):
+        super().__init__()
+        self.drop = drop
+
+    def generate_content(self, prompt):
+        response = super().generate_content(prompt)
+        lines = response.text.splitlines()
+        if len(lines) > 1:
+            response.text = "\n".join(l for l in lines if not any(f"({p})" in l for p in self.drop))
+        return response
+
+
+class FailingModel(StubModel):
+    """StubModel dat elke prompt met `poison` laat mislukken (een mislukte batch)."""
+
+    def __init__(self, poison, batch_only=False):
+        super().__init__()
+        self.poison, self.batch_only = poison, batch_only
+
+    def generate_content(self, prompt):
+        items = [l for l in prompt.splitlines() if self._INPUT_RE.match(l)]
+        if any(f'"{self.poison}"' in l for l in items) and (len(items) > 1 or not self.batch_only):
+            with self.lock:
+                self.requests += 1
+            raise RuntimeError("stub model: simulated failure")
+        return super().generate_content(prompt)
+
+
+class ParseResponseTest(unittest.TestCase):
+    def test_partial_and_misaligned_lines(self):
+        text = "\n".join([
+            "Here are the translations:",  # geen nummer
+            '1 | "€ {rate} per hour"',      # aanhalingstekens eraf
+            "3) € {rate}/h > payment per {m0} minutes",
+            "7 | out of range",              # nummer buiten de batch
+            "0 | out of range",
+            "2.",                            # leeg
+        ])
+        self.assertEqual(parse_response(text, 3), {
+            0: "€ {rate} per hour",
+            2: "€ {rate}/h > payment per {m0} minutes",
+        })
+
+    def test_empty_response(self):
+        self.assertEqual(parse_response(None, 2), {})
+        self.assertEqual(parse_response("", 2), {})
+
+
+class TranslationStageTest(unittest.TestCase):
+    def test_batches_and_dedup(self):
+        patterns = [f"tarief {i}" for i in range(25)]
+        model = StubModel()
+        cache = {template_key("tarief 0"): "€ {rate} per hour"}  # al gecached: niet opnieuw vragen
+        stats = stage(model, cache).run(patterns + patterns[:5], lookups=30)
+        self.assertEqual(stats["distinct_misses"], 24)
+        self.assertEqual(model.requests, 3)  # 24 items in batches van 10
+        self.assertEqual(stats["fallback"], 0)
+        self.assertEqual(len(cache), 25)
+        self.assertEqual(cache[template_key("tarief 0")], "€ {rate} per hour")
+        self.assertEqual(cache[template_key("tarief 7")], "€ {rate} per hour (tarief 7)")
+
+    def test_partial_response_retries_missing_items(self):
+        patterns = [f"tarief {i}" for i in range(5)]
+        cache = {}
+        stats = stage(DroppingModel({"tarief 1", "tarief 3"}), cache).run(patterns)
+        self.assertEqual(stats["requests"], 3)  # één batch + twee losse herhalingen
+        self.assertEqual(stats["retried"], 2)
+        self.assertEqual(stats["fallback"], 0)
+        self.assertEqual(stats["failed_requests"], 0)
+        self.assertEqual(set(cache), {template_key(p) for p in patterns})
+
+    def test_invalid_placeholder_falls_back_uncached(self):
+        model = StubModel(translate=lambda p: "€ {price} per hour" if p == "raar" else "€ {rate} per hour")
+        cache = {}
+        stats = stage(model, cache).run(["raar", "gewoon"])
+        self.assertEqual(stats["retried"], 1)
+        self.assertEqual(stats["fallback"], 1)
+        self.assertEqual(set(cache), {template_key("gewoon")})
+
+    def test_failed_batch_retried_per_item(self):
+        patterns = [f"tarief {i}" for i in range(4)]
+        cache = {}
+        stats = stage(FailingModel("tarief 2", batch_only=True), cache, batch_size=2).run(patterns)
+        self.assertEqual(stats["failed_requests"], 1)  # de batch met tarief 2/3
+        self.assertEqual(stats["retried"], 2)
+        self.assertEqual(stats["fallback"], 0)
+        self.assertEqual(set(cache), {template_key(p) for p in patterns})
+
+    def test_failing_item_gets_fallback(self):
+        patterns = [f"tarief {i}" for i in range(4)]
+        cache = {}
+        stats = stage(FailingModel("tarief 2"), cache, batch_size=2).run(patterns)
+        self.assertEqual(stats["failed_requests"], 2)  # batch en losse herhaling
+        self.assertEqual(stats["fallback"], 1)
+        self.assertNotIn(template_key("tarief 2"), cache)
+        self.assertEqual(len(cache), 3)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_paced(self):
+        bucket = TokenBucket(rate=50.0, capacity=2)
+        t0 = time.monotonic()
+        bucket.acquire()
+        bucket.acquire()
+        self.assertLess(time.monotonic() - t0, 0.015)  # capaciteit: direct
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - t0, 5 / 50.0 - 0.01)  # daarna 50 per seconde
+
+
+if __name__ == "__main__":
+    unittest.main()